@@ -0,0 +1,284 @@
+"""
+HTTP keširanje za analitičke GET endpointe.
+
+- `cached`: in-process TTL/LRU keš odgovora. Ključ je ruta + normalizovani query
+  parametri (vrijednosti nakon FastAPI validacije, sa default-ima). Svaki unos
+  pamti verziju podataka; kada ETL završi, stari unosi se tretiraju kao promašaj.
+- `conditional`: ETag/Last-Modified iz verzije podataka kolekcija i 304 odgovori.
+
+Keš čuva renderovan odgovor; kompresovane varijante (br/gzip) prave se jednom po
+unosu, pa CompressionMiddleware ne kompresuje ponovo na svakom hitu.
+"""
+import functools
+import hashlib
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+
+from ..config import settings
+from ..services.analytics_cache import stale_served
+from ..services.data_version import data_version
+from ..services.mongo_repository import versioned_reads
+from .compression import compress, encoded_etag, is_compressible, negotiate_encoding, strip_encoding_suffix
+from .responses import BSONJSONResponse
+
+logger = logging.getLogger(__name__)
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+@dataclass
+class CacheEntry:
+    value: Response
+    version: str
+    expires_at: float
+    variants: Dict[str, bytes] = field(default_factory=dict)  # encoding -> kompresovano tijelo
+
+
+@dataclass
+class RouteStats:
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+
+
+@dataclass
+class ResponseCache:
+    """LRU keš ograničene veličine sa TTL-om po unosu"""
+    max_entries: int = 512
+    entries: "OrderedDict[Tuple, CacheEntry]" = field(default_factory=OrderedDict)
+    routes: Dict[str, RouteStats] = field(default_factory=dict)
+    evictions: int = 0
+
+    def get(self, key: Tuple, version: str) -> Optional[CacheEntry]:
+        entry = self.entries.get(key)
+        stats = self.routes.setdefault(key[0], RouteStats())
+        if entry is None:
+            stats.misses += 1
+            return None
+        if entry.version != version or entry.expires_at <= time.monotonic():
+            del self.entries[key]
+            stats.stale += 1
+            stats.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        stats.hits += 1
+        return entry
+
+    def set(self, key: Tuple, value: Response, version: str, ttl: float) -> CacheEntry:
+        entry = CacheEntry(value=value, version=version, expires_at=time.monotonic() + ttl)
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = sum(s.hits for s in self.routes.values())
+        misses = sum(s.misses for s in self.routes.values())
+        return {
+            "entries": len(self.entries),
+            "precompressed_variants": sum(len(entry.variants) for entry in self.entries.values()),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else None,
+            "data_version": data_version.version,
+            "routes": {
+                route: {"hits": s.hits, "misses": s.misses, "stale": s.stale}
+                for route, s in sorted(self.routes.items())
+            }
+        }
+
+
+response_cache = ResponseCache(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def _is_query_value(value: Any) -> bool:
+    """Skalari i liste skalara; zavisnosti (npr. current_user) ne ulaze u ključ"""
+    if isinstance(value, _SCALARS):
+        return True
+    return isinstance(value, (list, tuple)) and all(isinstance(v, _SCALARS) for v in value)
+
+
+def cache_key(route: str, params: Dict[str, Any]) -> Tuple:
+    """(ruta, sortirani parametri) - isti upit uvijek daje isti ključ"""
+    normalized = tuple(sorted(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in params.items() if _is_query_value(value)
+    ))
+    return route, normalized
+
+
+def _inject_parameters(endpoint: Callable, wrapper: Callable, extra: Dict[str, type]) -> Tuple[str, ...]:
+    """
+    Dodaje parametre (npr. request: Request) u potpis wrappera da ih FastAPI proslijedi.
+    Vraća imena koja endpoint sam ne prima - wrapper ih mora izbaciti prije poziva.
+    """
+    signature = inspect.signature(endpoint)
+    injected = tuple(name for name in extra if name not in signature.parameters)
+    if injected:
+        parameters = list(signature.parameters.values())
+        parameters.extend(
+            inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, annotation=extra[name])
+            for name in injected
+        )
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+    return injected
+
+
+def _replay(entry: CacheEntry, request: Request) -> Response:
+    """
+    Keširani Response se ne dijeli među zahtjevima: svaki hit dobija kopiju sa istim tijelom.
+    Ako klijent prihvata kompresiju, vraća se prekompresovana varijanta (pravi se jednom po unosu).
+    """
+    value = entry.value
+    if not settings.COMPRESSION_ENABLED or not is_compressible(value.media_type, len(value.body)):
+        return Response(content=value.body, status_code=value.status_code, media_type=value.media_type)
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None:
+        return Response(content=value.body, status_code=value.status_code, media_type=value.media_type,
+                        headers={"Vary": "Accept-Encoding"})
+
+    body = entry.variants.get(encoding)
+    if body is None:
+        body = entry.variants[encoding] = compress(value.body, encoding, precompressed=True)
+    return Response(
+        content=body,
+        status_code=value.status_code,
+        media_type=value.media_type,
+        headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+    )
+
+
+def cached(ttl: float, collections: Optional[Sequence[str]] = None):
+    """
+    Dekorator za async GET endpoint: odgovor se kešira po ruti i parametrima na `ttl`
+    sekundi, a invalidira se promjenom verzije podataka (završen ETL). Sa `collections`
+    unos zavisi samo od tih kolekcija (change stream invalidira samo pogođene rute).
+    Ide ispod @router.get(...).
+    """
+
+    def decorator(endpoint: Callable):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs["request"]
+            for name in injected:
+                kwargs.pop(name)
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return await endpoint(*args, **kwargs)
+
+            params = {name: value for name, value in kwargs.items() if name != "request"}
+            route = request.scope.get("route")
+            key = cache_key(route.path if route else request.url.path, params)
+            await data_version.current()
+            version = data_version.token(collections)
+
+            entry = response_cache.get(key, version)
+            if entry is None:
+                stale = stale_served.set(False)
+                try:
+                    with versioned_reads():
+                        value = await endpoint(*args, **kwargs)
+                    # Dugi TTL (change stream) samo za tijelo izračunato iz trenutnih podataka
+                    entry_ttl = ttl if stale_served.get() else data_version.ttl(ttl)
+                finally:
+                    stale_served.reset(stale)
+                if not isinstance(value, Response):
+                    value = BSONJSONResponse(value)
+                entry = response_cache.set(key, value, version, entry_ttl)
+            return _replay(entry, request)
+
+        injected = _inject_parameters(endpoint, wrapper, {"request": Request})
+        return wrapper
+
+    return decorator
+
+
+# -------------------------------
+# USLOVNI ODGOVORI (ETag / Last-Modified)
+# -------------------------------
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match koristi slabo poređenje (W/ prefiks se ignoriše)"""
+    if header.strip() == "*":
+        return True
+    return any(strip_encoding_suffix(tag.strip().removeprefix("W/")) == etag for tag in header.split(","))
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional(collections: Sequence[str], period_seconds: Optional[int] = None):
+    """
+    Dekorator za GET endpoint: jak ETag i Last-Modified iz verzije podataka kolekcija.
+    If-None-Match / If-Modified-Since vraćaju 304 prije poziva endpointa (i MongoDB-a).
+    `period_seconds` rotira ETag za odgovore koji zavise i od vremena (npr. trending prozor).
+    Ide odmah ispod @router.get(...), iznad @cached.
+    """
+
+    def decorator(endpoint: Callable):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs["request"]
+            response: Response = kwargs["response"]
+            for name in injected:
+                kwargs.pop(name)
+
+            await data_version.current()
+            validators = data_version.validators(collections)
+            if validators is None:
+                return await endpoint(*args, **kwargs)
+
+            token, last_modified = validators
+            route = request.scope.get("route")
+            key = cache_key(route.path if route else request.url.path,
+                            {name: value for name, value in kwargs.items() if name not in ("request", "response")})
+            period = f"|{int(time.time() // period_seconds)}" if period_seconds else ""
+            etag = '"' + hashlib.sha1(f"{token}|{key!r}{period}".encode()).hexdigest()[:27] + '"'
+            headers = {
+                "ETag": etag,
+                "Last-Modified": format_datetime(last_modified.astimezone(timezone.utc), usegmt=True),
+                "Cache-Control": "private, no-cache"
+            }
+
+            if_none_match = request.headers.get("if-none-match")
+            if_modified_since = request.headers.get("if-modified-since")
+            if if_none_match is not None:
+                if _etag_matches(if_none_match, etag):
+                    return Response(status_code=304, headers=headers)
+            elif if_modified_since and not period_seconds and _not_modified_since(if_modified_since, last_modified):
+                return Response(status_code=304, headers=headers)
+
+            with versioned_reads():
+                result = await endpoint(*args, **kwargs)
+            target = result if isinstance(result, Response) else response
+            if "content-encoding" in target.headers:
+                # Prekompresovan odgovor iz keša: ETag po reprezentaciji
+                headers["ETag"] = encoded_etag(etag, target.headers["content-encoding"])
+            target.headers.update(headers)
+            return result
+
+        injected = _inject_parameters(endpoint, wrapper, {"request": Request, "response": Response})
+        return wrapper
+
+    return decorator
@@ -0,0 +1,188 @@
+"""
+Kompresija odgovora (brotli / gzip).
+
+- `CompressionMiddleware`: ASGI middleware; kompresuje samo dozvoljene content-type-ove
+  iznad minimalne veličine (SSE stream se ne kompresuje). Odgovori koji već imaju Content-Encoding (npr. prekompresovani
+  unosi iz response keša) prolaze netaknuti - nema ponovne kompresije po hitu.
+- Strong ETag je po reprezentaciji: kompresovana verzija dobija sufiks ("<etag>-br").
+- brotli je opcionalan; bez njega se koristi samo gzip.
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from ..config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+# SSE: mali događaji bez buffer-a - kompresija po komadu bi samo dodala latenciju
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+# Po zahtjevu: brza kompresija; keširani unosi se kompresuju jednom, jače
+DYNAMIC_LEVELS = {"br": 4, "gzip": 6}
+PRECOMPRESSED_LEVELS = {"br": 9, "gzip": 9}
+
+
+def supported_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Najbolje podržano kodiranje iz Accept-Encoding (q=0 isključuje); None = bez kompresije"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+
+    candidates = [
+        encoding for encoding in supported_encodings()
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0
+    ]
+    return max(candidates, key=lambda encoding: accepted.get(encoding, accepted.get("*", 0.0)), default=None)
+
+
+def is_compressible(content_type: Optional[str], size: Optional[int] = None) -> bool:
+    if not content_type or not content_type.lower().startswith(COMPRESSIBLE_TYPES):
+        return False
+    if content_type.lower().startswith(UNCOMPRESSED_TYPES):
+        return False
+    return size is None or size >= settings.COMPRESSION_MIN_SIZE
+
+
+def compress(body: bytes, encoding: str, precompressed: bool = False) -> bytes:
+    levels = PRECOMPRESSED_LEVELS if precompressed else DYNAMIC_LEVELS
+    if encoding == "br":
+        return brotli.compress(body, quality=levels["br"])
+    compressor = zlib.compressobj(levels["gzip"], zlib.DEFLATED, 31)  # 31 = gzip header
+    return compressor.compress(body) + compressor.flush()
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """'"abc"' -> '"abc-br"' (W/ prefiks se zadržava)"""
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def strip_encoding_suffix(etag: str) -> str:
+    for encoding in ("br", "gzip"):
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+class _StreamCompressor:
+    """Inkrementalna kompresija za streaming odgovore (flush po komadu)"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=DYNAMIC_LEVELS["br"])
+        else:
+            self._compressor = zlib.compressobj(DYNAMIC_LEVELS["gzip"], zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = request_headers.get("if-none-match", "")
+        start_message = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                body = compressor.chunk(body) if more_body else compressor.chunk(body) + compressor.finish()
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(scope=start_message)
+            etag = headers.get("etag")
+            if start_message["status"] == 304:
+                # 304 nosi ETag reprezentacije koju klijent već ima
+                if etag and encoded_etag(etag, encoding) in if_none_match:
+                    headers["ETag"] = encoded_etag(etag, encoding)
+                passthrough = True
+            elif "content-encoding" in headers or not is_compressible(headers.get("content-type")):
+                passthrough = True
+            else:
+                headers.add_vary_header("Accept-Encoding")
+                passthrough = not more_body and len(body) < settings.COMPRESSION_MIN_SIZE
+
+            if passthrough:
+                await send(start_message)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            if etag:
+                headers["ETag"] = encoded_etag(etag, encoding)
+
+            if more_body:
+                # Streaming (npr. NDJSON export): kompresija po komadu, bez Content-Length
+                del headers["Content-Length"]
+                compressor = _StreamCompressor(encoding)
+                await send(start_message)
+                await send({"type": "http.response.body", "body": compressor.chunk(body), "more_body": True})
+                return
+
+            body = compress(body, encoding)
+            headers["Content-Length"] = str(len(body))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,109 @@
+"""
+Keyset (cursor) paginacija za liste iz MongoDB-a.
+
+Stranica se čita kao "sve poslije posljednjeg viđenog ključa" po indeksiranom
+sortu (npr. popularity desc, film_id asc), pa je cijena stranice O(limit) bez
+obzira na dubinu - nema skip/offset skeniranja. Kursor je neproziran
+(base64 JSON posljednjeg ključa) i vezan za listing za koji je izdat.
+Posljednje polje sorta mora biti jedinstveno (film_id, place_id).
+"""
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException
+
+SortSpec = Sequence[Tuple[str, int]]  # [(polje, 1 | -1)]
+
+MAX_PAGE_SIZE = 500
+
+# Vrijednosti ključa u kursoru: samo skalari - dict/list bi u keyset_filter postali
+# MongoDB operatori ({"$gt": ...}) ili poređenje cijelih nizova
+CURSOR_VALUE_TYPES = (str, int, float, bool, type(None))
+
+
+def encode_cursor(listing: str, values: Sequence[Any]) -> str:
+    payload = orjson.dumps({"l": listing, "k": list(values)})
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, listing: str, sort: SortSpec) -> List[Any]:
+    """Vrijednosti ključa iz kursora; neispravan ili tuđi kursor je 400"""
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        values = payload["k"]
+        valid = (
+            payload["l"] == listing
+            and isinstance(values, list)
+            and len(values) == len(sort)
+            and all(isinstance(value, CURSOR_VALUE_TYPES) for value in values)
+        )
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        valid = False
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _after(field: str, direction: int, value: Any) -> Optional[Dict]:
+    """
+    Uslov "strogo poslije value" za jedno polje. MongoDB sortira null ispred brojeva,
+    a $lt/$gt ne porede različite tipove - null se zato obrađuje eksplicitno.
+    """
+    if direction >= 0:
+        return {field: {"$ne": None}} if value is None else {field: {"$gt": value}}
+    if value is None:
+        return None  # u opadajućem sortu iza null nema ničega
+    return {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+
+def keyset_filter(sort: SortSpec, values: Sequence[Any]) -> Dict:
+    """(a, b) poslije (va, vb): a poslije va, ili a == va i b poslije vb"""
+    branches = []
+    for position, (field, direction) in enumerate(sort):
+        after = _after(field, direction, values[position])
+        if after is None:
+            continue
+        equal = [{name: values[index]} for index, (name, _) in enumerate(sort[:position])]
+        branches.append({"$and": equal + [after]} if equal else after)
+    return {"$or": branches} if branches else {"_id": {"$exists": False}}  # nema sljedeće stranice
+
+
+def _sort_value(document: Dict, field: str) -> Any:
+    value = document
+    for part in field.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+async def paginate(collection, listing: str, sort: SortSpec, limit: int,
+                   cursor: Optional[str] = None, query: Optional[Dict] = None,
+                   projection: Optional[Dict] = None) -> Dict[str, Any]:
+    """
+    Jedna stranica liste: {"items", "count", "next_cursor", "has_more"}.
+    Čita limit + 1 dokument da bi znala postoji li sljedeća stranica.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = dict(query or {})
+    if cursor:
+        after = keyset_filter(sort, decode_cursor(cursor, listing, sort))
+        query = {"$and": [query, after]} if query else after
+
+    if projection and any(projection.values()):
+        projection = {**projection, **{field: 1 for field, _ in sort}}  # kursor se gradi iz polja sorta
+
+    items = await collection.find(query, projection).sort(list(sort)).limit(limit + 1).to_list(length=limit + 1)
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor(listing, [_sort_value(items[-1], field) for field, _ in sort])
+
+    return {
+        "items": items,
+        "count": len(items),
+        "next_cursor": next_cursor,
+        "has_more": has_more
+    }
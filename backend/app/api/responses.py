@@ -0,0 +1,43 @@
+"""
+Brza JSON serijalizacija odgovora (orjson) sa podrškom za BSON tipove.
+
+- `BSONJSONResponse` je default response klasa aplikacije.
+- Hot endpointi (mapa, filmovi) vraćaju `BSONJSONResponse(...)` direktno: FastAPI tada
+  preskače jsonable_encoder/Pydantic prolaz kroz cijeli payload.
+- MongoDB dokumenti se mogu vratiti kakvi jesu: ObjectId, Decimal128 i datetime
+  serijalizuju se bez ručne konverzije.
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi.responses import JSONResponse
+
+# Naivni datetime iz MongoDB-a je UTC; ključevi koji nisu stringovi (npr. genre_id) su dozvoljeni
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+
+def bson_default(value: Any) -> Any:
+    """Tipovi koje orjson ne zna sam: ObjectId -> str, Decimal128/Decimal -> float, set -> list"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=bson_default, option=ORJSON_OPTIONS)
+
+
+class BSONJSONResponse(JSONResponse):
+    """JSONResponse preko orjson-a sa BSON tipovima"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,29 +1,37 @@
-from django.contrib.postgres.aggregates import statistics
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from ...dependencies.auth import get_current_user
 from ...models.user import User
-from ...db import get_mongo_client
+from ...services.analytics_cache import analytics_cache
+from ...services.mongo_repository import mongo_repository
+from ..caching import conditional
+from ..pagination import paginate
+from ..responses import BSONJSONResponse
 from ...services.etl.aggregation_service import aggregation_service
+from ...services.etl import genre_matrix, genre_rules, place_rankings
 import asyncio
+import statistics
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
+CORRELATIONS_SORT = (("film_id", 1),)
+
 
 @router.get("/film-location-correlations")
+@conditional(collections=("film_place_correlations",))
 async def get_film_location_correlations(
         film_id: Optional[int] = Query(None, description="Filter by film ID"),
         genre: Optional[str] = Query(None, description="Filter by genre"),
         country_code: Optional[str] = Query(None, description="Filter by country"),
         limit: int = Query(10, ge=1, le=100),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
         current_user: User = Depends(get_current_user)
 ):
     """
-    Get correlations between films and locations
+    Get correlations between films and locations (keyset paginacija po film_id)
     """
-    client = await get_mongo_client()
-    db = client.film_data
+    db = await mongo_repository.analytics_database()
 
     # Build query
     query = {}
@@ -31,35 +39,37 @@ async def get_film_location_correlations(
         query["film_id"] = film_id
     if genre:
         query["film_genres"] = {"$in": [genre.lower()]}
+    if country_code:
+        query["suggested_locations.place.country_code"] = country_code.upper()
 
-    # Get correlations
-    correlations = list(db.film_place_correlations.find(
-        query
-    ).limit(limit))
+    page = await paginate(db.film_place_correlations, "film-location-correlations", CORRELATIONS_SORT,
+                          limit, cursor=cursor, query=query)
+    correlations = page["items"]
 
-    # Filter by country if needed
+    # Samo lokacije iz tražene zemlje
     if country_code:
-        filtered = []
-        for corr in correlations:
-            locations = corr.get("suggested_locations", [])
-            country_locations = [
-                loc for loc in locations
-                if loc.get("place", {}).get("country_code") == country_code.upper()
-            ]
-            if country_locations:
-                filtered.append({
-                    **corr,
-                    "suggested_locations": country_locations
-                })
-        correlations = filtered
+        correlations = [
+            {
+                **corr,
+                "suggested_locations": [
+                    loc for loc in corr.get("suggested_locations", [])
+                    if loc.get("place", {}).get("country_code") == country_code.upper()
+                ]
+            }
+            for corr in correlations
+        ]
 
-    return {
+    # _id (ObjectId) i datumi idu kroz BSON encoder, bez ručne konverzije
+    return BSONJSONResponse({
         "count": len(correlations),
-        "correlations": correlations[:limit]
-    }
+        "correlations": correlations,
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"]
+    })
 
 
 @router.get("/location-success-analysis")
+@conditional(collections=("analytics",))
 async def get_location_success_analysis(
         min_films: int = Query(1, ge=1, description="Minimum films per location"),
         current_user: User = Depends(get_current_user)
@@ -67,11 +77,10 @@ async def get_location_success_analysis(
     """
     Analyze film success metrics by location
     """
-    client = await get_mongo_client()
-    db = client.film_data
+    db = await mongo_repository.analytics_database()
 
     # Get latest analysis
-    analysis = db.analytics.find_one(
+    analysis = await db.analytics.find_one(
         {"analysis_type": "film_success_by_location"},
         sort=[("created_at", -1)]
     )
@@ -92,16 +101,11 @@ async def get_location_success_analysis(
     }
 
     # Calculate overall metrics
-    if filtered_stats:
-        avg_rating = statistics.mean([
-            stats["average_rating"] for stats in filtered_stats.values()
-            if stats["average_rating"] > 0
-        ]) if filtered_stats else 0
-
-        avg_popularity = statistics.mean([
-            stats["average_popularity"] for stats in filtered_stats.values()
-            if stats["average_popularity"] > 0
-        ]) if filtered_stats else 0
+    ratings = [stats["average_rating"] for stats in filtered_stats.values() if stats["average_rating"] > 0]
+    popularities = [stats["average_popularity"] for stats in filtered_stats.values()
+                    if stats["average_popularity"] > 0]
+    avg_rating = statistics.mean(ratings) if ratings else 0
+    avg_popularity = statistics.mean(popularities) if popularities else 0
 
     return {
         "analysis_date": analysis.get("created_at"),
@@ -122,63 +126,28 @@ async def get_location_success_analysis(
 
 
 @router.get("/genre-location-matrix")
+@conditional(collections=("genre_category_matrix",))
 async def get_genre_location_matrix(
         current_user: User = Depends(get_current_user)
 ):
     """
     Get matrix of which genres correlate with which location categories
     """
-    client = await get_mongo_client()
-    db = client.film_data
+    db = await mongo_repository.analytics_database()
 
-    correlations = list(db.film_place_correlations.find())
+    # Materijalizovana matrica: jedno indeksirano čitanje, nezavisno od broja korelacija
+    rows = await db[genre_matrix.MATRIX_COLLECTION].find(
+        {"count": {"$gt": 0}},
+        {"_id": 0, "genre": 1, "category": 1, "count": 1}
+    ).sort([("genre", 1), ("count", -1)]).to_list(length=None)
 
-    if not correlations:
+    if not rows:
         raise HTTPException(
             status_code=404,
             detail="No correlations available. Run ETL first."
         )
 
-    # Build genre-location matrix
-    matrix = {}
-
-    for corr in correlations:
-        genres = corr.get("film_genres", [])
-        locations = corr.get("suggested_locations", [])
-
-        for genre in genres:
-            if genre not in matrix:
-                matrix[genre] = {}
-
-            for loc in locations:
-                place = loc.get("place", {})
-                categories = place.get("categories", [])
-
-                for category in categories[:2]:  # Take top 2 categories
-                    if category not in matrix[genre]:
-                        matrix[genre][category] = 0
-                    matrix[genre][category] += 1
-
-    # Convert to sorted list
-    result = []
-    for genre, categories in matrix.items():
-        top_categories = sorted(
-            categories.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]  # Top 5 categories per genre
-
-        result.append({
-            "genre": genre,
-            "total_correlations": sum(categories.values()),
-            "top_categories": [
-                {"category": cat, "count": count}
-                for cat, count in top_categories
-            ]
-        })
-
-    # Sort by total correlations
-    result.sort(key=lambda x: x["total_correlations"], reverse=True)
+    result = genre_matrix.group_matrix(rows, top_n=5)  # Top 5 categories per genre
 
     return {
         "matrix": result,
@@ -188,6 +157,7 @@ async def get_genre_location_matrix(
 
 
 @router.get("/location-recommendations")
+@conditional(collections=("places", "place_rankings"))
 async def get_location_recommendations(
         preferred_genres: List[str] = Query([], description="User's preferred genres"),
         preferred_categories: List[str] = Query([], description="Preferred location categories"),
@@ -203,27 +173,79 @@ async def get_location_recommendations(
             detail="Provide at least preferred_genres or preferred_categories"
         )
 
-    client = await get_mongo_client()
-    db = client.film_data
-
-    # Get places
-    places = list(db.places.find().limit(100))
+    db = await mongo_repository.analytics_database()
 
-    if not places:
-        raise HTTPException(
-            status_code=404,
-            detail="No places available. Run ETL first."
-        )
-
-    # Generate recommendations
     user_prefs = {
         "preferred_genres": preferred_genres,
         "preferred_categories": preferred_categories
     }
 
-    recommendations = aggregation_service.generate_location_recommendations(
-        user_prefs, places
-    )
+    # Rangirane liste iz ETL-a: spajanje lista umjesto bodovanja cijelog kataloga.
+    # Liste se čitaju u prozorima ($slice) koji se šire samo dok spajanje ne može odlučiti.
+    keys = place_rankings.list_keys(preferred_genres, preferred_categories)
+    loaded = {(kind, key): [] for kind, key, _ in keys}
+    complete = {}
+    found_lists = False
+    window = place_rankings.FIRST_WINDOW
+    top = None
+    while top is None:
+        pending = [list_key for list_key in loaded if not complete.get(list_key)]
+        offset = len(loaded[pending[0]])  # sve nekompletne liste su pročitane do iste dužine
+        ranked_docs = await db[place_rankings.RANKINGS_COLLECTION].find(
+            {"$or": [{"kind": kind, "key": key} for kind, key in pending]},
+            {"_id": 0, "kind": 1, "key": 1, "size": 1, "places": {"$slice": [offset, window]}}
+        ).to_list(length=None)
+        found_lists = found_lists or bool(ranked_docs)
+        if not found_lists:
+            break
+
+        docs_by_key = {(doc["kind"], doc["key"]): doc for doc in ranked_docs}
+        for list_key in pending:
+            doc = docs_by_key.get(list_key)
+            if doc is None:
+                complete[list_key] = True  # lista ne postoji - prazna
+                continue
+            loaded[list_key].extend(doc["places"])
+            complete[list_key] = len(doc["places"]) < window or len(loaded[list_key]) >= doc.get("size", 0)
+
+        top = place_rankings.threshold_merge(
+            [(weight, loaded[(kind, key)]) for kind, key, weight in keys],
+            k=limit,
+            complete=[complete[(kind, key)] for kind, key, _ in keys]
+        )
+        window *= 2
+
+    if found_lists:
+
+        places = await db.places.find(
+            {"place_id": {"$in": [place_id for place_id, _, _ in top]}},
+            {"_id": 0, "raw_data": 0}
+        ).to_list(length=None)
+        places_by_id = {place["place_id"]: place for place in places}
+
+        mapped_genres = len([g for g in preferred_genres if genre_rules.normalize_genre(g) in genre_rules.GENRE_BITS])
+        recommendations = [
+            {
+                "place": places_by_id[place_id],
+                "relevance_score": round(score / 10, 2),
+                "reasons": place_rankings.recommendation_reasons(mapped_genres, distance)
+            }
+            for place_id, score, distance in top
+            if place_id in places_by_id
+        ]
+    else:
+        # Liste još nisu izgrađene - bodovanje uzorka mesta
+        places = await db.places.find({}, {"_id": 0, "raw_data": 0}).limit(100).to_list(length=100)
+
+        if not places:
+            raise HTTPException(
+                status_code=404,
+                detail="No places available. Run ETL first."
+            )
+
+        recommendations = aggregation_service.generate_location_recommendations(
+            user_prefs, places
+        )
 
     return {
         "user_preferences": user_prefs,
@@ -232,85 +254,84 @@ async def get_location_recommendations(
     }
 
 
+# Prosječna ocjena po zemlji (prve 2 zemlje filma) - $group u bazi, bez učitavanja filmova
+COUNTRY_RATINGS_PIPELINE = [
+    {"$project": {
+        "_id": 0,
+        "rating": {"$ifNull": ["$vote_average", 0]},
+        "countries": {"$slice": [{"$ifNull": ["$production_countries", []]}, 2]}
+    }},
+    {"$unwind": "$countries"},
+    {"$group": {"_id": "$countries", "average": {"$avg": "$rating"}, "count": {"$sum": 1}}},
+    {"$facet": {
+        "countries": [{"$count": "total"}],
+        "top": [
+            {"$match": {"average": {"$gt": 0}}},
+            {"$sort": {"average": -1, "_id": 1}},
+            {"$limit": 5},
+            {"$project": {"_id": 0, "country": "$_id", "average_rating": "$average", "film_count": "$count"}}
+        ]
+    }}
+]
+
+# Najčešće kategorije mesta (prve 3 po mjestu)
+CATEGORY_COUNTS_PIPELINE = [
+    {"$project": {"_id": 0, "categories": {"$slice": [{"$ifNull": ["$categories", []]}, 3]}}},
+    {"$unwind": "$categories"},
+    {"$group": {"_id": "$categories", "count": {"$sum": 1}}},
+    {"$facet": {
+        "categories": [{"$count": "total"}],
+        "top": [
+            {"$sort": {"count": -1, "_id": 1}},
+            {"$limit": 10},
+            {"$project": {"_id": 0, "category": "$_id", "count": 1}}
+        ]
+    }}
+]
+
+CROSS_API_COLLECTIONS = ("films", "places", "film_place_correlations")
+
+
+def _facet_total(facet: Dict[str, Any], name: str) -> int:
+    return facet[name][0]["total"] if facet[name] else 0
+
+
 @router.get("/cross-api-stats")
+@conditional(collections=CROSS_API_COLLECTIONS)
 async def get_cross_api_stats(
         current_user: User = Depends(get_current_user)
 ):
     """
     Get statistics combining data from both TMDB and Geoapify
     """
-    client = await get_mongo_client()
-    db = client.film_data
-
-    # Get counts
-    film_count = await db.films.count_documents({})
-    place_count = await db.places.count_documents({})
-    correlation_count = await db.film_place_correlations.count_documents({})
-
-    # Get average film ratings by country
-    films = list(db.films.find({}, {"vote_average": 1, "production_countries": 1}))
-
-    country_ratings = {}
-    for film in films:
-        rating = film.get("vote_average", 0)
-        countries = film.get("production_countries", [])
-
-        for country in countries[:2]:  # Take first 2 countries
-            if country not in country_ratings:
-                country_ratings[country] = {"total": 0, "count": 0, "ratings": []}
-
-            country_ratings[country]["total"] += rating
-            country_ratings[country]["count"] += 1
-            country_ratings[country]["ratings"].append(rating)
-
-    # Calculate averages
-    for country, data in country_ratings.items():
-        if data["count"] > 0:
-            data["average"] = data["total"] / data["count"]
-            # Remove lists to reduce response size
-            del data["ratings"]
-            del data["total"]
-
-    # Get most common location categories
-    places = list(db.places.find({}, {"categories": 1}))
-    category_counts = {}
-
-    for place in places:
-        categories = place.get("categories", [])
-        for category in categories[:3]:  # Take top 3 categories per place
-            if category not in category_counts:
-                category_counts[category] = 0
-            category_counts[category] += 1
-
-    top_categories = sorted(
-        category_counts.items(),
-        key=lambda x: x[1],
-        reverse=True
-    )[:10]
-
-    return {
-        "data_summary": {
-            "total_films": film_count,
-            "total_places": place_count,
-            "total_correlations": correlation_count,
-            "coverage_ratio": f"{correlation_count / max(film_count, 1) * 100:.1f}%"
-        },
-        "film_insights": {
-            "countries_with_films": len(country_ratings),
-            "top_countries_by_rating": sorted(
-                [
-                    {"country": c, "average_rating": d["average"], "film_count": d["count"]}
-                    for c, d in country_ratings.items() if d.get("average", 0) > 0
-                ],
-                key=lambda x: x["average_rating"],
-                reverse=True
-            )[:5]
-        },
-        "location_insights": {
-            "total_categories": len(category_counts),
-            "most_common_categories": [
-                {"category": cat, "count": count}
-                for cat, count in top_categories
-            ]
+    db = await mongo_repository.analytics_database()
+
+    async def compute():
+        # Get counts (platform_counters - jedan dokument); agregacije paralelno
+        counts, (ratings,), (categories,) = await asyncio.gather(
+            mongo_repository.platform_counts(CROSS_API_COLLECTIONS),
+            db.films.aggregate(COUNTRY_RATINGS_PIPELINE).to_list(length=1),
+            db.places.aggregate(CATEGORY_COUNTS_PIPELINE).to_list(length=1)
+        )
+        film_count = counts["films"]
+        place_count = counts["places"]
+        correlation_count = counts["film_place_correlations"]
+
+        return {
+            "data_summary": {
+                "total_films": film_count,
+                "total_places": place_count,
+                "total_correlations": correlation_count,
+                "coverage_ratio": f"{correlation_count / max(film_count, 1) * 100:.1f}%"
+            },
+            "film_insights": {
+                "countries_with_films": _facet_total(ratings, "countries"),
+                "top_countries_by_rating": ratings["top"]
+            },
+            "location_insights": {
+                "total_categories": _facet_total(categories, "categories"),
+                "most_common_categories": categories["top"]
+            }
         }
-    }
\ No newline at end of file
+
+    return await analytics_cache.get_or_compute("cross_api_stats", compute, collections=CROSS_API_COLLECTIONS)
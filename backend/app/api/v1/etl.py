@@ -1,8 +1,9 @@
 # backend/app/api/v1/etl.py - ISPRAVLJENO
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Body
-from typing import Dict, Any, List
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Body, Query
+from typing import Dict, Any, List, Optional
+import asyncio
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 # Koristi relativne importove koji odgovaraju tvojoj strukturi
 try:
@@ -22,6 +23,9 @@ except ImportError:
     logger = logging.getLogger(__name__)
     logger.warning("Celery tasks not available, using mock functions")
 
+from ...services.etl import etl_metrics
+from ...services.mongo_repository import MongoUnavailableError, mongo_repository
+
 # DODAJ PREFIX I TAGS OVDE!
 router = APIRouter(prefix="/etl", tags=["ETL Operations"])
 logger = logging.getLogger(__name__)
@@ -386,11 +390,12 @@ async def get_latest_jobs(limit: int = 10):
     Vraća poslednje ETL job-ove iz baze
     """
     try:
-        from ...db import get_mongo_client
-        from ...config import settings
-
-        client = get_mongo_client()
-        if not client:
+        try:
+            total_jobs, jobs = await asyncio.gather(
+                mongo_repository.count("etl_jobs"),
+                mongo_repository.find_many("etl_jobs", projection={"_id": 0}, sort=[("started_at", -1)], limit=limit)
+            )
+        except MongoUnavailableError:
             # Ako MongoDB nije dostupan, vrati mock podatke
             return {
                 "total_jobs": 0,
@@ -414,16 +419,8 @@ async def get_latest_jobs(limit: int = 10):
                 ]
             }
 
-        db = client[settings.MONGO_DB]
-        etl_jobs = db["etl_jobs"]
-
-        jobs = list(etl_jobs.find(
-            {},
-            {"_id": 0}
-        ).sort("started_at", -1).limit(limit))
-
         return {
-            "total_jobs": etl_jobs.count_documents({}),
+            "total_jobs": total_jobs,
             "jobs": jobs
         }
 
@@ -442,38 +439,24 @@ async def get_collections_stats():
     Vraća statistiku svih kolekcija u bazi
     """
     try:
-        from ...db import get_mongo_client
-        from ...config import settings
-
-        client = get_mongo_client()
-        if not client:
+        try:
+            stats = await mongo_repository.collections_stats()
+        except MongoUnavailableError:
             return {
                 "status": "error",
                 "message": "MongoDB not available",
                 "collections": {}
             }
 
-        db = client[settings.MONGO_DB]
-        collection_names = db.list_collection_names()
-
-        stats = {}
-        for collection_name in collection_names:
-            try:
-                count = db[collection_name].count_documents({})
-                stats[collection_name] = {
-                    "count": count,
-                    "estimated_size_mb": 0
-                }
-            except Exception as e:
-                stats[collection_name] = {
-                    "count": 0,
-                    "error": str(e)
-                }
+        # estimated_size_mb ostaje zbog postojećih klijenata - sada je stvarno zauzeće na disku
+        stats = {name: {**values, "estimated_size_mb": values["storage_size_mb"]} for name, values in stats.items()}
 
         return {
             "status": "success",
-            "total_collections": len(collection_names),
-            "total_documents": sum(s.get("count", 0) for s in stats.values() if isinstance(s, dict)),
+            "total_collections": len(stats),
+            "total_documents": sum(s["count"] for s in stats.values()),
+            "total_storage_mb": round(sum(s["storage_size_mb"] for s in stats.values()), 2),
+            "total_index_mb": round(sum(s["index_size_mb"] for s in stats.values()), 2),
             "collections": stats
         }
 
@@ -482,6 +465,37 @@ async def get_collections_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/metrics")
+async def get_etl_metrics(
+        unit: str = Query("day", pattern="^(hour|day)$"),
+        days: int = Query(7, ge=1, le=etl_metrics.METRICS_RETENTION_DAYS),
+        job_type: Optional[str] = Query(None)
+):
+    """
+    ETL metrike po satu ili danu (unaprijed sumirani rollup-ovi etl_metrics)
+    """
+    try:
+        db = await mongo_repository.analytics_database()
+        since = etl_metrics.bucket_start(datetime.now(timezone.utc) - timedelta(days=days - 1), "day")
+        rollups = await db[etl_metrics.ROLLUP_COLLECTION].find(
+            etl_metrics.rollup_query(unit, since, job_type),
+            {"_id": 0, "rolled_up_at": 0}
+        ).sort([("bucket", 1), ("job_type", 1), ("stage", 1)]).to_list(length=None)
+
+        return {
+            "unit": unit,
+            "since": since,
+            "count": len(rollups),
+            "rollups": rollups
+        }
+
+    except MongoUnavailableError:
+        raise HTTPException(status_code=503, detail="MongoDB not available")
+    except Exception as e:
+        logger.error(f"Greška pri dohvatanju ETL metrika: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/test")
 async def test_etl_endpoint():
     """Test endpoint za ETL - ne zahtijeva admin"""
@@ -550,11 +564,10 @@ async def get_correlation_stats():
     Vraća statistiku korelacija između filmova i mesta
     """
     try:
-        from ...db import get_mongo_client
-        from ...config import settings
-
-        client = get_mongo_client()
-        if not client:
+        try:
+            total_correlations = (await mongo_repository.count_collections(["film_place_correlations"]))[
+                "film_place_correlations"]
+        except MongoUnavailableError:
             return {
                 "status": "no_data",
                 "message": "MongoDB not available",
@@ -562,10 +575,8 @@ async def get_correlation_stats():
                 "sample_correlations": []
             }
 
-        db = client[settings.MONGO_DB]
-
-        # Proveri da li postoji kolekcija
-        if "film_place_correlations" not in db.list_collection_names():
+        # Proveri da li postoje korelacije
+        if total_correlations == 0:
             return {
                 "status": "no_data",
                 "message": "No correlation data yet",
@@ -573,16 +584,12 @@ async def get_correlation_stats():
                 "sample_correlations": []
             }
 
-        correlations_collection = db["film_place_correlations"]
-
-        # Broj ukupnih korelacija
-        total_correlations = correlations_collection.count_documents({})
-
         # Uzmi uzorak za prikaz
-        sample_correlations = list(correlations_collection.find(
-            {},
-            {"_id": 0, "film_title": 1, "place_city": 1, "place_country": 1, "match_score": 1}
-        ).limit(5))
+        sample_correlations = await mongo_repository.find_many(
+            "film_place_correlations",
+            projection={"_id": 0, "film_title": 1, "place_city": 1, "place_country": 1, "match_score": 1},
+            limit=5
+        )
 
         return {
             "status": "success",
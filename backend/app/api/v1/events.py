@@ -0,0 +1,54 @@
+# backend/app/api/v1/events.py
+"""
+Live događaji platforme kao Server-Sent Events (text/event-stream).
+
+Prosljeđuje događaje change stream consumera (data_changed, etl_job); heartbeat
+komentar svakih EVENTS_HEARTBEAT_SECONDS drži konekciju otvorenom kroz proxy-je.
+Samo za admine (ETL poslovi su admin podaci); klijent šalje Bearer token, pa se
+u browseru čita preko fetch-a, ne EventSource-a.
+"""
+import asyncio
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+
+from ...config import settings
+from ...dependencies.auth import require_admin
+from ...models.user import User
+from ...services.change_streams import change_stream_consumer
+from ...services.event_bus import event_bus
+from ..responses import dumps
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+def _sse(event: dict) -> bytes:
+    return f"event: {event['type']}\ndata: ".encode() + dumps(event) + b"\n\n"
+
+
+@router.get("/stream")
+async def stream_events(
+        request: Request,
+        current_user: User = Depends(require_admin)
+):
+    """
+    SSE stream događaja. Prvi događaj ("hello") kaže da li change stream radi -
+    ako ne radi (MongoDB bez replica seta), klijent treba da osvježava periodično.
+    """
+
+    async def events():
+        async with event_bus.subscribe() as queue:
+            yield _sse({"type": "hello", "live": change_stream_consumer.live})
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": heartbeat\n\n"
+                    continue
+                yield _sse(event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,118 @@
+# backend/app/api/v1/exports.py
+"""
+Admin export sirovih kolekcija kao NDJSON stream.
+
+Motor kursor se čita u batch-evima (EXPORT_BATCH_SIZE), a dokumenti se šalju
+čim stignu, u komadima od EXPORT_CHUNK_BYTES - memorija je konstantna bez
+obzira na veličinu exporta, a prvi dokument ide odmah.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from bson import json_util
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from ...config import settings
+from ...services.mongo_repository import mongo_repository
+from ...dependencies.auth import require_admin
+from ...models.user import User
+from ..responses import dumps
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+EXPORT_COLLECTIONS = ("films", "places", "places_raw", "film_place_correlations", "etl_jobs")
+
+# Operatori koji izvršavaju JavaScript na serveru
+FORBIDDEN_OPERATORS = ("$where", "$function", "$accumulator")
+
+
+def _check_operators(value: Any):
+    if isinstance(value, dict):
+        for key, nested in value.items():
+            if key in FORBIDDEN_OPERATORS:
+                raise HTTPException(status_code=400, detail=f"Operator {key} is not allowed in export filters")
+            _check_operators(nested)
+    elif isinstance(value, list):
+        for nested in value:
+            _check_operators(nested)
+
+
+def parse_filter(raw: Optional[str]) -> Dict:
+    """Filter je MongoDB Extended JSON (npr. {"fetched_at": {"$gte": {"$date": "2025-01-01T00:00:00Z"}}})"""
+    if not raw:
+        return {}
+    try:
+        query = json_util.loads(raw)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filter: {e}")
+    if not isinstance(query, dict):
+        raise HTTPException(status_code=400, detail="Filter must be a JSON object")
+    _check_operators(query)
+    return query
+
+
+def parse_projection(fields: Optional[str], exclude: Optional[str]) -> Optional[Dict[str, int]]:
+    """Lista polja za uključivanje ili isključivanje (zarezom odvojena) - ne oboje"""
+    include = [name.strip() for name in (fields or "").split(",") if name.strip()]
+    omit = [name.strip() for name in (exclude or "").split(",") if name.strip()]
+    if include and omit:
+        raise HTTPException(status_code=400, detail="Use either fields or exclude, not both")
+    if include:
+        return {name: 1 for name in include}
+    if omit:
+        return {name: 0 for name in omit}
+    return None
+
+
+async def stream_ndjson(cursor, chunk_bytes: int):
+    """Dokument po liniji; prvi dokument se šalje odmah, ostali u komadima od chunk_bytes"""
+    buffer = bytearray()
+    flushed = False
+    try:
+        async for document in cursor:
+            buffer += dumps(document)
+            buffer += b"\n"
+            if not flushed or len(buffer) >= chunk_bytes:
+                yield bytes(buffer)
+                buffer.clear()
+                flushed = True
+        if buffer:
+            yield bytes(buffer)
+    finally:
+        # Klijent može prekinuti download - kursor na serveru se zatvara odmah
+        await cursor.close()
+
+
+@router.get("/{collection}")
+async def export_collection(
+        collection: str,
+        filter: Optional[str] = Query(None, description="MongoDB Extended JSON filter"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to include"),
+        exclude: Optional[str] = Query(None, description="Comma-separated fields to exclude"),
+        limit: int = Query(0, ge=0, description="0 = whole collection"),
+        batch_size: Optional[int] = Query(None, ge=1, le=10000),
+        current_user: User = Depends(require_admin)
+):
+    """
+    Streaming NDJSON export kolekcije (samo admin)
+    """
+    if collection not in EXPORT_COLLECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown collection: {collection}")
+
+    query = parse_filter(filter)
+    projection = parse_projection(fields, exclude)
+
+    db = await mongo_repository.analytics_database()
+    cursor = db[collection].find(query, projection, limit=limit).batch_size(batch_size or settings.EXPORT_BATCH_SIZE)
+
+    filename = f"{collection}-{datetime.utcnow():%Y%m%dT%H%M%SZ}.ndjson"
+    return StreamingResponse(
+        stream_ndjson(cursor, settings.EXPORT_CHUNK_BYTES),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no"  # nginx ne smije baferovati stream
+        }
+    )
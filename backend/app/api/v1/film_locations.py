@@ -4,12 +4,29 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import logging
 
-from ...db import get_mongo_client
-from ...config import settings
+from ...dependencies.auth import require_admin
+from ...models.user import User
+from ...services.analytics_cache import analytics_cache
+from ...services.film_search import SEARCH_SORT, film_search_service
+from ...services.mongo_repository import mongo_repository
+from ..caching import cached, conditional
+from ..pagination import decode_cursor, encode_cursor, keyset_filter, paginate
+from ..responses import BSONJSONResponse
+from ...utils.topk import top_k, bottom_k
+from ...utils.geo import haversine_km, km_to_radians
+from ...services.etl.regional_snapshot_service import (
+    REGION_CATALOG, normalize_regions, regional_snapshot_service, region_coordinates
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Keyset sortovi listinga (posljednje polje je jedinstveno; indeksi u app.migrations)
+FILMS_SORT = (("popularity", -1), ("film_id", 1))
+PLACES_SORT = (("place_id", 1),)
+# Popularni gradovi: gradovi + broj filmova iz film_locations
+POPULAR_CITIES_COLLECTIONS = ("cities", "film_locations")
+
 
 @router.get("/cities/geoapify", tags=["Analytics"])
 async def get_cities_from_geoapify(
@@ -259,11 +276,11 @@ async def get_popular_films(
                     popular_films.append(film_data)
 
                 logger.info(f"Successfully fetched {len(popular_films)} films from TMDB")
-                return {
+                return BSONJSONResponse({
                     "source": "tmdb_api",
                     "count": len(popular_films),
                     "films": popular_films
-                }
+                })
             else:
                 logger.warning("TMDB returned empty movies list")
         except Exception as tmdb_error:
@@ -271,11 +288,7 @@ async def get_popular_films(
 
         # Fallback: probaj iz baze
         logger.info("Falling back to database...")
-        client = get_mongo_client()
-        if not client:
-            raise HTTPException(status_code=500, detail="MongoDB not connected")
-
-        db = client[settings.MONGO_DB]
+        db = await mongo_repository.analytics_database()
         films_collection = db["films"]
 
         # Dohvati filmove iz baze
@@ -294,11 +307,11 @@ async def get_popular_films(
             else:
                 film["poster_url"] = "https://via.placeholder.com/500x750?text=No+Poster"
 
-        return {
+        return BSONJSONResponse({
             "source": "database",
             "count": len(films),
             "films": films
-        }
+        })
 
     except Exception as e:
         logger.error(f"Error in get_popular_films: {e}", exc_info=True)
@@ -363,6 +376,8 @@ async def get_popular_films(
 
 
 @router.get("/films/trending", tags=["Analytics"])
+@conditional(collections=("films",), period_seconds=3600)
+@cached(ttl=120, collections=("films",))
 async def get_trending_films(
         days: int = Query(7, ge=1, le=30),
         limit: int = Query(20, ge=1, le=100)
@@ -371,11 +386,7 @@ async def get_trending_films(
     Vraća trenutno popularne filmove (basirano na popularity score)
     """
     try:
-        client = get_mongo_client()
-        if not client:
-            raise HTTPException(status_code=500, detail="MongoDB not connected")
-
-        db = client[settings.MONGO_DB]
+        db = await mongo_repository.analytics_database()
         films_collection = db["films"]
 
         # Calculate date threshold
@@ -405,21 +416,140 @@ async def get_trending_films(
             trending_score = (popularity * 0.5) + (vote_avg * 20 * 0.3) + (min(vote_count, 1000) / 1000 * 0.2)
             film["trending_score"] = round(trending_score, 2)
 
-        # Sort by trending score
-        films.sort(key=lambda x: x.get("trending_score", 0), reverse=True)
+        # Top N po trending score
+        films = top_k(films, limit, key=lambda x: x.get("trending_score", 0))
 
-        return {
+        return BSONJSONResponse({
             "period_days": days,
             "total": len(films),
-            "films": films[:limit]
-        }
+            "films": films
+        })
 
     except Exception as e:
         logger.error(f"Error getting trending films: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/films", tags=["Analytics"])
+async def list_films(
+        limit: int = Query(50, ge=1, le=500),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+        genre: Optional[str] = Query(None, description="Filter by genre")
+):
+    """
+    Katalog filmova stranicu po stranicu (popularity desc, film_id) - keyset kursor, bez skip-a
+    """
+    try:
+        db = await mongo_repository.analytics_database()
+        query = {"genres": genre} if genre else {}
+        page = await paginate(
+            db["films"], "films", FILMS_SORT, limit, cursor=cursor, query=query,
+            projection={"_id": 0, "film_id": 1, "title": 1, "release_date": 1, "popularity": 1,
+                        "vote_average": 1, "vote_count": 1, "genres": 1, "poster_path": 1}
+        )
+
+        return BSONJSONResponse({
+            "count": page["count"],
+            "films": page["items"],
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"]
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing films: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/films/search", tags=["Analytics"])
+async def search_films(
+        q: str = Query(..., min_length=2, max_length=100, description="Search text"),
+        limit: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page")
+):
+    """
+    Pretraga filmova po naslovu, originalnom naslovu i opisu (text indeks, rangirano po relevantnosti)
+    """
+    try:
+        db = await mongo_repository.analytics_database()
+        listing = "films-search:" + q.strip().lower()
+        after = keyset_filter(SEARCH_SORT, decode_cursor(cursor, listing, SEARCH_SORT)) if cursor else None
+
+        films = await db["films"].aggregate(
+            film_search_service.search_pipeline(q, limit, after)
+        ).to_list(length=limit + 1)
+        has_more = len(films) > limit
+        films = films[:limit]
+
+        return BSONJSONResponse({
+            "query": q,
+            "count": len(films),
+            "films": films,
+            "next_cursor": encode_cursor(listing, [films[-1].get(field) for field, _ in SEARCH_SORT])
+            if has_more else None,
+            "has_more": has_more
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching films: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/films/autocomplete", tags=["Analytics"])
+@cached(ttl=60, collections=("films",))
+async def autocomplete_films(
+        prefix: str = Query(..., min_length=1, max_length=50),
+        limit: int = Query(10, ge=1, le=20)
+):
+    """
+    Prefix autocomplete naslova (bez obzira na velika slova i dijakritike), najpopularniji prvi
+    """
+    try:
+        db = await mongo_repository.analytics_database()
+        films = await film_search_service.autocomplete(db, prefix, limit)
+        return BSONJSONResponse({"prefix": prefix, "count": len(films), "films": films})
+
+    except Exception as e:
+        logger.error(f"Error autocompleting films: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/places", tags=["Analytics"])
+async def list_places(
+        limit: int = Query(50, ge=1, le=500),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+        city: Optional[str] = Query(None, description="Filter by city")
+):
+    """
+    Mesta stranicu po stranicu po place_id - keyset kursor, bez skip-a
+    """
+    try:
+        db = await mongo_repository.analytics_database()
+        query = {"city": city} if city else {}
+        page = await paginate(
+            db["places"], "places", PLACES_SORT, limit, cursor=cursor, query=query,
+            projection={"_id": 0, "raw_data": 0}
+        )
+
+        return BSONJSONResponse({
+            "count": page["count"],
+            "places": page["items"],
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"]
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing places: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/cities/popular", tags=["Analytics"])
+@conditional(collections=POPULAR_CITIES_COLLECTIONS)
 async def get_popular_cities(
         limit: int = Query(20, ge=1, le=100),
         min_population: int = Query(100000, ge=0),
@@ -429,44 +559,53 @@ async def get_popular_cities(
     Vraća popularne gradove za filmsku produkciju
     """
     try:
-        client = get_mongo_client()
-        if not client:
-            raise HTTPException(status_code=500, detail="MongoDB not connected")
-
-        db = client[settings.MONGO_DB]
+        db = await mongo_repository.analytics_database()
         cities_collection = db["cities"]
-        locations_collection = db["film_locations"]
 
         # Build filter
         filter_query = {"population": {"$gte": min_population}}
         if country_code:
             filter_query["country_code"] = country_code.upper()
 
-        # Get popular cities - DODAJ AWAIT!
-        cities_cursor = cities_collection.find(
-            filter_query,
-            {"_id": 0, "city_id": 1, "name": 1, "country": 1, "country_code": 1,
-             "population": 1, "latitude": 1, "longitude": 1}
-        ).sort("population", -1).limit(limit)
-
-        cities = await cities_cursor.to_list(length=limit)
-
-        # Get film count for each city
-        for city in cities:
-            city_id = city.get("city_id")
-            film_count = await locations_collection.count_documents({"city_id": city_id})
-            city["film_count"] = film_count
-
-            # Get sample films
-            sample_films_cursor = locations_collection.find(
-                {"city_id": city_id},
-                {"_id": 0, "film_id": 1, "film_title": 1}
-            ).limit(3)
-            sample_films = await sample_films_cursor.to_list(length=3)
-            city["sample_films"] = [film.get("film_title") for film in sample_films if film.get("film_title")]
+        # Jedna agregacija: broj filmova i uzorak naslova po gradu, sortiranje prije limita
+        pipeline = [
+            {"$match": filter_query},
+            {"$lookup": {
+                "from": "film_locations",
+                "let": {"city_id": "$city_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$city_id", "$$city_id"]}}},
+                    {"$group": {
+                        "_id": None,
+                        "film_count": {"$sum": 1},
+                        "sample_films": {"$firstN": {"input": "$film_title", "n": 3}}
+                    }}
+                ],
+                "as": "film_stats"
+            }},
+            {"$set": {"film_stats": {"$first": "$film_stats"}}},
+            {"$set": {"film_count": {"$ifNull": ["$film_stats.film_count", 0]}}},
+            # Sort by film count (most film-friendly cities first)
+            {"$sort": {"film_count": -1, "population": -1, "city_id": 1}},
+            {"$limit": limit},
+            {"$project": {
+                "_id": 0, "city_id": 1, "name": 1, "country": 1, "country_code": 1,
+                "population": 1, "latitude": 1, "longitude": 1, "film_count": 1,
+                "sample_films": {
+                    "$filter": {
+                        "input": {"$ifNull": ["$film_stats.sample_films", []]},
+                        "as": "title",
+                        "cond": {"$and": [{"$ne": ["$$title", None]}, {"$ne": ["$$title", ""]}]}
+                    }
+                }
+            }}
+        ]
 
-        # Sort by film count (most film-friendly cities first)
-        cities.sort(key=lambda x: x.get("film_count", 0), reverse=True)
+        cities = await analytics_cache.get_or_compute(
+            f"popular_cities:{limit}:{min_population}:{filter_query.get('country_code', '')}",
+            lambda: cities_collection.aggregate(pipeline).to_list(length=limit),
+            collections=POPULAR_CITIES_COLLECTIONS
+        )
 
         return {
             "total": len(cities),
@@ -481,16 +620,13 @@ async def get_popular_cities(
 
 
 @router.get("/analytics/films-by-country", tags=["Analytics"])
+@conditional(collections=("films",))
 async def get_films_by_country():
     """
     Analiza filmova po zemljama produkcije
     """
     try:
-        client = get_mongo_client()
-        if not client:
-            raise HTTPException(status_code=500, detail="MongoDB not connected")
-
-        db = client[settings.MONGO_DB]
+        db = await mongo_repository.analytics_database()
         films_collection = db["films"]
 
         # Aggregate films by country - DODAJ AWAIT!
@@ -517,17 +653,16 @@ async def get_films_by_country():
             }}
         ]
 
-        results_cursor = films_collection.aggregate(pipeline)
-        results = await results_cursor.to_list(length=20)
-
-        # Get total stats - DODAJ AWAIT!
-        total_films = await films_collection.count_documents({})
+        async def compute():
+            results = await films_collection.aggregate(pipeline).to_list(length=20)
+            total_films = await mongo_repository.estimated_count("films")
+            return {
+                "total_films": total_films,
+                "countries_analyzed": len(results),
+                "data": results
+            }
 
-        return {
-            "total_films": total_films,
-            "countries_analyzed": len(results),
-            "data": results
-        }
+        return BSONJSONResponse(await analytics_cache.get_or_compute("films_by_country", compute, collections=("films",)))
 
     except Exception as e:
         logger.error(f"Error analyzing films by country: {e}")
@@ -543,71 +678,64 @@ async def get_cities_near_film_locations(
     Pronalazi gradove u blizini filmskih lokacija
     """
     try:
-        client = get_mongo_client()
-        if not client:
-            raise HTTPException(status_code=500, detail="MongoDB not connected")
-
-        db = client[settings.MONGO_DB]
+        db = await mongo_repository.analytics_database()
         locations_collection = db["film_locations"]
         cities_collection = db["cities"]
 
-        # Get unique film locations - DODAJ AWAIT!
+        # Najsnimanije filmske lokacije sa GeoJSON koordinatama
         pipeline = [
+            {"$match": {"location": {"$exists": True, "$ne": None}}},
             {"$group": {
                 "_id": {"city_id": "$city_id", "city_name": "$city_name"},
                 "film_count": {"$sum": 1},
-                "latitude": {"$first": "$latitude"},
-                "longitude": {"$first": "$longitude"},
-                "sample_films": {"$push": "$film_title"}
+                "location": {"$first": "$location"},
+                "sample_films": {"$firstN": {"input": "$film_title", "n": 2}}
             }},
+            {"$sort": {"film_count": -1, "_id.city_id": 1}},
             {"$limit": 50}
         ]
 
-        unique_locations_cursor = locations_collection.aggregate(pipeline)
-        unique_locations = await unique_locations_cursor.to_list(length=50)
+        unique_locations = await locations_collection.aggregate(pipeline).to_list(length=50)
 
-        nearby_cities = []
+        if not unique_locations:
+            return {
+                "radius_km": radius_km,
+                "locations_analyzed": 0,
+                "nearby_cities_found": 0,
+                "cities": []
+            }
 
+        # Jedan upit: gradovi unutar radijusa bilo koje lokacije (2dsphere indeks)
+        radius = km_to_radians(radius_km)
+        nearby_cursor = cities_collection.find(
+            {"$or": [
+                {"location": {"$geoWithin": {"$centerSphere": [loc["location"]["coordinates"], radius]}}}
+                for loc in unique_locations
+            ]},
+            {"_id": 0, "city_id": 1, "name": 1, "country": 1,
+             "population": 1, "latitude": 1, "longitude": 1, "location": 1}
+        )
+        candidates = await nearby_cursor.to_list(length=None)
+
+        # Tačne great-circle udaljenosti za svaki par (grad, filmska lokacija)
+        nearby_cities = []
         for loc in unique_locations:
-            if not loc.get("latitude") or not loc.get("longitude"):
-                continue
-
-            lat = loc["latitude"]
-            lng = loc["longitude"]
-
-            # Find cities within radius - DODAJ AWAIT!
-            nearby_cursor = cities_collection.find({
-                "latitude": {"$gte": lat - (radius_km / 111), "$lte": lat + (radius_km / 111)},
-                "longitude": {"$gte": lng - (radius_km / (111 * abs(lat))),
-                              "$lte": lng + (radius_km / (111 * abs(lat)))},
-                "city_id": {"$ne": loc["_id"]["city_id"]}
-            }, {
-                "_id": 0, "city_id": 1, "name": 1, "country": 1,
-                "population": 1, "latitude": 1, "longitude": 1
-            }).limit(5)
-
-            nearby = await nearby_cursor.to_list(length=5)
-
-            for city in nearby:
-                # Calculate approximate distance
-                distance = ((city["latitude"] - lat) ** 2 + (city["longitude"] - lng) ** 2) ** 0.5 * 111
+            lng, lat = loc["location"]["coordinates"]
+            for city in candidates:
+                if city.get("city_id") == loc["_id"].get("city_id"):
+                    continue
+                city_lng, city_lat = city["location"]["coordinates"]
+                distance = haversine_km(lat, lng, city_lat, city_lng)
                 if distance <= radius_km:
                     nearby_cities.append({
-                        **city,
+                        **{key: value for key, value in city.items() if key != "location"},
                         "distance_km": round(distance, 1),
-                        "near_film_location": loc["_id"]["city_name"],
+                        "near_film_location": loc["_id"].get("city_name"),
                         "film_count_at_location": loc["film_count"],
-                        "sample_films": loc["sample_films"][:2]
+                        "sample_films": [title for title in loc["sample_films"] if title]
                     })
 
-        # Remove duplicates and sort
-        unique_nearby = {}
-        for city in nearby_cities:
-            key = f"{city['city_id']}_{city['near_film_location']}"
-            if key not in unique_nearby:
-                unique_nearby[key] = city
-
-        result = sorted(unique_nearby.values(), key=lambda x: x["distance_km"])[:limit]
+        result = bottom_k(nearby_cities, limit, key=lambda x: x["distance_km"])
 
         return {
             "radius_km": radius_km,
@@ -623,178 +751,55 @@ async def get_cities_near_film_locations(
 
 def _get_fallback_coordinates(country_code: str):
     """Vraća fallback koordinate za zemlju ako API ne radi"""
-    fallback_data = {
-        "US": (38.89511, -77.03637, "Washington, D.C."),
-        "GB": (51.5074, -0.1278, "London"),
-        "FR": (48.8566, 2.3522, "Paris"),
-        "DE": (52.5200, 13.4050, "Berlin"),
-        "JP": (35.6762, 139.6503, "Tokyo"),
-        "CA": (45.4215, -75.6972, "Ottawa"),
-        "AU": (-35.2809, 149.1300, "Canberra"),
-        "IT": (41.9028, 12.4964, "Rome"),
-        "ES": (40.4168, -3.7038, "Madrid"),
-        "BR": (-15.7801, -47.9292, "Brasília"),
-        "IN": (28.6139, 77.2090, "New Delhi"),
-        "CN": (39.9042, 116.4074, "Beijing"),
-        "RU": (55.7558, 37.6173, "Moscow"),
-        "KR": (37.5665, 126.9780, "Seoul"),
-        "MX": (19.4326, -99.1332, "Mexico City")
-    }
-    return fallback_data.get(country_code, (0, 0, "Capital"))
+    return region_coordinates(country_code)
+
+
+def _region_codes(regions: Optional[List[str]]) -> List[str]:
+    codes = normalize_regions(regions)
+    unknown = [code for code in codes if code not in REGION_CATALOG]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported regions: {', '.join(unknown)}")
+    return codes
 
 
 @router.get("/map/regional-popularity", tags=["Analytics"])
-@router.get("/map/regional-popularity", tags=["Analytics"])
-async def get_regional_popularity_map():
+async def get_regional_popularity_map(
+        regions: Optional[List[str]] = Query(None, description="ISO country codes (US, GB, ...) ili ALL")
+):
     """
-    Mapa filmske popularnosti po regionu - POPRAVLJENO
+    Mapa filmske popularnosti po regionu - servira se iz snapshota (Celery ga osvježava).
+    Samo regioni bez snapshota dohvataju se live (konkurentno, uz deadline).
     """
     try:
-        logger.info("Generating regional popularity map data")
-
-        from ...services.etl.tmdb_service import tmdb_service
-
-        # Lista zemalja - smanjite za testiranje
-        countries = [
-            {"code": "US", "name": "United States"},
-            {"code": "GB", "name": "United Kingdom"},
-            {"code": "FR", "name": "France"},
-            {"code": "DE", "name": "Germany"},
-            {"code": "JP", "name": "Japan"}
-        ]  # Samo 5 zemalja za početak
-
-        regional_data = []
-
-        for country in countries:
-            try:
-                country_code = country["code"]
-                country_name = country["name"]
-
-                logger.info(f"Processing country: {country_name} ({country_code})")
-
-                # 1. Dohvati popularne filmove ZA OVU ZEMLJU - POPRAVLJENO
-                movies = []
-
-                # Provjeri da li metoda postoji
-                if hasattr(tmdb_service, 'fetch_popular_movies_by_region'):
-                    logger.info(f"Using fetch_popular_movies_by_region for {country_code}")
-                    movies = await tmdb_service.fetch_popular_movies_by_region(
-                        region=country_code,
-                        limit=10
-                    )
-                else:
-                    logger.warning(f"Method fetch_popular_movies_by_region not found, using trending")
-                    movies = await tmdb_service.fetch_trending_movies(limit=10)
-
-                # Ako nema filmova za tu zemlju, probaj globalne
-                if not movies or len(movies) < 3:
-                    logger.warning(f"No region-specific movies for {country_code}, using global")
-                    movies = await tmdb_service.fetch_trending_movies(limit=10)
-
-                # 2. Odaberi top 3 filma za prikaz
-                top_movies = []
-                for movie in movies[:3]:
-                    movie_data = {
-                        "film_id": movie.get("id"),
-                        "title": movie.get("title", "Unknown"),
-                        "release_date": movie.get("release_date", ""),
-                        "vote_average": round(movie.get("vote_average", 0), 1),
-                        "poster_path": movie.get("poster_path"),
-                        "poster_url": f"https://image.tmdb.org/t/p/w500{movie['poster_path']}" if movie.get(
-                            "poster_path") else "",
-                        "overview": movie.get("overview", "")[:100] + "..." if movie.get("overview") else "",
-                        "region": movie.get("region", "global")  # Dodaj region info
-                    }
-                    top_movies.append(movie_data)
-
-                # 3. Analiziraj žanrove
-                top_genres = await _analyze_genres(movies[:10])
-
-                # 4. Dohvati geografske podatke
-                latitude, longitude, capital_city = _get_fallback_coordinates(country_code)
-
-                # 5. Kreiraj regionalni podatak
-                region_data = {
-                    "country_code": country_code,
-                    "country_name": country_name,
-                    "capital_city": capital_city,
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "total_movies_analyzed": len(movies),
-                    "top_movies": top_movies,
-                    "top_genres": top_genres,
-                    "source": "tmdb_regional" if movies and movies[0].get("region") == country_code else "tmdb_global",
-                    "last_updated": datetime.utcnow().isoformat()
-                }
-
-                regional_data.append(region_data)
-                logger.info(f"✓ {country_name}: {len(top_movies)} movies from {region_data['source']}")
-
-                # Rate limiting
-                import asyncio
-                await asyncio.sleep(0.2)
-
-            except Exception as country_error:
-                logger.error(f"Error processing {country['name']}: {country_error}")
-                continue
-
-        return {
-            "timestamp": datetime.utcnow().isoformat(),
-            "total_regions": len(regional_data),
-            "regions": regional_data,
-            "status": "success"
-        }
+        codes = _region_codes(regions)
+        db = await mongo_repository.analytics_database()
+        return BSONJSONResponse(await regional_snapshot_service.get_snapshot(db, codes))
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating regional popularity map: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# DODAJTE OVU POMOĆNU FUNKCIJU:
-async def _analyze_genres(movies: List[Dict]) -> List[Dict]:
-    """Analizira žanrove iz liste filmova"""
-    if not movies:
-        return [{"name": "Various", "percentage": 100}]
-
-    genre_counter = {}
-    for movie in movies:
-        genre_ids = movie.get("genre_ids", [])
-        for genre_id in genre_ids:
-            genre_counter[genre_id] = genre_counter.get(genre_id, 0) + 1
-
-    # Ako nema genre_ids, probaj genres
-    if not genre_counter and movies:
-        for movie in movies:
-            genres = movie.get("genres", [])
-            if isinstance(genres, list):
-                for genre in genres:
-                    if isinstance(genre, dict):
-                        genre_id = genre.get("id")
-                        if genre_id:
-                            genre_counter[genre_id] = genre_counter.get(genre_id, 0) + 1
-
-    genre_map = {
-        28: "Action", 12: "Adventure", 16: "Animation", 35: "Comedy",
-        80: "Crime", 18: "Drama", 10751: "Family", 14: "Fantasy",
-        36: "History", 27: "Horror", 10402: "Music", 9648: "Mystery",
-        10749: "Romance", 878: "Sci-Fi", 53: "Thriller", 10752: "War"
-    }
-
-    # Sortiraj i konvertuj u procente
-    sorted_genres = sorted(genre_counter.items(), key=lambda x: x[1], reverse=True)
-    total = sum(genre_counter.values())
-
-    top_genres = []
-    for genre_id, count in sorted_genres[:3]:
-        genre_name = genre_map.get(genre_id, f"Genre {genre_id}")
-        percentage = round((count / total) * 100, 1) if total > 0 else 0
-        top_genres.append({
-            "name": genre_name,
-            "count": count,
-            "percentage": percentage
-        })
+@router.post("/map/regional-popularity/refresh", tags=["Analytics"])
+async def refresh_regional_popularity_map(
+        regions: Optional[List[str]] = Query(None, description="ISO country codes (US, GB, ...) ili ALL"),
+        current_user: User = Depends(require_admin)
+):
+    """
+    Forsira live dohvat regiona sa TMDB-a (samo admin - do 45 TMDB poziva po zahtjevu)
+    """
+    try:
+        codes = _region_codes(regions)
+        db = await mongo_repository.database()
+        return BSONJSONResponse(await regional_snapshot_service.get_snapshot(db, codes, refresh=True))
 
-    return top_genres if top_genres else [{"name": "Various", "percentage": 100}]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error refreshing regional popularity map: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/map/test-minimal", tags=["Analytics"])
@@ -919,66 +924,45 @@ async def get_analytics_stats():
     Osnovne statistike platforme
     """
     try:
-        client = get_mongo_client()
-        if not client:
-            raise HTTPException(status_code=500, detail="MongoDB not connected")
-
-        db = client[settings.MONGO_DB]
-
-        # Count documents - SVI DODAJ AWAIT!
-        film_count = await db["films"].count_documents({})
-        city_count = await db["cities"].count_documents({})
-        location_count = await db["film_locations"].count_documents({})
-        etl_job_count = await db["etl_jobs"].count_documents({})
-
-        # Get latest film - DODAJ AWAIT!
-        latest_film_cursor = db["films"].find_one(
-            {},
-            {"_id": 0, "title": 1, "release_date": 1, "fetched_at": 1},
-            sort=[("fetched_at", -1)]
-        )
-        latest_film = await latest_film_cursor
-
-        # Get ETL stats - DODAJ AWAIT!
-        pipeline = [
-            {"$group": {
-                "_id": "$job_type",
-                "count": {"$sum": 1},
-                "last_run": {"$max": "$started_at"},
-                "success_rate": {
-                    "$avg": {
-                        "$cond": [{"$eq": ["$status", "completed"]}, 1, 0]
-                    }
+        async def compute():
+            # Brojevi, ETL statistika i posljednji film iz platform_counters (jedan dokument)
+            summary = await mongo_repository.platform_summary(("films", "cities", "film_locations", "etl_jobs"))
+            counts = summary["counts"]
+            film_count = counts["films"]
+            city_count = counts["cities"]
+            location_count = counts["film_locations"]
+            etl_job_count = counts["etl_jobs"]
+
+            latest_film = summary["latest_film"]
+            etl_stats = [
+                {
+                    "_id": job_type,
+                    "count": stats.get("runs", 0),
+                    "last_run": stats.get("last_run"),
+                    "success_rate": stats.get("completed", 0) / stats["runs"] if stats.get("runs") else 0
                 }
-            }}
-        ]
-
-        etl_stats_cursor = db["etl_jobs"].aggregate(pipeline)
-        etl_stats = await etl_stats_cursor.to_list(length=None)
+                for job_type, stats in summary["jobs"].items()
+            ]
 
-        return {
-            "timestamp": datetime.utcnow().isoformat(),
-            "counts": {
-                "films": film_count,
-                "cities": city_count,
-                "film_locations": location_count,
-                "etl_jobs": etl_job_count
-            },
-            "latest_film": latest_film,
-            "etl_stats": etl_stats,
-            "collection_sizes": {
-                "films": "movies from TMDB",
-                "cities": "cities from GeoDB",
-                "film_locations": "film-city associations",
-                "etl_jobs": "ETL execution history"
+            return {
+                "timestamp": datetime.utcnow().isoformat(),
+                "counts": {
+                    "films": film_count,
+                    "cities": city_count,
+                    "film_locations": location_count,
+                    "etl_jobs": etl_job_count
+                },
+                "latest_film": latest_film,
+                "etl_stats": etl_stats,
+                "collection_sizes": {
+                    "films": "movies from TMDB",
+                    "cities": "cities from GeoDB",
+                    "film_locations": "film-city associations",
+                    "etl_jobs": "ETL execution history"
+                }
             }
-        }
-
-
-
-
-
 
+        return await analytics_cache.get_or_compute("platform_stats", compute)
 
     except Exception as e:
         logger.error(f"Error getting analytics stats: {e}")
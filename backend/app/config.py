@@ -1,6 +1,6 @@
 import os
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import List, Optional
 from urllib.parse import quote_plus
 
 
@@ -33,6 +33,13 @@ class Settings(BaseSettings):
     MONGO_PORT: int = 27017
     MONGO_INITDB_ROOT_USERNAME: str = "mongo_admin"
     MONGO_INITDB_ROOT_PASSWORD: str = "mongo_admin_password"
+    MONGO_REPLICA_SET: str = ""  # npr. "rs0" (docker-compose.replicaset.yml); prazno = standalone
+    MONGO_ANALYTICS_READ_PREFERENCE: str = "secondaryPreferred"  # analitički ruteri i export
+    MONGO_ANALYTICS_MAX_STALENESS_SECONDS: int = -1  # -1 = bez ograničenja; inače najmanje 90
+    MONGO_BULK_WRITE_W: int = 1  # bulk ETL upisi (Celery)
+    MONGO_BULK_WRITE_JOURNAL: bool = False
+    MONGO_STATE_WRITE_W: str = "majority"  # etl_jobs i izvještaji
+    MONGO_STATE_WRITE_TIMEOUT_MS: int = 5000
 
     # Redis/Celery
     REDIS_HOST: str = "redis"
@@ -57,6 +64,73 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     ENVIRONMENT: str = "development"
 
+    # -------------------------------
+    # CORRELATION SETTINGS
+    # -------------------------------
+    CORRELATION_PARALLEL: bool = True
+    CORRELATION_WORKERS: int = 0  # 0 = broj CPU jezgara
+    CORRELATION_CHUNK_SIZE: int = 250  # filmova po jednom poslu za worker
+    CORRELATION_PARALLEL_MIN_FILMS: int = 500  # ispod ovoga pool se ne isplati
+
+    # -------------------------------
+    # REGIONAL MAP SETTINGS
+    # -------------------------------
+    REGIONAL_MAP_REGIONS: List[str] = []  # prazno = svi regioni iz kataloga
+    REGIONAL_FETCH_CONCURRENCY: int = 8  # istovremenih TMDB zahtjeva (upstream rate limit)
+    REGIONAL_FETCH_DEADLINE_SECONDS: float = 5.0  # live dohvat vraća ono što stigne do tada
+    REGIONAL_SNAPSHOT_TTL_SECONDS: int = 60  # koliko dugo API vjeruje kopiji u memoriji
+    REGIONAL_SNAPSHOT_MAX_AGE_SECONDS: int = 6 * 60 * 60  # stariji snapshot pokreće rebuild
+
+    # -------------------------------
+    # RESPONSE CACHE SETTINGS
+    # -------------------------------
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    DATA_VERSION_POLL_SECONDS: float = 10.0  # koliko često se provjerava posljednji ETL job
+
+    # -------------------------------
+    # CHANGE STREAM SETTINGS (zahtijeva replica set - docker-compose.replicaset.yml)
+    # -------------------------------
+    CHANGE_STREAMS_ENABLED: bool = True  # bez replica seta consumer se gasi i ostaje polling
+    CHANGE_STREAM_DEBOUNCE_SECONDS: float = 1.0  # promjene unutar prozora -> jedan bump/događaj
+    CHANGE_STREAM_RETRY_SECONDS: float = 5.0
+    CHANGE_STREAM_POLL_SECONDS: float = 5 * 60  # polling verzije dok stream radi (samo kao sigurnosna mreža)
+    CHANGE_STREAM_CACHE_TTL_SECONDS: float = 60 * 60  # minimalni TTL keša dok stream radi
+    EVENTS_QUEUE_SIZE: int = 100  # događaja po SSE pretplatniku (spori gube najstarije)
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+
+    # -------------------------------
+    # DEBUG GUARD SETTINGS
+    # -------------------------------
+    BLOCKING_GUARD_ENABLED: bool = False  # asyncio debug mode ima cijenu po callback-u - samo za dijagnostiku
+    BLOCKING_GUARD_SLOW_CALLBACK_SECONDS: float = 0.1  # loguje korake loop-a duže od ovoga
+
+    # -------------------------------
+    # COMPRESSION SETTINGS
+    # -------------------------------
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # manji odgovori se šalju nekompresovani
+
+    # -------------------------------
+    # ANALYTICS CACHE SETTINGS (L1 memorija + L2 MongoDB)
+    # -------------------------------
+    ANALYTICS_CACHE_TTL_SECONDS: int = 60 * 60  # poslije ovoga unos ne važi
+    ANALYTICS_CACHE_SOFT_TTL_FRACTION: float = 0.5  # poslije ttl * fraction - osvježavanje u pozadini
+    ANALYTICS_CACHE_L1_MAX_ENTRIES: int = 256
+
+    # -------------------------------
+    # COLLECTION STATS SETTINGS
+    # -------------------------------
+    COLLECTION_STATS_CACHE_SECONDS: float = 10.0  # brojevi/veličine kolekcija (metapodaci) se keširaju ovoliko
+    PLATFORM_COUNTERS_RECONCILE_SECONDS: int = 60 * 60  # Celery beat: platform_counters vs stvarni brojevi
+    GENRE_MATRIX_REBUILD_SECONDS: int = 24 * 60 * 60  # Celery beat: genre_category_matrix iz korelacija
+
+    # -------------------------------
+    # EXPORT SETTINGS
+    # -------------------------------
+    EXPORT_BATCH_SIZE: int = 1000  # dokumenata po getMore pozivu Motor kursora
+    EXPORT_CHUNK_BYTES: int = 64 * 1024  # NDJSON se šalje u komadima ove veličine
+
     # -------------------------------
     # COMPUTED PROPERTIES
     # -------------------------------
@@ -77,7 +151,8 @@ class Settings(BaseSettings):
     def MONGO_URL(self) -> str:
         """Kreira kompletan MongoDB URL s autentifikacijom"""
         password = quote_plus(self.MONGO_INITDB_ROOT_PASSWORD)
-        return f"mongodb://{self.MONGO_INITDB_ROOT_USERNAME}:{password}@{self.MONGO_HOST}:{self.MONGO_PORT}/{self.MONGO_DB}?authSource=admin"
+        replica_set = f"&replicaSet={self.MONGO_REPLICA_SET}" if self.MONGO_REPLICA_SET else ""
+        return f"mongodb://{self.MONGO_INITDB_ROOT_USERNAME}:{password}@{self.MONGO_HOST}:{self.MONGO_PORT}/{self.MONGO_DB}?authSource=admin{replica_set}"
 
     @property
     def MONGO_URL_NO_AUTH(self) -> str:
@@ -2,7 +2,7 @@
 import logging
 from typing import Optional, Dict, Any
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
@@ -11,6 +11,9 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
 
 from .config import settings
+from .utils.text import normalize_title
+from .migrations import run_migrations
+from .utils.geo import geo_point
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -95,6 +98,7 @@ class MongoDBManager:
         self.client: Optional[AsyncIOMotorClient] = None
         self.db = None
         self.initialized = False
+        self.migrated = False
 
     async def connect(self):
         """Establish MongoDB connection"""
@@ -118,8 +122,8 @@ class MongoDBManager:
             self.db = self.client[settings.MONGO_DB]
             logger.info(f"✓ MongoDB connected to database: {settings.MONGO_DB}")
 
-            # Create indexes
-            await self._create_indexes()
+            # Indeksi / backfill-ovi koji još nisu primijenjeni
+            await self._run_migrations()
 
             self.initialized = True
             return True
@@ -129,58 +133,15 @@ class MongoDBManager:
             self.initialized = False
             raise
 
-    async def _create_indexes(self):
-        """Create all necessary indexes for optimal performance"""
+    async def _run_migrations(self):
+        """Verzionisane migracije indeksa (app.migrations) - jednom po procesu, ne pri svakom reconnect-u"""
+        if self.migrated:
+            return
         try:
-            logger.info("Creating MongoDB indexes...")
-
-            # Films collection
-            await self.db.films.create_index("film_id", unique=True)
-            await self.db.films.create_index("title")
-            await self.db.films.create_index([("popularity", -1)])
-            await self.db.films.create_index([("vote_average", -1)])
-            await self.db.films.create_index("release_date")
-            await self.db.films.create_index("genres")
-            await self.db.films.create_index("production_countries")
-            await self.db.films.create_index([("fetched_at", -1)])
-
-            # Cities collection
-            await self.db.cities.create_index("city_id", unique=True)
-            await self.db.cities.create_index("name")
-            await self.db.cities.create_index([("population", -1)])
-            await self.db.cities.create_index("country_code")
-            await self.db.cities.create_index([("latitude", 1), ("longitude", 1)])
-
-            # Film locations collection
-            await self.db.film_locations.create_index(
-                [("film_id", 1), ("city_id", 1)],
-                unique=True
-            )
-            await self.db.film_locations.create_index("film_id")
-            await self.db.film_locations.create_index("city_id")
-            await self.db.film_locations.create_index([("film_title", "text")])
-
-            # Regional films collection
-            await self.db.regional_films.create_index(
-                [("region", 1), ("fetch_date", -1)],
-                unique=True
-            )
-            await self.db.regional_films.create_index("region")
-
-            # ETL jobs collection
-            await self.db.etl_jobs.create_index([("job_type", 1), ("started_at", -1)])
-            await self.db.etl_jobs.create_index("status")
-            await self.db.etl_jobs.create_index([("started_at", 1)],
-                                                expireAfterSeconds=30 * 24 * 60 * 60)  # 30 days TTL
-
-            # Analytics cache collection
-            await self.db.analytics_cache.create_index([("cache_key", 1), ("expires_at", 1)])
-            await self.db.analytics_cache.create_index("expires_at", expireAfterSeconds=0)
-
-            logger.info("✓ MongoDB indexes created successfully")
-
+            await run_migrations(self.db)
+            self.migrated = True
         except Exception as e:
-            logger.error(f"Error creating MongoDB indexes: {e}")
+            logger.error(f"Error applying MongoDB migrations: {e}")
 
     async def close(self):
         """Close MongoDB connection"""
@@ -198,6 +159,7 @@ class MongoDBManager:
                 await self.connect()
 
             film_data["updated_at"] = datetime.utcnow()
+            film_data["title_normalized"] = normalize_title(film_data.get("title"))
 
             result = await self.db.films.update_one(
                 {"film_id": film_data["film_id"]},
@@ -232,6 +194,7 @@ class MongoDBManager:
                 try:
                     film_data["updated_at"] = datetime.utcnow()
                     film_data["fetched_at"] = datetime.utcnow()
+                    film_data["title_normalized"] = normalize_title(film_data.get("title"))
 
                     result = await self.db.films.update_one(
                         {"film_id": film_data["film_id"]},
@@ -380,6 +343,9 @@ class MongoDBManager:
                 await self.connect()
 
             city_data["updated_at"] = datetime.utcnow()
+            location = geo_point(city_data.get("latitude"), city_data.get("longitude"))
+            if location:
+                city_data["location"] = location
 
             result = await self.db.cities.update_one(
                 {"city_id": city_data["city_id"]},
@@ -477,27 +443,10 @@ class MongoDBManager:
             if not self.initialized:
                 await self.connect()
 
-            stats = {}
-
-            # Film count
-            film_count = await self.db.films.count_documents({})
-            stats["films"] = film_count
-
-            # City count
-            city_count = await self.db.cities.count_documents({})
-            stats["cities"] = city_count
-
-            # Film locations count
-            location_count = await self.db.film_locations.count_documents({})
-            stats["film_locations"] = location_count
-
-            # ETL jobs count
-            etl_job_count = await self.db.etl_jobs.count_documents({})
-            stats["etl_jobs"] = etl_job_count
-
-            # Regional films count
-            regional_films = await self.db.regional_films.count_documents({})
-            stats["regional_films"] = regional_films
+            # Brojevi iz metapodataka kolekcija (bez skeniranja), paralelno
+            collections = ("films", "cities", "film_locations", "etl_jobs", "regional_films")
+            counts = await asyncio.gather(*(self.db[name].estimated_document_count() for name in collections))
+            stats = dict(zip(collections, counts))
 
             # Latest film
             latest_film = await self.db.films.find_one(
@@ -591,13 +540,12 @@ class MongoDBManager:
             if not self.initialized:
                 await self.connect()
 
-            expires_at = datetime.utcnow().timestamp() + (ttl_minutes * 60)
-
+            now = datetime.utcnow()
             cache_doc = {
                 "cache_key": cache_key,
                 "data": data,
-                "created_at": datetime.utcnow(),
-                "expires_at": expires_at
+                "created_at": now,
+                "expires_at": now + timedelta(minutes=ttl_minutes)  # BSON datum - TTL indeks ga briše
             }
 
             await self.db.analytics_cache.update_one(
@@ -616,7 +564,7 @@ class MongoDBManager:
                 await self.connect()
 
             cache_doc = await self.db.analytics_cache.find_one(
-                {"cache_key": cache_key, "expires_at": {"$gt": datetime.utcnow().timestamp()}}
+                {"cache_key": cache_key, "expires_at": {"$gt": datetime.utcnow()}}
             )
 
             return cache_doc["data"] if cache_doc else None
@@ -632,7 +580,7 @@ class MongoDBManager:
                 await self.connect()
 
             result = await self.db.analytics_cache.delete_many(
-                {"expires_at": {"$lt": datetime.utcnow().timestamp()}}
+                {"expires_at": {"$lt": datetime.utcnow()}}
             )
 
             if result.deleted_count > 0:
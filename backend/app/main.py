@@ -8,6 +8,7 @@ from sqlalchemy import or_
 from pydantic import BaseModel, EmailStr, Field, validator
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
+import asyncio
 import logging
 import sys
 import os
@@ -18,6 +19,15 @@ from fastapi.security import OAuth2PasswordBearer
 
 # Importi internih modula
 from .api.endpoints import etl_status
+from .api.caching import response_cache
+from .services.analytics_cache import analytics_cache
+from .services.change_streams import change_stream_consumer
+from .services.event_bus import event_bus
+from .api.compression import CompressionMiddleware
+from .api.responses import BSONJSONResponse
+from .config import settings
+from .services.mongo_repository import MongoUnavailableError
+from .utils.blocking_guard import blocking_listener, install_blocking_guard
 from .dependencies.auth import require_admin, get_current_user
 
 # Dodajemo putanju za importovanje app modula
@@ -283,6 +293,10 @@ async def lifespan(app: FastAPI):
     logger.info("Starting up Film Data Platform API")
     logger.info("=" * 60)
 
+    # 0. Debug: detekcija blokirajućih poziva (prije kreiranja MongoDB klijenta)
+    if settings.BLOCKING_GUARD_ENABLED:
+        install_blocking_guard(asyncio.get_running_loop())
+
     # 1. Kreiranje SQL tablica
     logger.info("Creating PostgreSQL tables...")
     try:
@@ -334,6 +348,33 @@ async def lifespan(app: FastAPI):
     except ImportError as e:
         logger.warning(f"✗ Analytics router not available: {e}")
 
+    # 5. Uključi analytics router (korelacije, preporuke, matrica)
+    try:
+        from .api.v1 import analytics as analytics_router
+        app.include_router(analytics_router.router, prefix="/api/v1")
+        logger.info("✓ Cross-API analytics router included at /api/v1/analytics")
+    except ImportError as e:
+        logger.warning(f"✗ Cross-API analytics router not available: {e}")
+
+    # 6. Uključi export router (admin)
+    try:
+        from .api.v1 import exports as exports_router
+        app.include_router(exports_router.router, prefix="/api/v1")
+        logger.info("✓ Export router included at /api/v1")
+        logger.info("  - GET /api/v1/exports/{collection}  (NDJSON stream, admin)")
+    except ImportError as e:
+        logger.warning(f"✗ Export router not available: {e}")
+
+    # 7. Change stream consumer + live događaji (SSE)
+    change_stream_consumer.start()
+    try:
+        from .api.v1 import events as events_router
+        app.include_router(events_router.router, prefix="/api/v1")
+        logger.info("✓ Events router included at /api/v1")
+        logger.info("  - GET /api/v1/events/stream  (SSE: data_changed, etl_job)")
+    except ImportError as e:
+        logger.warning(f"✗ Events router not available: {e}")
+
     logger.info("=" * 60)
     logger.info("Application startup complete!")
     logger.info("=" * 60)
@@ -342,6 +383,7 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down Film Data Platform...")
+    await change_stream_consumer.stop()
     try:
         await close_mongo_connection()
         logger.info("✓ MongoDB connection closed")
@@ -359,7 +401,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=BSONJSONResponse
 )
 
 # ----------------------------------------------------------------------
@@ -380,6 +423,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ----------------------------------------------------------------------
+## KOMPRESIJA ODGOVORA (br / gzip)
+# ----------------------------------------------------------------------
+app.add_middleware(CompressionMiddleware)
+
 # ----------------------------------------------------------------------
 ## UKLJUČIVANJE ROUTERA - OVO JE KLJUČNO!
 # ----------------------------------------------------------------------
@@ -478,6 +526,28 @@ async def debug_routes():
     }
 
 
+@app.get("/debug/cache", tags=["Debug"])
+async def debug_cache():
+    """Statistika keša odgovora (hit/miss po ruti), analitičkog L1/L2 keša i change streama."""
+    return {
+        **response_cache.stats(),
+        "analytics_cache": analytics_cache.snapshot(),
+        "change_streams": change_stream_consumer.snapshot(),
+        "events": event_bus.snapshot()
+    }
+
+
+@app.get("/debug/blocking", tags=["Debug"])
+async def debug_blocking():
+    """Broj sync MongoDB poziva uhvaćenih na event loop threadu (samo uz BLOCKING_GUARD_ENABLED)."""
+    return {"guard_enabled": settings.BLOCKING_GUARD_ENABLED, "blocking_mongo_calls": blocking_listener.violations}
+
+
+@app.exception_handler(MongoUnavailableError)
+async def mongo_unavailable_handler(request, exc: MongoUnavailableError):
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": str(exc)})
+
+
 @app.post("/api/v1/auth/test", tags=["Debug"])
 async def test_auth_endpoint():
     """Test endpoint za provjeru da li auth rute rade."""
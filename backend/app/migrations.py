@@ -0,0 +1,203 @@
+# backend/app/migrations.py
+"""
+Verzionisane MongoDB migracije (indeksi i backfill-ovi).
+
+Primijenjene verzije se bilježe u kolekciji schema_migrations, pa se pri konekciji
+izvršava samo ono što nedostaje - kada je baza ažurna, to je jedan upit. Backfill-ovi
+jedne migracije idu prije njenih indeksa (npr. location prije 2dsphere), a indeksi se
+grade paralelno: jedan createIndexes po kolekciji, sve kolekcije istovremeno.
+
+Nova promjena indeksa = nova Migration na kraju MIGRATIONS (postojeće se ne mijenjaju).
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+
+from .services.etl import place_documents
+from .services.film_search import SEARCH_INDEXES, film_search_service
+from .utils.geo import GEO_COLLECTIONS, location_backfill_filter, location_backfill_update
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+
+Backfill = Callable[[Any], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    indexes: Dict[str, List[IndexModel]] = field(default_factory=dict)
+    backfills: Tuple[Backfill, ...] = ()
+
+
+# --- Backfill-ovi ---
+
+async def backfill_geo_locations(db):
+    """GeoJSON location iz latitude/longitude za dokumente prije 2dsphere indeksa"""
+    for collection_name in GEO_COLLECTIONS:
+        result = await db[collection_name].update_many(location_backfill_filter(), location_backfill_update())
+        if result.modified_count:
+            logger.info(f"✓ Backfilled location on {result.modified_count} {collection_name}")
+
+
+async def purge_float_cache_expiry(db):
+    """Stari analytics_cache unosi sa float expires_at nikad ne bi istekli preko TTL indeksa"""
+    await db.analytics_cache.delete_many({"expires_at": {"$type": "number"}})
+
+
+async def backfill_normalized_titles(db):
+    await film_search_service.backfill_normalized_titles(db)
+
+
+async def move_raw_place_data(db):
+    """places.raw_data -> places_raw (_id = place_id), pa se raw_data uklanja iz places"""
+    await db.places.aggregate([
+        {"$match": {"raw_data": {"$exists": True}, "place_id": {"$ne": None}}},
+        {"$project": {"_id": "$place_id", "raw_data": 1, "fetched_at": 1}},
+        {"$merge": {"into": place_documents.RAW_COLLECTION, "on": "_id",
+                    "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]).to_list(length=None)
+    result = await db.places.update_many({"raw_data": {"$exists": True}}, {"$unset": {"raw_data": ""}})
+    if result.modified_count:
+        logger.info(f"✓ Moved raw_data of {result.modified_count} places to {place_documents.RAW_COLLECTION}")
+
+
+async def slim_place_copies(db):
+    """Korelacije: cijela mesta -> sažetak; veze film-mesto: bez kopiranih polja mesta"""
+    result = await db.film_place_correlations.update_many(
+        place_documents.fat_correlations_filter(), place_documents.slim_correlations_update()
+    )
+    if result.modified_count:
+        logger.info(f"✓ Slimmed place copies in {result.modified_count} film_place_correlations")
+
+    await db.film_place_connections.update_many(
+        {"$or": [{field: {"$exists": True}} for field in place_documents.CONNECTION_DROPPED_FIELDS]},
+        {"$unset": {field: "" for field in place_documents.CONNECTION_DROPPED_FIELDS}}
+    )
+
+
+# --- Migracije ---
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(
+        version=1,
+        name="baseline indexes",
+        backfills=(backfill_geo_locations, purge_float_cache_expiry, backfill_normalized_titles),
+        indexes={
+            "films": [
+                IndexModel("film_id", unique=True),
+                IndexModel("title"),
+                IndexModel([("popularity", DESCENDING)]),
+                IndexModel([("popularity", DESCENDING), ("film_id", ASCENDING)]),  # keyset paginacija
+                IndexModel([("vote_average", DESCENDING)]),
+                IndexModel("release_date"),
+                IndexModel("genres"),
+                IndexModel("production_countries"),
+                IndexModel([("fetched_at", DESCENDING)]),
+                *SEARCH_INDEXES  # text + title_normalized
+            ],
+            "cities": [
+                IndexModel("city_id", unique=True),
+                IndexModel("name"),
+                IndexModel([("population", DESCENDING)]),
+                IndexModel("country_code"),
+                IndexModel([("latitude", ASCENDING), ("longitude", ASCENDING)]),
+                IndexModel([("location", "2dsphere")])
+            ],
+            "film_locations": [
+                IndexModel([("film_id", ASCENDING), ("city_id", ASCENDING)], unique=True),
+                IndexModel("film_id"),
+                IndexModel("city_id"),
+                IndexModel([("film_title", "text")]),
+                IndexModel([("location", "2dsphere")])
+            ],
+            "places": [
+                IndexModel("place_id"),
+                IndexModel([("location", "2dsphere")])
+            ],
+            "film_place_correlations": [
+                IndexModel("film_id")
+            ],
+            "regional_films": [
+                IndexModel([("region", ASCENDING), ("fetch_date", DESCENDING)], unique=True),
+                IndexModel("region")
+            ],
+            "etl_jobs": [
+                IndexModel([("job_type", ASCENDING), ("started_at", DESCENDING)]),
+                IndexModel("status"),
+                IndexModel([("status", ASCENDING), ("completed_at", DESCENDING)]),  # verzija podataka
+                IndexModel([("started_at", ASCENDING)], expireAfterSeconds=30 * 24 * 60 * 60)  # 30 days TTL
+            ],
+            "analytics_cache": [
+                IndexModel([("cache_key", ASCENDING), ("expires_at", ASCENDING)]),
+                IndexModel("expires_at", expireAfterSeconds=0)
+            ]
+        }
+    ),
+    Migration(
+        version=2,
+        name="ETL upsert and lookup keys",
+        indexes={
+            # ne unique - postojeći podaci mogu imati duplikate iz upsert-a bez indeksa
+            "film_place_connections": [
+                IndexModel([("film_id", ASCENDING), ("place_id", ASCENDING)])
+            ],
+            "etl_jobs": [
+                IndexModel("job_id")
+            ],
+            "films": [
+                IndexModel("places_enriched")
+            ]
+        }
+    ),
+    Migration(
+        version=3,
+        name="slim place documents",
+        backfills=(move_raw_place_data, slim_place_copies)
+    ),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+async def apply_migration(db, migration: Migration):
+    for backfill in migration.backfills:
+        await backfill(db)
+
+    await asyncio.gather(*(
+        db[collection_name].create_indexes(indexes)
+        for collection_name, indexes in migration.indexes.items()
+    ))
+
+
+async def run_migrations(db) -> List[int]:
+    """Primjenjuje migracije koje nisu zabilježene; vraća primijenjene verzije"""
+    applied = set(await db[MIGRATIONS_COLLECTION].distinct("_id"))
+    pending = [migration for migration in MIGRATIONS if migration.version not in applied]
+    if not pending:
+        logger.info(f"✓ MongoDB schema up to date (v{LATEST_VERSION})")
+        return []
+
+    done = []
+    for migration in pending:
+        logger.info(f"Applying MongoDB migration v{migration.version}: {migration.name}...")
+        await apply_migration(db, migration)
+        try:
+            await db[MIGRATIONS_COLLECTION].insert_one({
+                "_id": migration.version,
+                "name": migration.name,
+                "applied_at": datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            pass  # drugi proces je istovremeno primijenio istu migraciju (indeksi su idempotentni)
+        done.append(migration.version)
+
+    logger.info(f"✓ MongoDB migrations applied: {done}")
+    return done
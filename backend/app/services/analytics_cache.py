@@ -0,0 +1,217 @@
+"""
+Dvoslojni keš za skupe analitičke agregacije.
+
+- L1: LRU u memoriji procesa (bez mreže).
+- L2: MongoDB kolekcija analytics_cache, dijeljena između API procesa. `expires_at` je
+  BSON datum, pa TTL indeks (expireAfterSeconds=0) zaista briše istekle unose.
+- `get_or_compute`: zaključavanje po ključu - samo jedan zahtjev računa isti ključ,
+  ostali čekaju njegov rezultat (nema stampeda na MongoDB).
+- Soft TTL: nakon `soft_ttl` vraća se postojeća vrijednost, a osvježavanje ide u pozadini;
+  tek nakon `ttl` se računa sinhrono. Promjena verzije podataka nije "soft" - vrijednost
+  stare verzije se nikad ne vraća (response keš/ETag bi je zapamtili pod novom verzijom).
+- Verzija unosa je `data_version.shared_token` (samo iz baze, ista u svim procesima), a
+  lokalne invalidacije (change stream) se provjeravaju preko `created_at` unosa.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+
+from bson.errors import InvalidDocument
+
+from ..config import settings
+from .data_version import data_version
+from .mongo_repository import mongo_repository, versioned_reads
+
+logger = logging.getLogger(__name__)
+
+CACHE_COLLECTION = "analytics_cache"
+
+Compute = Callable[[], Awaitable[Any]]
+
+# True ako je get_or_compute u ovom zahtjevu vratio vrijednost iza soft TTL-a
+# (response keš takav odgovor ne drži dugo - vidi api.caching.cached)
+stale_served: ContextVar[bool] = ContextVar("analytics_stale_served", default=False)
+
+
+@dataclass
+class CachedValue:
+    value: Any
+    version: str  # data_version.shared_token u trenutku računanja
+    created_at: datetime  # UTC; početak računanja (za lokalne bump-ove)
+    refresh_at: float  # monotonic; poslije ovoga - pozadinsko osvježavanje
+    expires_at: float  # monotonic; poslije ovoga - unos ne važi
+
+    def matches(self, version: str, collections: Optional[Sequence[str]]) -> bool:
+        """Izračunat iz trenutne verzije podataka"""
+        return self.version == version and not data_version.bumped_after(self.created_at, collections)
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.refresh_at
+
+    def is_valid(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+
+class AnalyticsCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._l1: "OrderedDict[str, CachedValue]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "computed": 0, "stale_served": 0, "background_refreshes": 0}
+
+    async def get_or_compute(self, key: str, compute: Compute, ttl: Optional[float] = None,
+                             soft_ttl: Optional[float] = None,
+                             collections: Optional[Sequence[str]] = None) -> Any:
+        """
+        Vrijednost iz L1/L2 ili izračunata (jednom po ključu). `collections` su kolekcije iz
+        kojih se računa (bez njih - bilo koja promjena podataka invalidira unos).
+        """
+        ttl = data_version.ttl(ttl or settings.ANALYTICS_CACHE_TTL_SECONDS)
+        soft_ttl = min(soft_ttl or ttl * settings.ANALYTICS_CACHE_SOFT_TTL_FRACTION, ttl)
+        await data_version.current()
+        version = data_version.shared_token(collections)
+
+        entry = self._l1_get(key)
+        if entry is not None and entry.matches(version, collections):
+            self.stats["l1_hits"] += 1
+            return self._serve(key, entry, compute, ttl, soft_ttl, collections)
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            # Dok je ovaj zahtjev čekao, drugi je možda već izračunao vrijednost
+            entry = self._l1_get(key)
+            if entry is None or not entry.matches(version, collections):
+                entry = await self._l2_get(key)
+                if entry is not None and entry.matches(version, collections):
+                    self.stats["l2_hits"] += 1
+                    self._l1_set(key, entry)
+
+            if entry is not None and entry.matches(version, collections):
+                return self._serve(key, entry, compute, ttl, soft_ttl, collections)
+            return await self._compute_and_store(key, compute, ttl, soft_ttl, version)
+
+    def _serve(self, key: str, entry: CachedValue, compute: Compute, ttl: float, soft_ttl: float,
+               collections: Optional[Sequence[str]]) -> Any:
+        """Vrijednost iza soft TTL-a (iste verzije) se vraća odmah, osvježavanje ide u pozadini"""
+        if not entry.is_fresh():
+            self.stats["stale_served"] += 1
+            stale_served.set(True)
+            self._schedule_refresh(key, compute, ttl, soft_ttl, collections)
+        return entry.value
+
+    async def invalidate(self, key: str):
+        self._l1.pop(key, None)
+        try:
+            db = await mongo_repository.database()
+            await db[CACHE_COLLECTION].delete_one({"cache_key": key})
+        except Exception as e:
+            logger.warning(f"Analytics cache L2 delete failed for {key}: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"l1_entries": len(self._l1), "refreshing": len(self._refreshing), **self.stats}
+
+    # --- L1 ---
+
+    def _l1_get(self, key: str) -> Optional[CachedValue]:
+        entry = self._l1.get(key)
+        if entry is None:
+            return None
+        if not entry.is_valid():
+            del self._l1[key]
+            return None
+        self._l1.move_to_end(key)
+        return entry
+
+    def _l1_set(self, key: str, entry: CachedValue):
+        self._l1[key] = entry
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.max_entries:
+            self._l1.popitem(last=False)
+
+    # --- L2 (MongoDB) ---
+
+    async def _l2_get(self, key: str) -> Optional[CachedValue]:
+        try:
+            db = await mongo_repository.database()
+            now = datetime.utcnow()
+            doc = await db[CACHE_COLLECTION].find_one({"cache_key": key, "expires_at": {"$gt": now}})
+        except Exception as e:
+            logger.warning(f"Analytics cache L2 read failed for {key}: {e}")
+            return None
+        if not doc:
+            return None
+
+        monotonic_now = time.monotonic()
+        refresh_at = doc.get("refresh_at") or doc["expires_at"]
+        created_at = doc.get("created_at") or datetime.min
+        return CachedValue(
+            value=doc.get("data"),
+            version=doc.get("data_version", ""),
+            created_at=created_at.replace(tzinfo=timezone.utc),
+            refresh_at=monotonic_now + (refresh_at - now).total_seconds(),
+            expires_at=monotonic_now + (doc["expires_at"] - now).total_seconds()
+        )
+
+    async def _l2_set(self, key: str, entry: CachedValue, ttl: float, soft_ttl: float):
+        now = datetime.utcnow()
+        try:
+            db = await mongo_repository.database()
+            await db[CACHE_COLLECTION].replace_one(
+                {"cache_key": key},
+                {
+                    "cache_key": key,
+                    "data": entry.value,
+                    "data_version": entry.version,
+                    "created_at": entry.created_at.replace(tzinfo=None),
+                    "refresh_at": now + timedelta(seconds=soft_ttl),
+                    "expires_at": now + timedelta(seconds=ttl)  # BSON datum - TTL indeks ga briše
+                },
+                upsert=True
+            )
+        except InvalidDocument as e:
+            logger.warning(f"Analytics cache value for {key} is not BSON-encodable, L1 only: {e}")
+        except Exception as e:
+            logger.warning(f"Analytics cache L2 write failed for {key}: {e}")
+
+    # --- Računanje ---
+
+    async def _compute_and_store(self, key: str, compute: Compute, ttl: float, soft_ttl: float,
+                                 version: str) -> Any:
+        created_at = datetime.now(timezone.utc)
+        with versioned_reads():
+            value = await compute()
+        self.stats["computed"] += 1
+        now = time.monotonic()
+        entry = CachedValue(value=value, version=version, created_at=created_at,
+                            refresh_at=now + soft_ttl, expires_at=now + ttl)
+        self._l1_set(key, entry)
+        await self._l2_set(key, entry, ttl, soft_ttl)
+        return value
+
+    def _schedule_refresh(self, key: str, compute: Compute, ttl: float, soft_ttl: float,
+                          collections: Optional[Sequence[str]]):
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self._refresh(key, compute, ttl, soft_ttl, collections))
+        self._refreshing[key] = task
+
+    async def _refresh(self, key: str, compute: Compute, ttl: float, soft_ttl: float,
+                       collections: Optional[Sequence[str]]):
+        try:
+            await data_version.current()
+            version = data_version.shared_token(collections)
+            async with self._locks.setdefault(key, asyncio.Lock()):
+                await self._compute_and_store(key, compute, ttl, soft_ttl, version)
+            self.stats["background_refreshes"] += 1
+        except Exception as e:
+            logger.error(f"Analytics cache background refresh failed for {key}: {e}")
+        finally:
+            self._refreshing.pop(key, None)
+
+
+analytics_cache = AnalyticsCache(max_entries=settings.ANALYTICS_CACHE_L1_MAX_ENTRIES)
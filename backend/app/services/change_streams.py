@@ -0,0 +1,183 @@
+"""
+Change stream consumer u API procesu: promjene u MongoDB-u -> invalidacija keša i događaji.
+
+- films / places / film_place_correlations: `data_version.bump(kolekcije)` - ETag-ovi i
+  keširani odgovori tih kolekcija odmah zastarijevaju (ostali ostaju važeći).
+- etl_jobs: promjena statusa ide na event bus; završen job pokreće `data_version.refresh()`
+  (verzije po tipu joba pokrivaju i izvedene kolekcije - matrica, rangiranja...).
+
+Promjene unutar CHANGE_STREAM_DEBOUNCE_SECONDS se skupljaju u jedan bump/događaj, pa
+bulk ETL upis ne pravi hiljade invalidacija. Resume token se pamti tek kada su skupljene
+promjene obrađene, pa se poslije greške nastavlja bez gubitka događaja.
+
+Change stream radi samo na replica setu (docker-compose.replicaset.yml); na standalone
+MongoDB-u consumer se gasi i ostaje polling verzije (DATA_VERSION_POLL_SECONDS).
+"""
+import asyncio
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from pymongo.errors import OperationFailure
+
+from ..config import settings
+from .data_version import data_version
+from .event_bus import event_bus
+from .mongo_repository import mongo_repository
+
+logger = logging.getLogger(__name__)
+
+DATA_COLLECTIONS = ("films", "places", "film_place_correlations")
+JOBS_COLLECTION = "etl_jobs"
+WATCHED_COLLECTIONS = DATA_COLLECTIONS + (JOBS_COLLECTION,)
+
+TERMINAL_JOB_STATUSES = ("completed", "failed")
+
+UNSUPPORTED_CODES = (40573,)  # $changeStream samo na replica setu
+HISTORY_LOST_CODES = (280, 286)  # resume token više nije u oplog-u
+
+# Samo ono što consumer čita (bez cijelih dokumenata filmova/mesta)
+PIPELINE = [
+    {"$match": {
+        "ns.coll": {"$in": list(WATCHED_COLLECTIONS)},
+        "operationType": {"$in": ["insert", "update", "replace", "delete", "drop"]}
+    }},
+    {"$project": {
+        "ns.coll": 1,
+        "operationType": 1,
+        "documentKey": 1,
+        "updateDescription.updatedFields.status": 1,
+        "fullDocument.job_id": 1,
+        "fullDocument.job_type": 1,
+        "fullDocument.status": 1
+    }}
+]
+
+
+class ChangeStreamConsumer:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._token: Optional[Dict[str, Any]] = None
+        self._pending: Counter = Counter()  # kolekcija -> broj promjena
+        self._jobs: Dict[Any, Dict[str, Any]] = {}  # etl_jobs _id -> {status, job_id?, job_type?}
+        self.stats = {"changes": 0, "flushes": 0, "restarts": 0, "last_change_at": None, "error": None}
+
+    @property
+    def live(self) -> bool:
+        return data_version.live
+
+    def start(self):
+        if not settings.CHANGE_STREAMS_ENABLED or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        data_version.live = False
+
+    async def _run(self):
+        while True:
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code in UNSUPPORTED_CODES:
+                    logger.warning("⚠️ Change streams need a replica set - falling back to data version polling")
+                    self.stats["error"] = "replica set required"
+                    data_version.live = False
+                    return
+                if e.code in HISTORY_LOST_CODES:
+                    self._token = None
+                logger.warning(f"⚠️ Change stream failed: {e}")
+                self.stats["error"] = str(e)
+            except Exception as e:
+                logger.warning(f"⚠️ Change stream failed: {e}")
+                self.stats["error"] = str(e)
+
+            data_version.live = False
+            self.stats["restarts"] += 1
+            await asyncio.sleep(settings.CHANGE_STREAM_RETRY_SECONDS)
+
+    async def _watch(self):
+        db = await mongo_repository.database()
+        debounce = settings.CHANGE_STREAM_DEBOUNCE_SECONDS
+
+        async with db.watch(PIPELINE, start_after=self._token, max_await_time_ms=int(debounce * 1000)) as stream:
+            if self._token is None:
+                # Promjene prije otvaranja streama (ili izgubljene iz oplog-a) nisu poznate
+                data_version.bump()
+                await data_version.refresh()
+            data_version.live = True
+            self.stats["error"] = None
+            logger.info(f"✓ Watching MongoDB change streams on {', '.join(WATCHED_COLLECTIONS)}")
+
+            flush_at = None
+            while stream.alive:
+                change = await stream.try_next()
+                if change is not None:
+                    self._collect(change)
+                    flush_at = flush_at or time.monotonic() + debounce
+                if flush_at is not None and (change is None or time.monotonic() >= flush_at):
+                    await self._flush(db)
+                    flush_at = None
+                if flush_at is None:
+                    self._token = stream.resume_token
+
+    def _collect(self, change: Dict[str, Any]):
+        collection = change["ns"]["coll"]
+        self._pending[collection] += 1
+        self.stats["changes"] += 1
+        self.stats["last_change_at"] = datetime.now(timezone.utc).isoformat()
+
+        if collection != JOBS_COLLECTION or "documentKey" not in change:
+            return
+        job = change.get("fullDocument") or {}
+        status = job.get("status") or change.get("updateDescription", {}).get("updatedFields", {}).get("status")
+        if status:
+            self._jobs[change["documentKey"]["_id"]] = {**job, "status": status}
+
+    async def _flush(self, db):
+        pending, self._pending = self._pending, Counter()
+        jobs, self._jobs = self._jobs, {}
+        self.stats["flushes"] += 1
+
+        changed = {name: count for name, count in pending.items() if name in DATA_COLLECTIONS}
+        if changed:
+            data_version.bump(changed)
+            event_bus.publish("data_changed", collections=changed)
+
+        if any(job["status"] in TERMINAL_JOB_STATUSES for job in jobs.values()):
+            await data_version.refresh()
+
+        for _id, job in jobs.items():
+            if "job_type" not in job:
+                try:
+                    job = {**(await db[JOBS_COLLECTION].find_one(
+                        {"_id": _id}, {"_id": 0, "job_id": 1, "job_type": 1}
+                    ) or {}), **job}
+                except Exception as e:
+                    logger.warning(f"Could not read ETL job {_id}: {e}")
+            event_bus.publish("etl_job", job_id=job.get("job_id"), job_type=job.get("job_type"),
+                              status=job["status"])
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.CHANGE_STREAMS_ENABLED,
+            "running": self._task is not None and not self._task.done(),
+            "live": self.live,
+            **self.stats
+        }
+
+
+# Singleton instance
+change_stream_consumer = ChangeStreamConsumer()
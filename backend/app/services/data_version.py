@@ -0,0 +1,178 @@
+"""
+Verzija podataka platforme za invalidaciju keša i HTTP validatore (ETag/Last-Modified).
+
+Verzija je posljednji završeni ETL job (completed_at + job_id), ukupno i po tipu
+joba; JOB_TYPE_COLLECTIONS kaže koje kolekcije koji tip joba mijenja. MongoDB se
+pita najviše jednom u DATA_VERSION_POLL_SECONDS po procesu; između toga se vraća
+zapamćena vrijednost, pa keširani odgovori ne diraju bazu.
+
+Kada change stream consumer radi (`live`), promjene stižu kao `bump(collections)`
+i `refresh()`, pa se baza pita rijetko (CHANGE_STREAM_POLL_SECONDS), a keševi
+smiju koristiti duže TTL-ove (`ttl`).
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tip ETL joba -> kolekcije koje job mijenja
+JOB_TYPE_COLLECTIONS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "tmdb": ("films", "regional_films"),
+    "geoapify_places": ("places", "place_rankings"),
+    "film_place_correlation": ("film_place_correlations", "genre_category_matrix", "analytics"),
+})
+
+
+class DataVersionService:
+    """Prati posljednji završeni ETL job i daje token verzije podataka"""
+
+    def __init__(self, poll_seconds: Optional[float] = None):
+        self.poll_seconds = poll_seconds if poll_seconds is not None else settings.DATA_VERSION_POLL_SECONDS
+        self._version = "initial"
+        self._job_versions: Dict[str, Tuple[str, datetime]] = {}  # job_type -> (job_id, completed_at)
+        self._local_bumps = 0  # sve lokalne invalidacije (ukupna verzija)
+        self._global_bumps = 0  # bump() bez kolekcija - mijenja sve validatore
+        self._collection_bumps: Dict[str, int] = {}
+        self._bumped_at: Dict[Optional[str], datetime] = {}  # kolekcija (None = sve) -> vrijeme bump-a
+        self.live = False
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> str:
+        """Posljednja poznata verzija (bez upita u bazu)"""
+        return f"{self._version}:{self._local_bumps}"
+
+    @property
+    def poll_interval(self) -> float:
+        return max(self.poll_seconds, settings.CHANGE_STREAM_POLL_SECONDS) if self.live else self.poll_seconds
+
+    async def current(self) -> str:
+        """Verzija podataka; MongoDB se pita najviše jednom po intervalu"""
+        if time.monotonic() - self._checked_at < self.poll_interval:
+            return self.version
+
+        async with self._lock:
+            if time.monotonic() - self._checked_at >= self.poll_interval:
+                await self._poll()
+        return self.version
+
+    async def refresh(self) -> str:
+        """Odmah ponovo čita posljednje završene jobove (npr. change stream: job završen)"""
+        async with self._lock:
+            await self._poll()
+        return self.version
+
+    async def _poll(self):
+        from .mongo_repository import mongo_repository
+
+        self._checked_at = time.monotonic()
+        try:
+            # Posljednji završeni job po tipu (indeks status + completed_at)
+            latest = await mongo_repository.aggregate("etl_jobs", [
+                {"$match": {"status": "completed", "completed_at": {"$ne": None}}},
+                {"$sort": {"completed_at": -1}},
+                {"$group": {
+                    "_id": "$job_type",
+                    "job_id": {"$first": "$job_id"},
+                    "completed_at": {"$first": "$completed_at"}
+                }}
+            ])
+
+            job_versions = {}
+            for job in latest:
+                completed_at = job["completed_at"]
+                if completed_at.tzinfo is None:
+                    completed_at = completed_at.replace(tzinfo=timezone.utc)
+                job_versions[job["_id"]] = (str(job.get("job_id", "")), completed_at)
+
+            if job_versions:
+                self._job_versions = job_versions
+                job_id, completed_at = max(job_versions.values(), key=lambda v: v[1])
+                self._version = f"{completed_at.isoformat()}/{job_id}"
+        except Exception as e:
+            # Bez baze zadrži posljednju verziju; keš i dalje ističe po TTL-u
+            logger.warning(f"⚠️ Could not read data version: {e}")
+
+    def _versions_for(self, collections: Iterable[str]) -> Optional[list]:
+        """Posljednji jobovi koji mijenjaju kolekcije; None ako neka kolekcija nema poznat job"""
+        versions = []
+        for collection in set(collections):
+            job_types = [jt for jt, names in JOB_TYPE_COLLECTIONS.items() if collection in names]
+            known = [(jt, self._job_versions[jt]) for jt in job_types if jt in self._job_versions]
+            if not known:
+                return None
+            versions.extend(known)
+        return sorted(set(versions))
+
+    @staticmethod
+    def _digest(versions: list, suffix: str = "") -> str:
+        return hashlib.sha1(
+            ("|".join(f"{jt}:{job_id}" for jt, (job_id, _) in versions) + suffix).encode()
+        ).hexdigest()[:20]
+
+    def validators(self, collections: Iterable[str]) -> Optional[Tuple[str, datetime]]:
+        """
+        (token, last_modified) za kolekcije, iz posljednjih jobova koji ih mijenjaju.
+        None ako neka kolekcija nema poznat job (tada se validatori ne šalju).
+        """
+        requested = sorted(set(collections))
+        versions = self._versions_for(requested)
+        if not versions:
+            return None
+        bumps = [self._global_bumps] + [self._collection_bumps.get(name, 0) for name in requested]
+        return self._digest(versions, f"|{bumps}"), max(completed_at for _, (_, completed_at) in versions)
+
+    def token(self, collections: Optional[Iterable[str]] = None) -> str:
+        """Verzija za keš: po kolekcijama ako su poznate, inače ukupna"""
+        validators = self.validators(collections) if collections else None
+        return validators[0] if validators else self.version
+
+    def shared_token(self, collections: Optional[Iterable[str]] = None) -> str:
+        """
+        Verzija samo iz baze (bez lokalnih bump-ova) - ista u svim API/Celery procesima,
+        pa je smiju nositi unosi dijeljenog L2 keša. Lokalne bump-ove pokriva `bumped_after`.
+        """
+        versions = self._versions_for(collections) if collections else None
+        return self._digest(versions) if versions else self._version
+
+    def bumped_after(self, moment: datetime, collections: Optional[Iterable[str]] = None) -> bool:
+        """Da li je poslije `moment` bilo lokalne invalidacije kolekcija (bez kolekcija - bilo koje)"""
+        if collections is None:
+            times = self._bumped_at.values()
+        else:
+            times = [self._bumped_at[name] for name in (None, *collections) if name in self._bumped_at]
+        return any(bumped_at > moment for bumped_at in times)
+
+    def ttl(self, seconds: float) -> float:
+        """
+        TTL keša: dok change stream radi, promjene invalidiraju keš, pa TTL može biti duži.
+        Samo za vrijednosti izračunate iz trenutne verzije (ne za one iza soft TTL-a).
+        """
+        return max(seconds, settings.CHANGE_STREAM_CACHE_TTL_SECONDS) if self.live else seconds
+
+    def bump(self, collections: Optional[Iterable[str]] = None):
+        """
+        Lokalna invalidacija: bez kolekcija sve (npr. nakon ETL-a pokrenutog iz ovog
+        procesa), sa kolekcijama samo njihovi validatori i keš unosi vezani za njih.
+        """
+        self._local_bumps += 1
+        now = datetime.now(timezone.utc)
+        if collections is None:
+            self._global_bumps += 1
+            self._bumped_at[None] = now
+            return
+        for name in collections:
+            self._collection_bumps[name] = self._collection_bumps.get(name, 0) + 1
+            self._bumped_at[name] = now
+
+
+# Singleton instance
+data_version = DataVersionService()
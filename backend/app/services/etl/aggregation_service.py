@@ -1,8 +1,13 @@
 import logging
-from typing import List, Dict, Any, Optional
+from array import array
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 import statistics
 
+from . import genre_rules
+from .place_documents import place_summary
+from ...utils.topk import top_k
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,102 +19,73 @@ class AggregationService:
         """
         Povezuje filmove sa lokacijama na osnovu žanra i teme
         """
-        correlations = []
-
-        # Mapiranje žanrova na kategorije mesta
-        genre_to_categories = {
-            "action": ["entertainment.cinema", "commercial", "building"],
-            "comedy": ["entertainment", "catering", "tourism"],
-            "drama": ["building.historic", "tourism.museum", "tourism.sights"],
-            "horror": ["building.abandoned", "tourism.sights", "natural"],
-            "romance": ["tourism.sights.viewpoint", "catering.cafe", "tourism"],
-            "thriller": ["commercial", "building", "tourism.sights"],
-            "science fiction": ["building", "tourism.museum", "entertainment"],
-            "adventure": ["natural", "tourism", "tourism.sights"],
-            "fantasy": ["tourism.sights.castle", "building.historic", "natural"]
-        }
+        place_signatures = AggregationService.compact_places(places)
 
+        correlations = []
         for film in films:
-            film_id = film.get("film_id")
-            film_title = film.get("title", "Unknown")
             film_genres = [g.lower() for g in film.get("genres", [])]
-
-            # Odredi relevantne kategorije za film
-            relevant_categories = []
-            for genre in film_genres[:2]:  # Uzmi max 2 glavna žanra
-                if genre in genre_to_categories:
-                    relevant_categories.extend(genre_to_categories[genre])
-
-            # Ako nema mapiranja, koristi opšte kategorije
-            if not relevant_categories:
-                relevant_categories = ["entertainment", "tourism", "catering"]
-
-            # Pronađi odgovarajuća mesta
-            suitable_places = []
-            for place in places:
-                place_categories = place.get("categories", [])
-                primary_category = place.get("primary_category", "")
-
-                # Proveri da li se kategorije poklapaju
-                if any(cat in primary_category for cat in relevant_categories):
-                    match_score = AggregationService._calculate_match_score(
-                        film_genres, place_categories, primary_category
-                    )
-
-                    if match_score > 0.3:  # Minimalni threshold
-                        suitable_places.append({
-                            "place": place,
-                            "match_score": match_score,
-                            "reason": f"Matches {film_genres[0] if film_genres else 'general'} genre"
-                        })
-
-            # Sortiraj po match score
-            suitable_places.sort(key=lambda x: x["match_score"], reverse=True)
-
-            # Dodaj korelaciju
-            if suitable_places:
-                correlations.append({
-                    "film_id": film_id,
-                    "film_title": film_title,
-                    "film_genres": film_genres,
-                    "suggested_locations": suitable_places[:3],  # Top 3 lokacije
-                    "total_matches": len(suitable_places),
-                    "average_match_score": statistics.mean(
-                        [p["match_score"] for p in suitable_places[:3]]) if suitable_places else 0
-                })
+            top_matches, total_matches = AggregationService.score_film_against_places(
+                film_genres, place_signatures
+            )
+            correlation = AggregationService.build_correlation(
+                film, film_genres, places, top_matches, total_matches
+            )
+            if correlation:
+                correlations.append(correlation)
 
         return correlations
 
     @staticmethod
-    def _calculate_match_score(film_genres: List[str], place_categories: List[str],
-                               primary_category: str) -> float:
-        """Izračunava koliko se dobro film i lokacija poklapaju"""
-        score = 0.0
-
-        genre_category_map = {
-            "action": ["entertainment.cinema", "commercial"],
-            "comedy": ["entertainment", "catering"],
-            "drama": ["building.historic", "tourism.museum"],
-            "horror": ["building.abandoned", "natural.cave"],
-            "romance": ["tourism.sights.viewpoint", "catering.cafe"]
-        }
+    def compact_places(places: List[Dict]) -> array:
+        """Svodi mesta na niz int potpisa kategorija (vidi genre_rules.place_signature)"""
+        return array("Q", (
+            genre_rules.place_signature(place.get("primary_category", ""), place.get("categories", []))
+            for place in places
+        ))
+
+    @staticmethod
+    def score_film_against_places(film_genres: List[str], place_signatures: Sequence[int],
+                                  top_n: int = 3) -> Tuple[List[Tuple[int, float]], int]:
+        """
+        Boduje film naspram svih mesta; vraća top N (indeks mesta, score) i broj poklapanja.
+        Jednaki score-ovi se rješavaju po indeksu mesta, pa je rezultat deterministički.
+        """
+        film_sig = genre_rules.film_signature(film_genres)
+        is_candidate = genre_rules.is_candidate
+        match_score = genre_rules.match_score
 
-        # Proveri direktna poklapanja
-        for genre in film_genres:
-            if genre in genre_category_map:
-                for cat in genre_category_map[genre]:
-                    if cat in primary_category or any(cat in pc for pc in place_categories):
-                        score += 0.5
+        matches = []
+        for index, place_sig in enumerate(place_signatures):
+            # Primarna kategorija mesta mora odgovarati glavnim žanrovima filma
+            if is_candidate(film_sig, place_sig):
+                score = match_score(film_sig, place_sig)
+                if score > genre_rules.MIN_MATCH_SCORE:
+                    matches.append((index, score))
 
-        # Bonus za specifične kategorije
-        if "cinema" in primary_category:
-            score += 0.3
-        if "museum" in primary_category:
-            score += 0.2
-        if "historic" in primary_category:
-            score += 0.2
+        # Stabilan top-k: jednaki score-ovi ostaju po indeksu mesta
+        return top_k(matches, top_n, key=lambda match: match[1]), len(matches)
 
-        return min(score, 1.0)  # Normalizuj na 0-1
+    @staticmethod
+    def build_correlation(film: Dict, film_genres: List[str], places: List[Dict],
+                          top_matches: List[Tuple[int, float]], total_matches: int) -> Optional[Dict]:
+        """Kreira korelacioni dokument iz top poklapanja (None ako nema poklapanja)"""
+        if not top_matches:
+            return None
+
+        reason = f"Matches {film_genres[0] if film_genres else 'general'} genre"
+        suggested_locations = [
+            {"place": place_summary(places[index]), "match_score": score, "reason": reason}
+            for index, score in top_matches
+        ]
+
+        return {
+            "film_id": film.get("film_id"),
+            "film_title": film.get("title", "Unknown"),
+            "film_genres": film_genres,
+            "suggested_locations": suggested_locations,  # Top 3 lokacije
+            "total_matches": total_matches,
+            "average_match_score": statistics.mean([score for _, score in top_matches])
+        }
 
     @staticmethod
     def analyze_film_success_by_location(films: List[Dict], correlations: List[Dict]) -> Dict:
@@ -196,13 +172,16 @@ class AggregationService:
         preferred_genres = user_preferences.get("preferred_genres", [])
         preferred_categories = user_preferences.get("preferred_categories", [])
 
+        genre_categories = [genre_rules.categories_for_genre(genre) for genre in preferred_genres]
+        mapped_genres = len([g for g in preferred_genres if genre_rules.normalize_genre(g) in genre_rules.GENRE_BITS])
+
         for place in places:
             relevance_score = 0.0
+            place_sig = genre_rules.place_signature(place.get("primary_category", ""), place.get("categories", []))
 
-            # Proveri žanrove
-            for genre in preferred_genres:
-                genre_categories = AggregationService._get_categories_for_genre(genre)
-                if any(cat in place.get("primary_category", "") for cat in genre_categories):
+            # Proveri žanrove (primarna kategorija mesta)
+            for categories in genre_categories:
+                if genre_rules.matches_any(place_sig, categories, primary_only=True):
                     relevance_score += 0.4
 
             # Proveri direktne kategorije
@@ -220,26 +199,13 @@ class AggregationService:
                     "place": place,
                     "relevance_score": round(relevance_score, 2),
                     "reasons": [
-                        f"Matches {len([g for g in preferred_genres if AggregationService._get_categories_for_genre(g)])} preferred genres",
+                        f"Matches {mapped_genres} preferred genres",
                         "Central location" if place.get("distance", 0) < 2000 else ""
                     ]
                 })
 
-        # Sortiraj po relevance
-        recommendations.sort(key=lambda x: x["relevance_score"], reverse=True)
-        return recommendations[:10]  # Top 10 preporuka
-
-    @staticmethod
-    def _get_categories_for_genre(genre: str) -> List[str]:
-        """Vraća kategorije mesta za dati žanr"""
-        mapping = {
-            "action": ["entertainment.cinema", "commercial"],
-            "comedy": ["entertainment", "catering"],
-            "drama": ["building.historic", "tourism.museum"],
-            "horror": ["building.abandoned", "tourism.sights"],
-            "romance": ["tourism.sights.viewpoint", "catering.cafe"]
-        }
-        return mapping.get(genre.lower(), ["tourism", "entertainment"])
+        # Top 10 preporuka po relevance
+        return top_k(recommendations, 10, key=lambda x: x["relevance_score"])
 
 
 # Singleton instance
@@ -0,0 +1,172 @@
+"""
+Metrike ETL poslova u MongoDB time-series kolekciji (etl_metrics).
+
+Jedno mjerenje po fazi posla: {ts, meta: {job_type, stage}, job_id, duration_s, docs,
+inserted, upstream_calls, errors, failed}. Faza "job" je cijeli posao (failed = 1 ako je pao).
+Time-series kolekcija mjerenja istog meta para čuva zajedno u kompresovanim bucket-ima
+i sama ih briše poslije METRICS_RETENTION_DAYS.
+
+Rollup-ovi po satu i danu (etl_metrics_rollups) se poslije svakog mjerenja preračunavaju
+$dateTrunc agregacijom i $merge-om, ali samo za otvorene bucket-e (ROLLUP_LOOKBACK) -
+dnevni izvještaj i admin statistika čitaju samo rollup-ove, bez skeniranja etl_jobs.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+METRICS_COLLECTION = "etl_metrics"
+ROLLUP_COLLECTION = "etl_metrics_rollups"
+
+METRICS_RETENTION_DAYS = 90
+TIMESERIES_OPTIONS = {"timeField": "ts", "metaField": "meta", "granularity": "minutes"}
+
+ROLLUP_UNITS = ("hour", "day")
+ROLLUP_KEY = ("unit", "bucket", "job_type", "stage")
+ROLLUP_LOOKBACK = {"hour": timedelta(hours=2), "day": timedelta(days=1)}  # kasna mjerenja ulaze u rollup
+
+STAGE_JOB = "job"
+
+_COUNTERS = ("docs", "inserted", "upstream_calls", "errors", "failed")
+
+_ensured = False
+
+
+def ensure_collections(db):
+    """Time-series kolekcija (MongoDB 5.0+) i jedinstveni ključ rollup-a (potreban za $merge)"""
+    global _ensured
+    if _ensured:
+        return
+    if METRICS_COLLECTION not in db.list_collection_names():
+        db.create_collection(
+            METRICS_COLLECTION,
+            timeseries=TIMESERIES_OPTIONS,
+            expireAfterSeconds=METRICS_RETENTION_DAYS * 24 * 60 * 60
+        )
+    rollups = db[ROLLUP_COLLECTION]
+    rollups.create_index([(field, ASCENDING) for field in ROLLUP_KEY], unique=True)
+    rollups.create_index([("unit", ASCENDING), ("bucket", DESCENDING)])
+    _ensured = True
+
+
+class StageTimer:
+    """Mjeri jednu fazu posla; brojače puni kod faze, `record` upisuje mjerenje"""
+
+    def __init__(self, job_id: str, job_type: str, stage: str):
+        self.job_id = job_id
+        self.job_type = job_type
+        self.stage = stage
+        self.started = time.perf_counter()
+        self.counters = dict.fromkeys(_COUNTERS, 0)
+
+    def add(self, **counters: int):
+        for name, value in counters.items():
+            self.counters[name] += value
+
+    def measurement(self) -> Dict[str, Any]:
+        return {
+            "ts": datetime.now(timezone.utc),
+            "meta": {"job_type": self.job_type, "stage": self.stage},
+            "job_id": self.job_id,
+            "duration_s": round(time.perf_counter() - self.started, 3),
+            **self.counters
+        }
+
+    def record(self, db, **counters: int):
+        self.add(**counters)
+        record(db, self.measurement())
+
+
+def record(db, measurement: Dict[str, Any]):
+    """Upis mjerenja i osvježavanje otvorenih rollup bucket-a; greška metrika ne ruši ETL"""
+    try:
+        ensure_collections(db)
+        db[METRICS_COLLECTION].insert_one(measurement)
+        refresh_rollups(db)
+    except Exception as e:
+        logger.warning(f"Could not record ETL metrics for {measurement.get('meta')}: {e}")
+
+
+def bucket_start(moment: datetime, unit: str) -> datetime:
+    if unit == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_pipeline(unit: str, since: datetime) -> list:
+    """Sumira mjerenja od `since` (početak bucket-a) po (bucket, job_type, stage) u ROLLUP_COLLECTION"""
+    return [
+        {"$match": {"ts": {"$gte": since}}},
+        {"$group": {
+            "_id": {
+                "bucket": {"$dateTrunc": {"date": "$ts", "unit": unit}},
+                "job_type": "$meta.job_type",
+                "stage": "$meta.stage"
+            },
+            "runs": {"$sum": 1},
+            "duration_s": {"$sum": "$duration_s"},
+            "max_duration_s": {"$max": "$duration_s"},
+            **{name: {"$sum": f"${name}"} for name in _COUNTERS}
+        }},
+        {"$project": {
+            "_id": 0,
+            "unit": {"$literal": unit},
+            "bucket": "$_id.bucket",
+            "job_type": "$_id.job_type",
+            "stage": "$_id.stage",
+            "runs": 1,
+            "duration_s": {"$round": ["$duration_s", 3]},
+            "max_duration_s": 1,
+            **{name: 1 for name in _COUNTERS},
+            "docs_per_s": {"$cond": [
+                {"$gt": ["$duration_s", 0]}, {"$round": [{"$divide": ["$docs", "$duration_s"]}, 2]}, 0
+            ]},
+            "rolled_up_at": "$$NOW"
+        }},
+        {"$merge": {"into": ROLLUP_COLLECTION, "on": list(ROLLUP_KEY),
+                    "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+
+
+def refresh_rollups(db, now: Optional[datetime] = None):
+    now = now or datetime.now(timezone.utc)
+    for unit in ROLLUP_UNITS:
+        since = bucket_start(now - ROLLUP_LOOKBACK[unit], unit)
+        list(db[METRICS_COLLECTION].aggregate(rollup_pipeline(unit, since)))
+
+
+def rollup_query(unit: str, since: datetime, job_type: Optional[str] = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"unit": unit, "bucket": {"$gte": since}}
+    if job_type:
+        query["job_type"] = job_type
+    return query
+
+
+def summarize_day(rollups: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Dnevni izvještaj iz dnevnih rollup-ova: poslovi po tipu + učitani dokumenti"""
+    jobs = [row for row in rollups if row.get("stage") == STAGE_JOB]
+    by_type: Dict[str, Dict[str, Any]] = {}
+    for row in jobs:
+        by_type[row["job_type"]] = {
+            "runs": row["runs"],
+            "failed": row["failed"],
+            "docs": row["docs"],
+            "inserted": row["inserted"],
+            "upstream_calls": row["upstream_calls"],
+            "errors": row["errors"],
+            "duration_s": row["duration_s"],
+            "docs_per_s": row["docs_per_s"]
+        }
+
+    return {
+        "films_added": by_type.get("tmdb", {}).get("inserted", 0),
+        "places_added": by_type.get("geoapify_places", {}).get("inserted", 0),
+        "etl_jobs_run": sum(row["runs"] for row in jobs),
+        "successful_jobs": sum(row["runs"] - row["failed"] for row in jobs),
+        "failed_jobs": sum(row["failed"] for row in jobs),
+        "by_job_type": by_type
+    }
@@ -0,0 +1,133 @@
+"""
+Materijalizovana matrica žanr × kategorija mesta (kolekcija genre_category_matrix).
+
+Jedan dokument po paru {genre, category, count}. Kategorije sadrže tačke
+('tourism.sights'), pa ne mogu biti ključevi polja - zato par po dokumentu.
+Matrica se održava `$inc` deltama pri svakom upisu/zameni korelacije, a
+`rebuild_matrix` je ponovo gradi iz film_place_correlations (reconciliation).
+"""
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+MATRIX_COLLECTION = "genre_category_matrix"
+CATEGORIES_PER_PLACE = 2  # Take top 2 categories
+
+# Polja korelacije koja utiču na matricu (projekcija za čitanje starog dokumenta)
+CONTRIBUTION_PROJECTION = {"_id": 0, "film_genres": 1, "suggested_locations.place.categories": 1}
+
+
+def contributions(correlation: Optional[Dict]) -> Counter:
+    """Doprinos jedne korelacije matrici: (žanr, kategorija) -> broj"""
+    counts = Counter()
+    if not correlation:
+        return counts
+
+    for genre in correlation.get("film_genres", []):
+        for loc in correlation.get("suggested_locations", []):
+            place = loc.get("place", {})
+            for category in place.get("categories", [])[:CATEGORIES_PER_PLACE]:
+                counts[(genre, category)] += 1
+    return counts
+
+
+def diff_contributions(old: Optional[Dict], new: Optional[Dict]) -> Counter:
+    """Razlika doprinosa nove i stare verzije korelacije (samo ne-nula delte)"""
+    delta = contributions(new)
+    delta.subtract(contributions(old))
+    return Counter({key: value for key, value in delta.items() if value})
+
+
+def ensure_indexes(db):
+    """Indeksi matrice: jedinstven par i čitanje po žanru sortirano po broju"""
+    collection = db[MATRIX_COLLECTION]
+    collection.create_index([("genre", ASCENDING), ("category", ASCENDING)], unique=True)
+    collection.create_index([("genre", ASCENDING), ("count", DESCENDING)])
+
+
+def apply_deltas(db, deltas: Dict[Tuple[str, str], int]) -> int:
+    """Primjenjuje delte jednim bulk upisom; parovi koji padnu na 0 se brišu"""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"genre": genre, "category": category},
+            {"$inc": {"count": delta}, "$set": {"updated_at": now}},
+            upsert=True
+        )
+        for (genre, category), delta in deltas.items()
+    ]
+    db[MATRIX_COLLECTION].bulk_write(operations, ordered=False)
+    db[MATRIX_COLLECTION].delete_many({"count": {"$lte": 0}})
+    return len(operations)
+
+
+def rebuild_pipeline() -> list:
+    """Agregacija koja iz korelacija računa cijelu matricu i zamjenjuje kolekciju"""
+    return [
+        {"$project": {
+            "_id": 0,
+            "film_genres": 1,
+            "categories": {
+                "$map": {
+                    "input": {"$ifNull": ["$suggested_locations", []]},
+                    "as": "loc",
+                    "in": {"$slice": [{"$ifNull": ["$$loc.place.categories", []]}, CATEGORIES_PER_PLACE]}
+                }
+            }
+        }},
+        {"$unwind": "$film_genres"},
+        {"$unwind": "$categories"},
+        {"$unwind": "$categories"},
+        {"$group": {"_id": {"genre": "$film_genres", "category": "$categories"}, "count": {"$sum": 1}}},
+        {"$project": {
+            "_id": 0,
+            "genre": "$_id.genre",
+            "category": "$_id.category",
+            "count": 1,
+            "updated_at": "$$NOW"
+        }},
+        {"$out": MATRIX_COLLECTION}
+    ]
+
+
+def rebuild_matrix(db) -> int:
+    """Ponovo gradi matricu iz film_place_correlations; vraća broj parova"""
+    list(db.film_place_correlations.aggregate(rebuild_pipeline(), allowDiskUse=True))
+    ensure_indexes(db)
+    pairs = db[MATRIX_COLLECTION].count_documents({})
+    logger.info(f"🧮 Genre-category matrix rebuilt: {pairs} pairs")
+    return pairs
+
+
+def ensure_matrix(db):
+    """Indeksi + inicijalna izgradnja ako matrica još ne postoji a korelacije postoje"""
+    ensure_indexes(db)
+    if db[MATRIX_COLLECTION].estimated_document_count() == 0 \
+            and db.film_place_correlations.estimated_document_count() > 0:
+        rebuild_matrix(db)
+
+
+def group_matrix(rows: Iterable[Dict], top_n: int = 5) -> list:
+    """Redove sortirane po (genre, count desc) pretvara u odgovor endpointa"""
+    by_genre: Dict[str, Dict] = {}
+    for row in rows:
+        entry = by_genre.setdefault(row["genre"], {
+            "genre": row["genre"],
+            "total_correlations": 0,
+            "top_categories": []
+        })
+        entry["total_correlations"] += row["count"]
+        if len(entry["top_categories"]) < top_n:
+            entry["top_categories"].append({"category": row["category"], "count": row["count"]})
+
+    # Sort by total correlations
+    return sorted(by_genre.values(), key=lambda x: x["total_correlations"], reverse=True)
@@ -0,0 +1,211 @@
+"""
+Jedinstvena pravila žanr → kategorija mesta za korelaciju, enrichment i preporuke.
+
+Pravila se kompajliraju jednom pri importu u zamrznute strukture:
+- skup prefiksa kategorija (svaka kategorija pravila ima svoj bit),
+- bitmaske žanrova,
+- tabele težina po svakoj kombinaciji žanrova.
+
+Mesto se svodi na jedan int potpis (`place_signature`), film na par bitmaski
+(`film_signature`), pa je bodovanje para film-mesto lookup u tabeli.
+"""
+from itertools import accumulate
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+# -------------------------------
+# PRAVILA
+# -------------------------------
+GENRE_CATEGORY_RULES: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "action": ("entertainment.cinema", "commercial", "building"),
+    "comedy": ("entertainment", "catering", "tourism"),
+    "drama": ("building.historic", "tourism.museum", "tourism.sights"),
+    "horror": ("building.abandoned", "tourism.sights", "natural"),
+    "romance": ("tourism.sights.viewpoint", "catering.cafe", "tourism"),
+    "thriller": ("commercial", "building", "tourism.sights"),
+    "science fiction": ("building", "tourism.museum", "entertainment"),
+    "adventure": ("natural", "tourism", "tourism.sights"),
+    "fantasy": ("tourism.sights.castle", "building.historic", "natural"),
+})
+
+# TMDB i korisnici koriste različite nazive za iste žanrove
+GENRE_ALIASES: Mapping[str, str] = MappingProxyType({
+    "sci-fi": "science fiction",
+    "scifi": "science fiction",
+})
+
+# Kategorije kada film nema nijedan mapiran žanr
+DEFAULT_CATEGORIES: Tuple[str, ...] = ("entertainment", "tourism", "catering")
+
+# Bodovanje
+MATCH_WEIGHT = 0.5  # po svakoj kategoriji pravila koju mesto zadovoljava, po žanru
+BONUS_WEIGHTS: Mapping[str, float] = MappingProxyType({
+    "cinema": 0.3,
+    "museum": 0.2,
+    "historic": 0.2,
+})
+MIN_MATCH_SCORE = 0.3  # minimalni threshold za poklapanje
+LEAD_GENRES = 2  # broj glavnih žanrova koji određuju kandidate
+
+# -------------------------------
+# KOMPAJLIRANE STRUKTURE
+# -------------------------------
+GENRES: Tuple[str, ...] = tuple(GENRE_CATEGORY_RULES)
+GENRE_BITS: Mapping[str, int] = MappingProxyType({genre: 1 << i for i, genre in enumerate(GENRES)})
+
+RULE_CATEGORIES: Tuple[str, ...] = tuple(sorted(
+    {category for categories in GENRE_CATEGORY_RULES.values() for category in categories}
+    | set(DEFAULT_CATEGORIES)
+))
+CATEGORY_BITS: Mapping[str, int] = MappingProxyType({c: 1 << i for i, c in enumerate(RULE_CATEGORIES)})
+
+_CATEGORY_COUNT = len(RULE_CATEGORIES)
+_PRIMARY_SHIFT = _CATEGORY_COUNT  # bitovi primarne kategorije idu iznad bitova svih kategorija
+_BONUS_BITS: Mapping[str, int] = MappingProxyType({
+    keyword: 1 << (2 * _CATEGORY_COUNT + i) for i, keyword in enumerate(BONUS_WEIGHTS)
+})
+_BONUS_MASK = sum(_BONUS_BITS.values())
+
+
+def _categories_mask(categories: Iterable[str]) -> int:
+    mask = 0
+    for category in categories:
+        mask |= CATEGORY_BITS[category]
+    return mask
+
+
+_GENRE_CATEGORY_MASKS: Tuple[int, ...] = tuple(_categories_mask(GENRE_CATEGORY_RULES[g]) for g in GENRES)
+_DEFAULT_MASK = _categories_mask(DEFAULT_CATEGORIES)
+
+
+def _compile_combo_tables():
+    """Za svaku kombinaciju žanrova: maska kategorija, težine po kategoriji i maska kandidata"""
+    combo_masks = []
+    combo_weights = []
+    lead_filters = []
+
+    for combo in range(1 << len(GENRES)):
+        weights: Dict[int, float] = {}
+        union = 0
+        for i, category_mask in enumerate(_GENRE_CATEGORY_MASKS):
+            if combo & (1 << i):
+                union |= category_mask
+                for bit in range(_CATEGORY_COUNT):
+                    if category_mask & (1 << bit):
+                        weights[1 << bit] = weights.get(1 << bit, 0.0) + MATCH_WEIGHT
+
+        combo_masks.append(union)
+        combo_weights.append(tuple(sorted(weights.items())))
+        lead_filters.append((union or _DEFAULT_MASK) << _PRIMARY_SHIFT)
+
+    return tuple(combo_masks), tuple(combo_weights), tuple(lead_filters)
+
+
+_COMBO_CATEGORY_MASKS, _COMBO_WEIGHTS, _LEAD_FILTERS = _compile_combo_tables()
+
+# Tabela score-ova (kombinacija žanrova, relevantni dio potpisa mesta) -> score
+_PAIR_SCORES: Dict[Tuple[int, int], float] = {}
+_PAIR_SCORES_LIMIT = 1 << 16
+
+
+# -------------------------------
+# API
+# -------------------------------
+def normalize_genre(genre: str) -> str:
+    """Normalizuje naziv žanra (mala slova, aliasi)"""
+    name = (genre or "").strip().lower()
+    return GENRE_ALIASES.get(name, name)
+
+
+def genre_mask(genres: Iterable[str]) -> int:
+    """Bitmaska poznatih žanrova"""
+    mask = 0
+    for genre in genres:
+        mask |= GENRE_BITS.get(normalize_genre(genre), 0)
+    return mask
+
+
+def film_signature(genres: Sequence[str]) -> Tuple[int, int]:
+    """(maska svih žanrova, maska glavnih žanrova) za film"""
+    return genre_mask(genres), genre_mask(genres[:LEAD_GENRES])
+
+
+def category_prefixes(category: str) -> Iterable[str]:
+    """'tourism.sights.castle' -> 'tourism', 'tourism.sights', 'tourism.sights.castle'"""
+    return accumulate(category.split("."), lambda prefix, part: f"{prefix}.{part}")
+
+
+def _category_bits(category: str) -> int:
+    mask = 0
+    for prefix in category_prefixes(category):
+        mask |= CATEGORY_BITS.get(prefix, 0)
+    return mask
+
+
+def place_signature(primary_category: Optional[str], categories: Sequence[str]) -> int:
+    """Jedan int koji opisuje mesto: prefiksi svih kategorija, primarne kategorije i bonus oznake"""
+    signature = 0
+    for category in categories or ():
+        if not category:
+            continue
+        signature |= _category_bits(category)
+        for part in category.split("."):
+            signature |= _BONUS_BITS.get(part, 0)
+
+    if primary_category:
+        primary_bits = _category_bits(primary_category)
+        signature |= primary_bits | (primary_bits << _PRIMARY_SHIFT)
+        for part in primary_category.split("."):
+            signature |= _BONUS_BITS.get(part, 0)
+
+    return signature
+
+
+def categories_for_genre(genre: str) -> Tuple[str, ...]:
+    """Kategorije mesta za dati žanr (opšte kategorije ako žanr nije mapiran)"""
+    return GENRE_CATEGORY_RULES.get(normalize_genre(genre), DEFAULT_CATEGORIES)
+
+
+def relevant_categories(genres: Sequence[str]) -> Tuple[str, ...]:
+    """Kategorije relevantne za glavne žanrove filma, bez duplikata"""
+    categories = []
+    for genre in genres[:LEAD_GENRES]:
+        categories.extend(GENRE_CATEGORY_RULES.get(normalize_genre(genre), ()))
+    return tuple(dict.fromkeys(categories)) or DEFAULT_CATEGORIES
+
+
+def matches_any(place_sig: int, categories: Iterable[str], primary_only: bool = False) -> bool:
+    """Da li mesto zadovoljava bar jednu od (kategorija pravila) kategorija"""
+    mask = _categories_mask(c for c in categories if c in CATEGORY_BITS)
+    if primary_only:
+        mask <<= _PRIMARY_SHIFT
+    return bool(place_sig & mask)
+
+
+def is_candidate(film_sig: Tuple[int, int], place_sig: int) -> bool:
+    """Primarna kategorija mesta odgovara glavnim žanrovima filma"""
+    return bool(place_sig & _LEAD_FILTERS[film_sig[1]])
+
+
+def match_score(film_sig: Tuple[int, int], place_sig: int) -> float:
+    """Score poklapanja filma i mesta u opsegu 0-1 (lookup u tabeli kombinacija)"""
+    combo = film_sig[0]
+    relevant = place_sig & (_COMBO_CATEGORY_MASKS[combo] | _BONUS_MASK)
+    key = (combo, relevant)
+
+    score = _PAIR_SCORES.get(key)
+    if score is None:
+        score = 0.0
+        for bit, weight in _COMBO_WEIGHTS[combo]:
+            if relevant & bit:
+                score += weight
+        for keyword, bonus_bit in _BONUS_BITS.items():
+            if relevant & bonus_bit:
+                score += BONUS_WEIGHTS[keyword]
+        score = min(score, 1.0)  # Normalizuj na 0-1
+
+        if len(_PAIR_SCORES) < _PAIR_SCORES_LIMIT:
+            _PAIR_SCORES[key] = score
+
+    return score
+
@@ -2,6 +2,7 @@ import httpx
 import logging
 from typing import List, Dict, Optional, Any
 from ...config import settings
+from ...utils.geo import geo_point
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -119,6 +120,7 @@ class GeoapifyService:
                         "primary_category": props.get("categories", [""])[0] if props.get("categories") else "",
                         "latitude": place_coords[1] if place_coords else lat,
                         "longitude": place_coords[0] if place_coords else lon,
+                        "location": geo_point(place_coords[1], place_coords[0]) if place_coords else geo_point(lat, lon),
                         "distance": props.get("distance", 0),  # metara od centra
                         "raw_data": props  # Čuvamo raw za detalje
                     }
@@ -297,6 +299,7 @@ class GeoapifyService:
                                     "country_code": country_code,
                                     "latitude": coordinates[1] if len(coordinates) > 1 else 0,
                                     "longitude": coordinates[0] if coordinates else 0,
+                                    "location": geo_point(coordinates[1], coordinates[0]) if len(coordinates) > 1 else None,
                                     "population": props.get("population", 0),
                                     "film_importance": self._get_film_importance(city_name),
                                     "description": self._get_city_description(city_name),
@@ -0,0 +1,189 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from .aggregation_service import AggregationService
+from ...config import settings
+
+logger = logging.getLogger(__name__)
+
+# Kompaktna mesta u worker procesu - postavlja ih initializer jednom po procesu
+_worker_place_signatures: Sequence[int] = ()
+
+# Celery chunk taskovi: (correlation_job_id, potpisi, _id mesta) - jednom po worker procesu i jobu
+_job_places: Tuple[Optional[str], Sequence[int], List[str]] = (None, (), [])
+
+PLACE_SIGNATURE_PROJECTION = {"_id": 1, "primary_category": 1, "categories": 1}
+
+
+def in_daemon_process() -> bool:
+    """Celery prefork worker (billiard) je daemon proces i ne smije pokretati ProcessPoolExecutor"""
+    return multiprocessing.current_process().daemon
+
+
+def score_chunk(genres_chunk: List[List[str]], place_signatures: Sequence[int]) -> List[Tuple[List, int]]:
+    """Boduje shard filmova naspram svih mesta: [(top poklapanja, broj poklapanja)] po filmu"""
+    return [
+        AggregationService.score_film_against_places(film_genres, place_signatures)
+        for film_genres in genres_chunk
+    ]
+
+
+def _init_worker(place_signatures: Sequence[int]):
+    """Initializer worker procesa: prima kompaktna mesta samo jednom"""
+    global _worker_place_signatures
+    _worker_place_signatures = place_signatures
+
+
+def _correlate_chunk(chunk_start: int, genres_chunk: List[List[str]]) -> Tuple[int, List[Tuple[List, int]]]:
+    """Boduje jedan shard filmova naspram svih mesta u worker procesu"""
+    return chunk_start, score_chunk(genres_chunk, _worker_place_signatures)
+
+
+def job_places(db, correlation_job_id: str) -> Tuple[Sequence[int], List[str]]:
+    """
+    Kompaktna mesta za chunk taskove jednog korelacionog joba. Učitavaju se jednom po
+    Celery worker procesu (kao initializer pool-a), ne šalju se kroz broker za svaki chunk.
+    """
+    global _job_places
+    if _job_places[0] != correlation_job_id:
+        places = list(db.places.find({}, PLACE_SIGNATURE_PROJECTION).sort("_id", 1))
+        _job_places = (
+            correlation_job_id,
+            AggregationService.compact_places(places),
+            [str(place["_id"]) for place in places]
+        )
+    return _job_places[1], _job_places[2]
+
+
+class ParallelCorrelationService:
+    """Korelacija filmova i mesta raspoređena na više jezgara (ProcessPoolExecutor)"""
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        self.workers = workers or settings.CORRELATION_WORKERS or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size or settings.CORRELATION_CHUNK_SIZE)
+
+    def should_parallelize(self, films_count: int) -> bool:
+        """Pool ima smisla samo za veći katalog i kada proces smije imati djecu"""
+        if not settings.CORRELATION_PARALLEL or self.workers < 2:
+            return False
+        if films_count < settings.CORRELATION_PARALLEL_MIN_FILMS:
+            return False
+        return not in_daemon_process()
+
+    def should_fan_out(self, films_count: int) -> bool:
+        """
+        U Celery workeru (daemon proces) pool nije moguć - shard-ovi se šalju kao
+        Celery chord chunk taskova (vidi etl_tasks.create_film_place_correlations).
+        """
+        return (settings.CORRELATION_PARALLEL
+                and films_count >= settings.CORRELATION_PARALLEL_MIN_FILMS
+                and in_daemon_process())
+
+    def shard(self, films: List[Dict]) -> Tuple[List[List[str]], List[Tuple[int, List[List[str]]]]]:
+        """(žanrovi po filmu, [(početni indeks, žanrovi shard-a)])"""
+        film_genres = [[g.lower() for g in film.get("genres", [])] for film in films]
+        chunks = [
+            (start, film_genres[start:start + self.chunk_size])
+            for start in range(0, len(film_genres), self.chunk_size)
+        ]
+        return film_genres, chunks
+
+    def correlate(self, films: List[Dict], places: List[Dict]) -> Tuple[List[Dict], Dict[str, Any]]:
+        """
+        Korelira filmove sa mestima i vraća (korelacije, statistiku izvršavanja).
+        Bira paralelni ili jednoprocesni put; rezultat je isti u oba slučaja.
+        """
+        started = time.perf_counter()
+
+        if self.should_parallelize(len(films)):
+            correlations = self.correlate_parallel(films, places)
+            mode = "parallel"
+        else:
+            correlations = AggregationService.correlate_films_with_locations(films, places)
+            mode = "single_process"
+
+        stats = {
+            "mode": mode,
+            "workers": self.workers if mode == "parallel" else 1,
+            "chunk_size": self.chunk_size,
+            "films": len(films),
+            "places": len(places),
+            "duration_seconds": round(time.perf_counter() - started, 3)
+        }
+        logger.info(f"🔗 Correlation ({mode}) finished in {stats['duration_seconds']}s")
+        return correlations, stats
+
+    def correlate_parallel(self, films: List[Dict], places: List[Dict]) -> List[Dict]:
+        """Shardira filmove po workerima; mesta se šalju jednom kroz initializer"""
+        if not films or not places:
+            return []
+
+        place_signatures = AggregationService.compact_places(places)
+        film_genres, chunks = self.shard(films)
+        workers = min(self.workers, len(chunks))
+
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(place_signatures,)
+        ) as executor:
+            futures = [executor.submit(_correlate_chunk, start, chunk) for start, chunk in chunks]
+            chunk_results = [future.result() for future in futures]
+
+        return self.merge(films, film_genres, places, chunk_results)
+
+    @staticmethod
+    def merge(films: List[Dict], film_genres: List[List[str]], places: List[Dict],
+              chunk_results: List[Tuple[int, List[Tuple[List, int]]]]) -> List[Dict]:
+        """Deterministički merge: redoslijed filmova, ne redoslijed završetka workera/taskova"""
+        chunk_results = sorted(chunk_results, key=lambda item: item[0])
+
+        correlations = []
+        for chunk_start, results in chunk_results:
+            for offset, (top_matches, total_matches) in enumerate(results):
+                index = chunk_start + offset
+                correlation = AggregationService.build_correlation(
+                    films[index], film_genres[index], places, top_matches, total_matches
+                )
+                if correlation:
+                    correlations.append(correlation)
+
+        return correlations
+
+    def benchmark(self, films: List[Dict], places: List[Dict]) -> Dict[str, Any]:
+        """Poredi paralelni put sa jednoprocesnim i vraća ubrzanje"""
+        started = time.perf_counter()
+        single = AggregationService.correlate_films_with_locations(films, places)
+        single_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        parallel = self.correlate_parallel(films, places)
+        parallel_seconds = time.perf_counter() - started
+
+        return {
+            "films": len(films),
+            "places": len(places),
+            "workers": self.workers,
+            "chunk_size": self.chunk_size,
+            "single_process_seconds": round(single_seconds, 3),
+            "parallel_seconds": round(parallel_seconds, 3),
+            "speedup": round(single_seconds / parallel_seconds, 2) if parallel_seconds else None,
+            "identical_results": _strip_places(single) == _strip_places(parallel)
+        }
+
+
+def _strip_places(correlations: Sequence[Dict]) -> List[Tuple]:
+    """Svodi korelacije na uporediv oblik (bez ugrađenih place dokumenata)"""
+    return [
+        (c["film_id"], c["total_matches"],
+         tuple((loc["place"].get("place_id"), loc["match_score"]) for loc in c["suggested_locations"]))
+        for c in correlations
+    ]
+
+
+# Singleton instance
+parallel_correlation_service = ParallelCorrelationService()
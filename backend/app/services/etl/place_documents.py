@@ -0,0 +1,55 @@
+"""
+Oblik place dokumenata u "vrućim" kolekcijama.
+
+- places: samo polja koja API i ETL čitaju; sirovi Geoapify `properties` idu u
+  hladnu kolekciju places_raw (_id = place_id), koju čita samo admin export.
+- film_place_correlations: `suggested_locations[].place` je referenca (place_id)
+  plus mali sažetak za prikaz i matricu žanr × kategorija - ne kopija cijelog mesta.
+- film_place_connections: place_id i naziv/grad mesta.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+RAW_COLLECTION = "places_raw"
+
+# Sažetak mesta u korelaciji (name/city/country_code - prikaz, categories - genre_matrix)
+PLACE_SUMMARY_FIELDS = ("place_id", "name", "city", "country", "country_code", "primary_category", "categories")
+
+# Polja veze film-mesto koja su ranije kopirala mesto
+CONNECTION_DROPPED_FIELDS = ("place_country", "place_categories")
+
+
+def split_raw(place: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """(mesto bez raw_data, sirovi dokument za places_raw ili None)"""
+    hot = {key: value for key, value in place.items() if key != "raw_data"}
+    raw = place.get("raw_data")
+    if not raw or place.get("place_id") is None:
+        return hot, None
+    return hot, {"_id": place["place_id"], "raw_data": raw, "fetched_at": datetime.now(timezone.utc)}
+
+
+def place_summary(place: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: place[field] for field in PLACE_SUMMARY_FIELDS if field in place}
+
+
+def place_summary_expression(path: str) -> Dict[str, str]:
+    """place_summary kao aggregation izraz (za update pipeline postojećih korelacija)"""
+    return {field: f"{path}.{field}" for field in PLACE_SUMMARY_FIELDS}
+
+
+def slim_correlations_update() -> list:
+    """Update pipeline: suggested_locations[].place -> sažetak"""
+    return [{"$set": {"suggested_locations": {"$map": {
+        "input": {"$ifNull": ["$suggested_locations", []]},
+        "as": "loc",
+        "in": {"$mergeObjects": ["$$loc", {"place": place_summary_expression("$$loc.place")}]}
+    }}}}]
+
+
+def fat_correlations_filter() -> Dict[str, Any]:
+    """Korelacije koje još nose cijelo mesto (sa _id / raw_data / location)"""
+    return {"$or": [
+        {"suggested_locations.place._id": {"$exists": True}},
+        {"suggested_locations.place.raw_data": {"$exists": True}},
+        {"suggested_locations.place.location": {"$exists": True}}
+    ]}
@@ -0,0 +1,183 @@
+"""
+Rangirane liste mesta za preporuke lokacija (kolekcija place_rankings).
+
+ETL nakon učitavanja mesta gradi po jednu listu za:
+- svaki žanr (mesta čija primarna kategorija odgovara žanru),
+- svaki prefiks kategorije ('tourism', 'tourism.sights', ...),
+- centralna mesta (distance < 2000).
+
+Unutar liste mesta su poredana po (distance, place_id). Težina liste je ista za
+sve njene elemente, pa se proizvoljna kombinacija preferenci odgovara spajanjem
+lista (threshold algoritam) sa ranim prekidom čim je top-k siguran. API čita liste u
+prozorima (`$slice`) i širi ih samo dok spajanje ne može odlučiti.
+Score-ovi su u desetinkama (cijeli brojevi) da bi poređenja sa pragom bila tačna.
+"""
+import logging
+import uuid
+from bisect import insort
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pymongo import ASCENDING, ReplaceOne
+
+from . import genre_rules
+
+logger = logging.getLogger(__name__)
+
+RANKINGS_COLLECTION = "place_rankings"
+
+KIND_GENRE = "genre"
+KIND_CATEGORY = "category"
+KIND_CENTRAL = "central"
+DEFAULT_GENRE_KEY = "_default"  # žanrovi bez pravila koriste DEFAULT_CATEGORIES
+
+# Težine u desetinkama (isto kao generate_location_recommendations: 0.4 / 0.3 / 0.1)
+GENRE_WEIGHT = 4
+CATEGORY_WEIGHT = 3
+CENTRAL_WEIGHT = 1
+MIN_SCORE = 2  # relevance_score > 0.2
+CENTRAL_DISTANCE = 2000
+
+MAX_LIST_LENGTH = 50000  # drži dokument liste ispod BSON limita
+FIRST_WINDOW = 256  # prvi $slice prozor liste; svaki sljedeći je duplo veći
+
+RankedList = List[Tuple[str, float]]  # [(place_id, distance)] sortirano po (distance, place_id)
+
+
+def _place_key(place: Dict) -> Tuple[float, str]:
+    return place.get("distance") or 0, str(place.get("place_id"))
+
+
+def build_ranked_lists(places: Sequence[Dict]) -> Dict[Tuple[str, str], RankedList]:
+    """Gradi sve rangirane liste iz mesta: (kind, key) -> [(place_id, distance)]"""
+    genre_categories = {genre: genre_rules.GENRE_CATEGORY_RULES[genre] for genre in genre_rules.GENRES}
+    genre_categories[DEFAULT_GENRE_KEY] = genre_rules.DEFAULT_CATEGORIES
+
+    lists: Dict[Tuple[str, str], list] = {}
+    for place in sorted((p for p in places if p.get("place_id") is not None), key=_place_key):
+        distance, place_id = _place_key(place)
+        entry = (place_id, distance)
+        place_sig = genre_rules.place_signature(place.get("primary_category", ""), place.get("categories", []))
+
+        for genre, categories in genre_categories.items():
+            if genre_rules.matches_any(place_sig, categories, primary_only=True):
+                lists.setdefault((KIND_GENRE, genre), []).append(entry)
+
+        prefixes = {
+            prefix.lower()
+            for category in place.get("categories", []) if category
+            for prefix in genre_rules.category_prefixes(category)
+        }
+        for prefix in prefixes:
+            lists.setdefault((KIND_CATEGORY, prefix), []).append(entry)
+
+        if distance < CENTRAL_DISTANCE:
+            lists.setdefault((KIND_CENTRAL, ""), []).append(entry)
+
+    return {key: entries[:MAX_LIST_LENGTH] for key, entries in lists.items()}
+
+
+def ensure_indexes(db):
+    """Jedinstven indeks liste po (kind, key)"""
+    db[RANKINGS_COLLECTION].create_index([("kind", ASCENDING), ("key", ASCENDING)], unique=True)
+
+
+def rebuild_rankings(db) -> int:
+    """Ponovo gradi sve liste iz kolekcije places; zastarjele liste se brišu"""
+    places = db.places.find({}, {"_id": 0, "place_id": 1, "primary_category": 1, "categories": 1, "distance": 1})
+    lists = build_ranked_lists(list(places))
+
+    ensure_indexes(db)
+    build_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+    operations = [
+        ReplaceOne(
+            {"kind": kind, "key": key},
+            {
+                "kind": kind,
+                "key": key,
+                "places": [[place_id, distance] for place_id, distance in entries],
+                "size": len(entries),
+                "build_id": build_id,
+                "updated_at": now
+            },
+            upsert=True
+        )
+        for (kind, key), entries in lists.items()
+    ]
+    if operations:
+        db[RANKINGS_COLLECTION].bulk_write(operations, ordered=False)
+    db[RANKINGS_COLLECTION].delete_many({"build_id": {"$ne": build_id}})
+
+    logger.info(f"🏆 Place rankings rebuilt: {len(operations)} ranked lists")
+    return len(operations)
+
+
+def list_keys(preferred_genres: Sequence[str], preferred_categories: Sequence[str]) -> List[Tuple[str, str, int]]:
+    """Liste potrebne za preference: [(kind, key, težina)]; ponovljene preference se sabiraju"""
+    weights: Dict[Tuple[str, str], int] = {}
+    for genre in preferred_genres:
+        name = genre_rules.normalize_genre(genre)
+        key = name if name in genre_rules.GENRE_BITS else DEFAULT_GENRE_KEY
+        weights[(KIND_GENRE, key)] = weights.get((KIND_GENRE, key), 0) + GENRE_WEIGHT
+    for category in preferred_categories:
+        key = (category or "").strip().lower()
+        if key:
+            weights[(KIND_CATEGORY, key)] = weights.get((KIND_CATEGORY, key), 0) + CATEGORY_WEIGHT
+    weights[(KIND_CENTRAL, "")] = CENTRAL_WEIGHT
+    return [(kind, key, weight) for (kind, key), weight in weights.items()]
+
+
+def threshold_merge(lists: Sequence[Tuple[int, RankedList]], k: int, min_score: int = MIN_SCORE,
+                    complete: Optional[Sequence[bool]] = None) -> Optional[List[Tuple[str, int, float]]]:
+    """
+    Threshold algoritam nad listama jednake težine po elementu.
+    Vraća top k (place_id, score, distance) po (score desc, distance, place_id).
+
+    Sve liste dijele poredak (distance, place_id), pa se spajaju redom tog ključa i score
+    mesta je tačan čim se pročita (bez random access-a u cijele liste). Prekida čim nijedno
+    neviđeno mesto ne može ući u top k. `complete[i]` = False znači da je lista i samo
+    prozor (prefiks); ako prozor nije dovoljan za odluku, vraća None (treba širi prozor).
+    """
+    if complete is None:
+        complete = [True] * len(lists)
+    lists = [(weight, entries, done) for (weight, entries), done in zip(lists, complete)
+             if weight > 0 and (entries or not done)]
+    if k <= 0 or not lists:
+        return []
+
+    positions = [0] * len(lists)
+    best: List[Tuple[int, float, str]] = []  # (-score, distance, place_id), najviše k, sortirano
+
+    while True:
+        # Prag: najveći score koji neviđeno mesto još može imati
+        remaining = [i for i, (_, entries, done) in enumerate(lists) if positions[i] < len(entries) or not done]
+        threshold = sum(lists[i][0] for i in remaining)
+        if threshold <= min_score:
+            break
+        # Neviđena mesta su iza svih pročitanih u poretku, pa izjednačenje dobija k-ti
+        if len(best) == k and -best[-1][0] >= threshold:
+            break
+        if any(positions[i] == len(lists[i][1]) for i in remaining):
+            return None  # prozor nekompletne liste je potrošen
+
+        heads = {i: lists[i][1][positions[i]] for i in remaining}
+        distance, place_id = min((distance, place_id) for place_id, distance in heads.values())
+        score = 0
+        for i, (head_id, head_distance) in heads.items():
+            if head_id == place_id and head_distance == distance:
+                score += lists[i][0]
+                positions[i] += 1
+        if score > min_score:
+            insort(best, (-score, distance, place_id))
+            del best[k:]
+
+    return [(place_id, -score, distance) for score, distance, place_id in best]
+
+
+def recommendation_reasons(mapped_genres: int, distance: Optional[float]) -> List[str]:
+    """Razlozi u istom obliku kao generate_location_recommendations"""
+    return [
+        f"Matches {mapped_genres} preferred genres",
+        "Central location" if (distance or 0) < CENTRAL_DISTANCE else ""
+    ]
@@ -0,0 +1,127 @@
+"""
+Brojači platforme u jednom dokumentu (platform_counters, _id = "platform").
+
+ETL loaderi skupljaju delte (Counter: kolekcija -> +/- broj upisanih/obrisanih
+dokumenata) i primjenjuju ih jednim `$inc` upisom na kraju posla. Uz brojeve isti
+dokument drži i ETL statistiku po tipu joba (`jobs.<tip>`: runs, completed, last_run)
+i posljednji učitani film (`latest_film`). Stats endpointi čitaju samo taj dokument. Odstupanja (TTL brisanja etl_jobs, upisi mimo loadera,
+paralelan reconcile) ispravlja periodični `reconcile` stvarnim brojanjem.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_COLLECTION = "platform_counters"
+COUNTERS_ID = "platform"
+
+COUNTED_COLLECTIONS = (
+    "films", "places", "cities", "film_locations", "etl_jobs",
+    "film_place_correlations", "film_place_connections"
+)
+
+# Ista statistika kao stari $group nad etl_jobs (runs uključuje i job-ove koji još rade)
+JOB_STATS_PIPELINE = [
+    {"$group": {
+        "_id": "$job_type",
+        "runs": {"$sum": 1},
+        "completed": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
+        "last_run": {"$max": "$started_at"}
+    }}
+]
+LATEST_FILM_PROJECTION = {"_id": 0, "title": 1, "release_date": 1, "fetched_at": 1}
+
+
+def counter_update(deltas: Mapping[str, int]) -> Optional[Tuple[Dict, Dict]]:
+    """(filter, update) za update_one(..., upsert=True); None ako nema promjena"""
+    increments = {f"counts.{name}": delta for name, delta in deltas.items() if delta}
+    if not increments:
+        return None
+    return {"_id": COUNTERS_ID}, {"$inc": increments, "$set": {"updated_at": datetime.now(timezone.utc)}}
+
+
+def apply_deltas(db, deltas: Mapping[str, int]):
+    """Sync (Celery) primjena delti; greška brojača ne ruši ETL - reconcile je ispravlja"""
+    update = counter_update(deltas)
+    if update is None:
+        return
+    try:
+        db[COUNTERS_COLLECTION].update_one(*update, upsert=True)
+    except Exception as e:
+        logger.warning(f"Could not update platform counters {dict(deltas)}: {e}")
+
+
+async def apply_deltas_async(db, deltas: Mapping[str, int]):
+    """Isto za Motor (loaderi koji rade u API procesu)"""
+    update = counter_update(deltas)
+    if update is None:
+        return
+    try:
+        await db[COUNTERS_COLLECTION].update_one(*update, upsert=True)
+    except Exception as e:
+        logger.warning(f"Could not update platform counters {dict(deltas)}: {e}")
+
+
+def job_update(job_type: str, started_at: Optional[datetime] = None, completed: bool = False,
+               latest_film: Optional[Dict[str, Any]] = None) -> Tuple[Dict, Dict]:
+    """(filter, update) za statistiku joba: started_at kod kreiranja, completed=True na kraju"""
+    prefix = f"jobs.{job_type}"
+    update: Dict[str, Any] = {"$set": {"updated_at": datetime.now(timezone.utc)}}
+    increments = {}
+    if started_at is not None:
+        increments[f"{prefix}.runs"] = 1
+        update["$max"] = {f"{prefix}.last_run": started_at}
+    if completed:
+        increments[f"{prefix}.completed"] = 1
+    if increments:
+        update["$inc"] = increments
+    if latest_film:
+        update["$set"]["latest_film"] = latest_film
+    return {"_id": COUNTERS_ID}, update
+
+
+def record_job(db, job_type: str, started_at: Optional[datetime] = None, completed: bool = False,
+               latest_film: Optional[Dict[str, Any]] = None):
+    """Sync (Celery) upis statistike joba; greška ne ruši ETL - reconcile je ispravlja"""
+    try:
+        db[COUNTERS_COLLECTION].update_one(*job_update(job_type, started_at, completed, latest_film), upsert=True)
+    except Exception as e:
+        logger.warning(f"Could not update platform job stats for {job_type}: {e}")
+
+
+def reconcile_jobs(db):
+    """Postavlja statistiku job-ova i posljednji film na stvarno stanje etl_jobs / films"""
+    jobs = {
+        row["_id"]: {"runs": row["runs"], "completed": row["completed"], "last_run": row["last_run"]}
+        for row in db["etl_jobs"].aggregate(JOB_STATS_PIPELINE) if row["_id"]
+    }
+    latest_film = db["films"].find_one({}, LATEST_FILM_PROJECTION, sort=[("fetched_at", -1)])
+
+    db[COUNTERS_COLLECTION].update_one(
+        {"_id": COUNTERS_ID},
+        {"$set": {"jobs": jobs, "latest_film": latest_film, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+
+def reconcile(db) -> Dict[str, int]:
+    """Postavlja brojače na stvarne brojeve dokumenata; vraća ispravke (stvarno - zapisano)"""
+    stored = (db[COUNTERS_COLLECTION].find_one({"_id": COUNTERS_ID}) or {}).get("counts", {})
+    actual = {name: db[name].count_documents({}) for name in COUNTED_COLLECTIONS}
+
+    db[COUNTERS_COLLECTION].update_one(
+        {"_id": COUNTERS_ID},
+        {"$set": {
+            **{f"counts.{name}": count for name, count in actual.items()},
+            "reconciled_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
+        }},
+        upsert=True
+    )
+    reconcile_jobs(db)
+
+    drift = {name: count - stored.get(name, 0) for name, count in actual.items() if count != stored.get(name, 0)}
+    if drift:
+        logger.info(f"🧮 Platform counters reconciled, drift: {drift}")
+    return drift
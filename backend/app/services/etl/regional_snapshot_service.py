@@ -0,0 +1,337 @@
+"""
+Snapshot mape regionalne popularnosti filmova.
+
+Celery task gradi snapshot po regionu (TMDB pozivi, rate limiting) i snima ga u
+regional_films. API servira kopiju iz memorije; kada kopija zastari, vraća je
+odmah i u pozadini je osvježava iz MongoDB-a (stale-while-revalidate).
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from pymongo import UpdateOne
+
+from .tmdb_service import tmdb_service
+from ...config import settings
+from ...utils.topk import top_k
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KIND = "map_snapshot"
+
+# code -> (naziv, latitude, longitude, glavni grad)
+REGION_CATALOG: Mapping[str, Tuple[str, float, float, str]] = MappingProxyType({
+    "US": ("United States", 38.89511, -77.03637, "Washington, D.C."),
+    "GB": ("United Kingdom", 51.5074, -0.1278, "London"),
+    "FR": ("France", 48.8566, 2.3522, "Paris"),
+    "DE": ("Germany", 52.5200, 13.4050, "Berlin"),
+    "JP": ("Japan", 35.6762, 139.6503, "Tokyo"),
+    "CA": ("Canada", 45.4215, -75.6972, "Ottawa"),
+    "AU": ("Australia", -35.2809, 149.1300, "Canberra"),
+    "IT": ("Italy", 41.9028, 12.4964, "Rome"),
+    "ES": ("Spain", 40.4168, -3.7038, "Madrid"),
+    "BR": ("Brazil", -15.7801, -47.9292, "Brasília"),
+    "IN": ("India", 28.6139, 77.2090, "New Delhi"),
+    "CN": ("China", 39.9042, 116.4074, "Beijing"),
+    "RU": ("Russia", 55.7558, 37.6173, "Moscow"),
+    "KR": ("South Korea", 37.5665, 126.9780, "Seoul"),
+    "MX": ("Mexico", 19.4326, -99.1332, "Mexico City"),
+    "NL": ("Netherlands", 52.3676, 4.9041, "Amsterdam"),
+    "BE": ("Belgium", 50.8503, 4.3517, "Brussels"),
+    "SE": ("Sweden", 59.3293, 18.0686, "Stockholm"),
+    "NO": ("Norway", 59.9139, 10.7522, "Oslo"),
+    "DK": ("Denmark", 55.6761, 12.5683, "Copenhagen"),
+    "FI": ("Finland", 60.1699, 24.9384, "Helsinki"),
+    "PL": ("Poland", 52.2297, 21.0122, "Warsaw"),
+    "AT": ("Austria", 48.2082, 16.3738, "Vienna"),
+    "CH": ("Switzerland", 46.9480, 7.4474, "Bern"),
+    "IE": ("Ireland", 53.3498, -6.2603, "Dublin"),
+    "PT": ("Portugal", 38.7223, -9.1393, "Lisbon"),
+    "GR": ("Greece", 37.9838, 23.7275, "Athens"),
+    "CZ": ("Czechia", 50.0755, 14.4378, "Prague"),
+    "HU": ("Hungary", 47.4979, 19.0402, "Budapest"),
+    "BA": ("Bosnia and Herzegovina", 43.8563, 18.4131, "Sarajevo"),
+    "RS": ("Serbia", 44.7866, 20.4489, "Belgrade"),
+    "HR": ("Croatia", 45.8150, 15.9819, "Zagreb"),
+    "UA": ("Ukraine", 50.4501, 30.5234, "Kyiv"),
+    "TR": ("Turkey", 39.9334, 32.8597, "Ankara"),
+    "EG": ("Egypt", 30.0444, 31.2357, "Cairo"),
+    "NG": ("Nigeria", 9.0765, 7.3986, "Abuja"),
+    "ZA": ("South Africa", -25.7479, 28.2293, "Pretoria"),
+    "IR": ("Iran", 35.6892, 51.3890, "Tehran"),
+    "TH": ("Thailand", 13.7563, 100.5018, "Bangkok"),
+    "ID": ("Indonesia", -6.2088, 106.8456, "Jakarta"),
+    "PH": ("Philippines", 14.5995, 120.9842, "Manila"),
+    "NZ": ("New Zealand", -41.2865, 174.7762, "Wellington"),
+    "AR": ("Argentina", -34.6037, -58.3816, "Buenos Aires"),
+    "CL": ("Chile", -33.4489, -70.6693, "Santiago"),
+    "CO": ("Colombia", 4.7110, -74.0721, "Bogotá"),
+})
+
+TMDB_GENRE_NAMES: Mapping[int, str] = MappingProxyType({
+    28: "Action", 12: "Adventure", 16: "Animation", 35: "Comedy",
+    80: "Crime", 18: "Drama", 10751: "Family", 14: "Fantasy",
+    36: "History", 27: "Horror", 10402: "Music", 9648: "Mystery",
+    10749: "Romance", 878: "Sci-Fi", 53: "Thriller", 10752: "War"
+})
+
+
+def region_coordinates(country_code: str) -> Tuple[float, float, str]:
+    """(latitude, longitude, glavni grad) za zemlju; (0, 0, 'Capital') ako nije u katalogu"""
+    entry = REGION_CATALOG.get(country_code)
+    return (entry[1], entry[2], entry[3]) if entry else (0, 0, "Capital")
+
+
+def normalize_regions(regions: Optional[Sequence[str]]) -> List[str]:
+    """ISO kodovi regiona (velika slova, bez duplikata); prazna lista = podrazumevani regioni"""
+    codes = [code.strip().upper() for code in regions or () if code and code.strip()]
+    if not codes:
+        codes = list(settings.REGIONAL_MAP_REGIONS) or list(REGION_CATALOG)
+    if "ALL" in codes:
+        codes = list(REGION_CATALOG)
+    return list(dict.fromkeys(codes))
+
+
+def analyze_genres(movies: List[Dict]) -> List[Dict]:
+    """Analizira žanrove iz liste filmova (top 3 sa procentima)"""
+    if not movies:
+        return [{"name": "Various", "percentage": 100}]
+
+    genre_counter = {}
+    for movie in movies:
+        for genre_id in movie.get("genre_ids", []):
+            genre_counter[genre_id] = genre_counter.get(genre_id, 0) + 1
+
+    # Ako nema genre_ids, probaj genres
+    if not genre_counter:
+        for movie in movies:
+            genres = movie.get("genres", [])
+            if isinstance(genres, list):
+                for genre in genres:
+                    if isinstance(genre, dict) and genre.get("id"):
+                        genre_counter[genre["id"]] = genre_counter.get(genre["id"], 0) + 1
+
+    # Top 3 žanra i konverzija u procente
+    total = sum(genre_counter.values())
+    top_genres = [
+        {
+            "name": TMDB_GENRE_NAMES.get(genre_id, f"Genre {genre_id}"),
+            "count": count,
+            "percentage": round((count / total) * 100, 1) if total > 0 else 0
+        }
+        for genre_id, count in top_k(genre_counter.items(), 3, key=lambda x: x[1])
+    ]
+
+    return top_genres if top_genres else [{"name": "Various", "percentage": 100}]
+
+
+class RegionalSnapshotService:
+    """Gradi, snima i servira snapshot mape regionalne popularnosti"""
+
+    def __init__(self):
+        self._regions: Dict[str, Dict[str, Any]] = {}  # code -> podaci regiona
+        self._snapshot_at: Dict[str, datetime] = {}  # code -> kada je region izgrađen
+        self._loaded_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._live_lock = asyncio.Lock()
+
+    # --- Izgradnja ---
+
+    @staticmethod
+    async def build_region(country_code: str) -> Dict[str, Any]:
+        """Podaci za jedan region: top filmovi, žanrovi i koordinate"""
+        country_name = REGION_CATALOG.get(country_code, (country_code,))[0]
+
+        movies = await tmdb_service.fetch_popular_movies_by_region(region=country_code, limit=10)
+
+        # Ako nema filmova za tu zemlju, probaj globalne
+        if not movies or len(movies) < 3:
+            logger.warning(f"No region-specific movies for {country_code}, using global")
+            movies = await tmdb_service.fetch_trending_movies(limit=10)
+
+        top_movies = [
+            {
+                "film_id": movie.get("id"),
+                "title": movie.get("title", "Unknown"),
+                "release_date": movie.get("release_date", ""),
+                "vote_average": round(movie.get("vote_average", 0), 1),
+                "poster_path": movie.get("poster_path"),
+                "poster_url": f"https://image.tmdb.org/t/p/w500{movie['poster_path']}" if movie.get(
+                    "poster_path") else "",
+                "overview": movie.get("overview", "")[:100] + "..." if movie.get("overview") else "",
+                "region": movie.get("region", "global")
+            }
+            for movie in movies[:3]
+        ]
+
+        latitude, longitude, capital_city = region_coordinates(country_code)
+
+        return {
+            "country_code": country_code,
+            "country_name": country_name,
+            "capital_city": capital_city,
+            "latitude": latitude,
+            "longitude": longitude,
+            "total_movies_analyzed": len(movies),
+            "top_movies": top_movies,
+            "top_genres": analyze_genres(movies[:10]),
+            "source": "tmdb_regional" if movies and movies[0].get("region") == country_code else "tmdb_global",
+            "last_updated": datetime.utcnow().isoformat()
+        }
+
+    async def fetch_regions(self, regions: Sequence[str], concurrency: Optional[int] = None,
+                            deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Dohvata regione konkurentno; semafor ograničava broj istovremenih TMDB zahtjeva.
+        Sa deadline-om vraća ono što je završeno na vrijeme, ostalo se otkazuje.
+        """
+        if not regions:
+            return []
+
+        semaphore = asyncio.Semaphore(max(1, concurrency or settings.REGIONAL_FETCH_CONCURRENCY))
+
+        async def fetch(country_code: str):
+            async with semaphore:
+                return await self.build_region(country_code)
+
+        tasks = {asyncio.create_task(fetch(code)): code for code in regions}
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"⏱️ Regional fetch deadline hit, skipped: {sorted(tasks[t] for t in pending)}")
+
+        by_code = {}
+        for task in done:
+            if task.exception():
+                logger.error(f"Error building regional snapshot for {tasks[task]}: {task.exception()}")
+            else:
+                by_code[tasks[task]] = task.result()
+
+        return [by_code[code] for code in regions if code in by_code]
+
+    async def build_snapshot(self, regions: Sequence[str]) -> List[Dict[str, Any]]:
+        """Gradi podatke za sve regione (Celery; bez deadline-a)"""
+        return await self.fetch_regions(regions)
+
+    @staticmethod
+    def snapshot_operations(regional_data: Sequence[Dict[str, Any]]) -> List[UpdateOne]:
+        """Upsert operacije: jedan snapshot dokument po regionu u regional_films"""
+        now = datetime.now(timezone.utc)
+        return [
+            UpdateOne(
+                {"region": region["country_code"], "kind": SNAPSHOT_KIND},
+                {"$set": {
+                    "region": region["country_code"],
+                    "kind": SNAPSHOT_KIND,
+                    "snapshot": region,
+                    "snapshot_at": now
+                }},
+                upsert=True
+            )
+            for region in regional_data
+        ]
+
+    # --- Serviranje (API) ---
+
+    async def load(self, db, regions: Sequence[str]) -> int:
+        """Učitava snapshot dokumente regiona iz MongoDB-a u memoriju; vraća broj učitanih"""
+        docs = await db.regional_films.find(
+            {"kind": SNAPSHOT_KIND, "region": {"$in": list(regions)}},
+            {"_id": 0, "region": 1, "snapshot": 1, "snapshot_at": 1}
+        ).to_list(length=None)
+
+        for doc in docs:
+            snapshot_at = doc["snapshot_at"]
+            self._regions[doc["region"]] = doc["snapshot"]
+            self._snapshot_at[doc["region"]] = snapshot_at if snapshot_at.tzinfo else snapshot_at.replace(
+                tzinfo=timezone.utc)
+        self._loaded_at = time.monotonic()
+        return len(docs)
+
+    async def fetch_live(self, db, regions: Sequence[str]) -> List[str]:
+        """Live dohvat (konkurentno, sa deadline-om), snima rezultat; vraća dohvaćene kodove"""
+        regional_data = await self.fetch_regions(regions, deadline=settings.REGIONAL_FETCH_DEADLINE_SECONDS)
+        if regional_data:
+            await db.regional_films.bulk_write(self.snapshot_operations(regional_data), ordered=False)
+            now = datetime.now(timezone.utc)
+            for region in regional_data:
+                self._regions[region["country_code"]] = region
+                self._snapshot_at[region["country_code"]] = now
+        return [region["country_code"] for region in regional_data]
+
+    async def get_snapshot(self, db, regions: Optional[Sequence[str]] = None,
+                           refresh: bool = False) -> Dict[str, Any]:
+        """
+        Snapshot traženih regiona iz memorije. Zastarjela kopija se vraća odmah i
+        osvježava u pozadini; regioni kojih nema (ili refresh) se dohvataju live.
+        """
+        regions = normalize_regions(regions)
+
+        missing = regions if refresh else [code for code in regions if code not in self._regions]
+        if missing:
+            async with self._live_lock:
+                if not refresh:
+                    await self.load(db, missing)
+                    missing = [code for code in missing if code not in self._regions]
+                if missing:
+                    fetched = await self.fetch_live(db, missing)
+                    failed = [code for code in missing if code not in fetched]
+                    if failed:
+                        self._request_rebuild(failed)
+
+        elif time.monotonic() - self._loaded_at > settings.REGIONAL_SNAPSHOT_TTL_SECONDS:
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._revalidate(db, regions))
+
+        available = [code for code in regions if code in self._regions]
+        unavailable = [code for code in regions if code not in self._regions]
+        if not available:
+            return {
+                "timestamp": datetime.utcnow().isoformat(),
+                "total_regions": 0,
+                "regions": [],
+                "missing_regions": unavailable,
+                "status": "warming_up"
+            }
+
+        return {
+            "timestamp": min(self._snapshot_at[code] for code in available).isoformat(),
+            "total_regions": len(available),
+            "regions": [self._regions[code] for code in available],
+            "missing_regions": unavailable,
+            "status": "partial" if unavailable else "success",
+            "source": "snapshot"
+        }
+
+    async def _revalidate(self, db, regions: Sequence[str]):
+        """Pozadinsko osvježavanje kopije; prestar snapshot pokreće Celery rebuild"""
+        try:
+            await self.load(db, regions)
+            now = datetime.now(timezone.utc)
+            stale = [
+                code for code in regions
+                if code in self._snapshot_at
+                and (now - self._snapshot_at[code]).total_seconds() > settings.REGIONAL_SNAPSHOT_MAX_AGE_SECONDS
+            ]
+            if stale:
+                self._request_rebuild(stale)
+        except Exception as e:
+            logger.error(f"Error revalidating regional snapshot: {e}")
+
+    @staticmethod
+    def _request_rebuild(regions: Optional[Sequence[str]] = None):
+        """Zakazuje Celery rebuild snapshota (bez čekanja)"""
+        try:
+            from ...tasks.etl_tasks import refresh_regional_snapshot
+            refresh_regional_snapshot.delay(list(regions) if regions else None)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not schedule regional snapshot rebuild: {e}")
+
+
+# Singleton instance
+regional_snapshot_service = RegionalSnapshotService()
@@ -7,6 +7,8 @@ from celery.backends import mongodb
 from sqlalchemy.util.concurrency import asyncio
 
 from ...config import settings
+from ...utils.text import normalize_title
+from . import platform_counters
 
 logger = logging.getLogger(__name__)
 
@@ -140,6 +142,7 @@ class TMDBService:
                     await films_collection.insert_one(film)
                     saved_count += 1
 
+            await platform_counters.apply_deltas_async(mongodb.db, {"films": saved_count})
             logger.info(f"✅ Saved {saved_count} new films, updated {updated_count} existing films")
             return {"saved": saved_count, "updated": updated_count, "total": len(films_data)}
 
@@ -295,6 +298,7 @@ class TMDBService:
             return {
                 "film_id": movie_data.get("id"),
                 "title": movie_data.get("title"),
+                "title_normalized": normalize_title(movie_data.get("title")),
                 "original_title": movie_data.get("original_title"),
                 "release_date": movie_data.get("release_date"),
                 "overview": movie_data.get("overview", "")[:500],
@@ -331,6 +335,7 @@ class TMDBService:
             return {
                 "film_id": movie_data.get("id"),
                 "title": movie_data.get("title", "Unknown"),
+                "title_normalized": normalize_title(movie_data.get("title", "Unknown")),
                 "release_date": movie_data.get("release_date"),
                 "overview": movie_data.get("overview", "")[:500],
                 "created_at": datetime.utcnow(),
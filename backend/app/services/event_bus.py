@@ -0,0 +1,48 @@
+"""
+Događaji platforme unutar API procesa (pub/sub) za live endpointe (SSE).
+
+Svaki pretplatnik ima svoj ograničeni red (EVENTS_QUEUE_SIZE). `publish` nikad ne
+čeka: spori pretplatnik gubi najstarije događaje, a ne usporava change stream consumer.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Set
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EventBus:
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.stats = {"published": 0, "dropped": 0}
+
+    def publish(self, event_type: str, **data: Any) -> Dict[str, Any]:
+        event = {"type": event_type, "at": datetime.now(timezone.utc).isoformat(), **data}
+        self.stats["published"] += 1
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.stats["dropped"] += 1
+            queue.put_nowait(event)
+        return event
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"subscribers": len(self._subscribers), **self.stats}
+
+
+# Singleton instance
+event_bus = EventBus(queue_size=settings.EVENTS_QUEUE_SIZE)
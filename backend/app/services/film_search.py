@@ -0,0 +1,100 @@
+"""
+Pretraga filmova: $text sa težinama i prefix autocomplete.
+
+- Text indeks `films_text` nad title / original_title / overview (težine 10 / 5 / 1).
+  Rezultati su poredani po (textScore, popularity, film_id); stranice idu keyset
+  kursorom preko istih polja.
+- Autocomplete koristi `title_normalized` (utils.text) i indeks nad njim: usidren
+  prefix regex je uski opseg indeksa, a kandidati se rangiraju po popularnosti.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from pymongo import IndexModel, UpdateOne
+
+from ..utils.text import normalize_title, prefix_pattern
+from ..utils.topk import top_k
+
+logger = logging.getLogger(__name__)
+
+TEXT_INDEX_NAME = "films_text"
+TEXT_INDEX_WEIGHTS = {"title": 10, "original_title": 5, "overview": 1}
+SEARCH_SORT = (("score", -1), ("popularity", -1), ("film_id", 1))
+
+AUTOCOMPLETE_CANDIDATES = 200  # prefix kandidata (redom indeksa) koji se rangiraju po popularnosti
+BACKFILL_BATCH_SIZE = 1000
+
+# Text indeks (jedan po kolekciji) i indeks za prefix autocomplete - kreira ih app.migrations
+SEARCH_INDEXES = [
+    IndexModel(
+        [(field, "text") for field in TEXT_INDEX_WEIGHTS],
+        weights=TEXT_INDEX_WEIGHTS,
+        default_language="english",
+        name=TEXT_INDEX_NAME
+    ),
+    IndexModel("title_normalized")
+]
+
+SEARCH_PROJECTION = {
+    "_id": 0, "film_id": 1, "title": 1, "original_title": 1, "release_date": 1, "overview": 1,
+    "popularity": 1, "vote_average": 1, "genres": 1, "poster_path": 1
+}
+
+
+class FilmSearchService:
+
+    @staticmethod
+    async def backfill_normalized_titles(db) -> int:
+        """Postavlja title_normalized filmovima koji ga nemaju (filmovi prije ovog polja)"""
+        updated = 0
+        cursor = db.films.find(
+            {"title_normalized": {"$exists": False}}, {"_id": 1, "title": 1}
+        ).batch_size(BACKFILL_BATCH_SIZE)
+
+        batch = []
+        async for film in cursor:
+            batch.append(UpdateOne({"_id": film["_id"]}, {"$set": {"title_normalized": normalize_title(film.get("title"))}}))
+            if len(batch) >= BACKFILL_BATCH_SIZE:
+                updated += (await db.films.bulk_write(batch, ordered=False)).modified_count
+                batch = []
+        if batch:
+            updated += (await db.films.bulk_write(batch, ordered=False)).modified_count
+
+        if updated:
+            logger.info(f"✓ Backfilled title_normalized on {updated} films")
+        return updated
+
+    @staticmethod
+    def search_pipeline(query: str, limit: int, after: Optional[Dict] = None) -> List[Dict]:
+        """
+        Relevantnost ($text score), pa popularnost. `after` je keyset uslov nad SEARCH_SORT
+        (sljedeća stranica); čita se limit + 1 da bi se znalo postoji li još rezultata.
+        """
+        pipeline: List[Dict] = [
+            {"$match": {"$text": {"$search": query}}},
+            {"$addFields": {"score": {"$meta": "textScore"}}}
+        ]
+        if after:
+            pipeline.append({"$match": after})
+        return pipeline + [
+            {"$sort": dict(SEARCH_SORT)},
+            {"$limit": limit + 1},
+            {"$project": {**SEARCH_PROJECTION, "score": 1}}
+        ]
+
+    @staticmethod
+    async def autocomplete(db, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Naslovi koji počinju prefiksom (bez obzira na velika slova i dijakritike), najpopularniji prvi"""
+        pattern = prefix_pattern(prefix)
+        if pattern is None:
+            return []
+
+        candidates = await db.films.find(
+            {"title_normalized": {"$regex": pattern}},
+            {"_id": 0, "film_id": 1, "title": 1, "release_date": 1, "popularity": 1, "poster_path": 1}
+        ).sort("title_normalized", 1).limit(AUTOCOMPLETE_CANDIDATES).to_list(length=AUTOCOMPLETE_CANDIDATES)
+
+        return top_k(candidates, limit, key=lambda film: film.get("popularity") or 0)
+
+
+film_search_service = FilmSearchService()
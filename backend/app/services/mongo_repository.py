@@ -0,0 +1,187 @@
+"""
+Async pristup MongoDB-u za API rutere.
+
+Svi ruteri koriste dijeljeni Motor klijent iz `mongo_manager` (jedan pool konekcija);
+nijedan handler ne otvara svoj sync MongoClient niti blokira event loop.
+
+Ukupni brojevi i veličine kolekcija se čitaju iz metapodataka (estimatedDocumentCount,
+$collStats) - O(1), bez skeniranja - i kratko keširaju (COLLECTION_STATS_CACHE_SECONDS).
+Stats endpointi brojeve čitaju iz platform_counters (jedan dokument koji održava ETL).
+
+Analitička čitanja idu na sekundare (`analytics_database`), osim unutar `versioned_reads()`:
+rezultat koji se pamti pod verzijom podataka (response keš, ETag, analytics_cache) se čita
+sa primary-ja - verzija dolazi iz etl_jobs na primary-ju, a sekundar može kasniti za njom.
+"""
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..config import settings
+from ..db import MongoDBManager, mongo_manager
+from .etl import platform_counters
+from ..utils.mongo_concerns import analytics_read_preference
+
+logger = logging.getLogger(__name__)
+
+Sort = Sequence[Tuple[str, int]]
+
+MB = 1024 * 1024
+
+_versioned_reads: ContextVar[bool] = ContextVar("versioned_reads", default=False)
+
+
+@contextmanager
+def versioned_reads():
+    """Čitanja u ovom kontekstu (i taskovima pokrenutim iz njega) idu na primary"""
+    token = _versioned_reads.set(True)
+    try:
+        yield
+    finally:
+        _versioned_reads.reset(token)
+
+
+class MongoUnavailableError(RuntimeError):
+    """MongoDB nije dostupan (konekcija nije uspostavljena)"""
+
+
+class MongoRepository:
+    def __init__(self, manager: MongoDBManager):
+        self.manager = manager
+        self._stats_cache: Dict[Any, Tuple[float, Any]] = {}
+        self._analytics_db = None
+
+    async def database(self):
+        """Motor baza (settings.MONGO_DB); konektuje se po potrebi"""
+        if not self.manager.initialized:
+            await self.manager.connect()
+        if self.manager.db is None:
+            raise MongoUnavailableError("MongoDB not connected")
+        return self.manager.db
+
+    async def analytics_database(self):
+        """
+        Ista baza sa analitičkim read preference-om (secondaryPreferred) - samo za čitanja.
+        Unutar `versioned_reads()` vraća primary bazu.
+        """
+        db = await self.database()
+        if _versioned_reads.get():
+            return db
+        if self._analytics_db is None or self._analytics_db[0] is not db:
+            self._analytics_db = (db, db.with_options(read_preference=analytics_read_preference()))
+        return self._analytics_db[1]
+
+    async def find_many(self, collection: str, query: Optional[Dict] = None, projection: Optional[Dict] = None,
+                        sort: Optional[Sort] = None, limit: int = 0) -> List[Dict[str, Any]]:
+        db = await self.database()
+        cursor = db[collection].find(query or {}, projection)
+        if sort:
+            cursor = cursor.sort(list(sort))
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(length=limit or None)
+
+    async def find_one(self, collection: str, query: Optional[Dict] = None, projection: Optional[Dict] = None,
+                       sort: Optional[Sort] = None) -> Optional[Dict[str, Any]]:
+        db = await self.database()
+        return await db[collection].find_one(query or {}, projection, sort=list(sort) if sort else None)
+
+    async def aggregate(self, collection: str, pipeline: List[Dict], length: Optional[int] = None) -> List[Dict]:
+        db = await self.database()
+        return await db[collection].aggregate(pipeline).to_list(length=length)
+
+    async def count(self, collection: str, query: Optional[Dict] = None) -> int:
+        db = await self.database()
+        return await db[collection].count_documents(query or {})
+
+    async def collection_names(self) -> List[str]:
+        db = await self.database()
+        return await db.list_collection_names()
+
+    async def estimated_count(self, collection: str) -> int:
+        """Broj dokumenata iz metapodataka kolekcije (bez skeniranja, ignoriše filter)"""
+        db = await self.database()
+        return await db[collection].estimated_document_count()
+
+    async def collection_stats(self, collection: str) -> Dict[str, Any]:
+        """$collStats: broj dokumenata, veličina podataka, zauzeće na disku i veličina indeksa"""
+        db = await self.database()
+        result = await db[collection].aggregate([{"$collStats": {"storageStats": {}}}]).to_list(length=1)
+        storage = result[0].get("storageStats", {}) if result else {}
+        return {
+            "count": storage.get("count", 0),
+            "size_mb": round(storage.get("size", 0) / MB, 2),
+            "storage_size_mb": round(storage.get("storageSize", 0) / MB, 2),
+            "index_size_mb": round(storage.get("totalIndexSize", 0) / MB, 2),
+            "indexes": storage.get("nindexes", 0)
+        }
+
+    async def count_collections(self, collections: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Broj dokumenata po kolekciji (procjena iz metapodataka): jedan listCollections poziv,
+        brojanja paralelno. Kolekcije koje ne postoje imaju 0; bez argumenta - sve kolekcije u bazi.
+        """
+        return await self._per_collection("count", collections, self.estimated_count, 0)
+
+    async def platform_counts(self, collections: Sequence[str]) -> Dict[str, int]:
+        """
+        Brojevi iz platform_counters (jedno čitanje jednog dokumenta). Kolekcije kojih tamo
+        još nema (prije prvog ETL-a / reconcile-a) se broje iz metapodataka.
+        """
+        return (await self.platform_summary(collections))["counts"]
+
+    async def platform_summary(self, collections: Sequence[str]) -> Dict[str, Any]:
+        """
+        Cijeli platform_counters dokument jednim čitanjem: counts (kao platform_counts),
+        jobs (ETL statistika po tipu joba) i latest_film. Dok ih ETL / reconcile nije upisao,
+        jobs i latest_film se jednom izračunaju iz etl_jobs / films.
+        """
+        db = await self.database()
+        doc = await db[platform_counters.COUNTERS_COLLECTION].find_one(
+            {"_id": platform_counters.COUNTERS_ID}, {"_id": 0, "counts": 1, "jobs": 1, "latest_film": 1}
+        ) or {}
+        stored = doc.get("counts", {})
+        counts = {name: max(stored[name], 0) for name in collections if name in stored}
+
+        missing = [name for name in collections if name not in counts]
+        if missing:
+            counts.update(await self.count_collections(missing))
+
+        jobs = doc.get("jobs")
+        if jobs is None:
+            rows = await db["etl_jobs"].aggregate(platform_counters.JOB_STATS_PIPELINE).to_list(length=None)
+            jobs = {row["_id"]: row for row in rows if row["_id"]}
+        latest_film = doc.get("latest_film")
+        if "latest_film" not in doc:
+            latest_film = await db["films"].find_one(
+                {}, platform_counters.LATEST_FILM_PROJECTION, sort=[("fetched_at", -1)]
+            )
+
+        return {"counts": {name: counts[name] for name in collections}, "jobs": jobs, "latest_film": latest_film}
+
+    async def collections_stats(self, collections: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """collection_stats za više kolekcija odjednom (paralelno, keširano)"""
+        empty = {"count": 0, "size_mb": 0.0, "storage_size_mb": 0.0, "index_size_mb": 0.0, "indexes": 0}
+        return await self._per_collection("stats", collections, self.collection_stats, empty)
+
+    async def _per_collection(self, kind: str, collections: Optional[Iterable[str]],
+                              fetch: Callable[[str], Awaitable[Any]], missing: Any) -> Dict[str, Any]:
+        key = (kind, tuple(collections) if collections is not None else None)
+        cached = self._stats_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return dict(cached[1])
+
+        existing = set(await self.collection_names())
+        names = list(key[1]) if key[1] is not None else sorted(existing)
+        values = await asyncio.gather(*(
+            fetch(name) if name in existing else asyncio.sleep(0, result=missing)
+            for name in names
+        ))
+        result = dict(zip(names, values))
+        self._stats_cache[key] = (time.monotonic() + settings.COLLECTION_STATS_CACHE_SECONDS, result)
+        return dict(result)
+
+
+mongo_repository = MongoRepository(mongo_manager)
@@ -7,7 +7,10 @@ from .etl_tasks import (
     test_api_connections,
     run_combined_etl,
     cleanup_old_data,
-    generate_daily_report
+    generate_daily_report,
+    rebuild_genre_category_matrix,
+    rebuild_place_rankings,
+    refresh_regional_snapshot
 )
 
 # Ostavite ovo za celery
@@ -19,5 +22,8 @@ __all__ = [
     'test_api_connections',
     'run_combined_etl',
     'cleanup_old_data',
-    'generate_daily_report'
+    'generate_daily_report',
+    'rebuild_genre_category_matrix',
+    'rebuild_place_rankings',
+    'refresh_regional_snapshot'
 ]
\ No newline at end of file
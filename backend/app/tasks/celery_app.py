@@ -41,6 +41,18 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.combined_etl_tasks.scheduled_weekly_etl",
         "schedule": 604800.0,  # Every 7 days
     },
+    "regional-map-snapshot": {
+        "task": "app.tasks.etl_tasks.refresh_regional_snapshot",
+        "schedule": float(settings.REGIONAL_SNAPSHOT_MAX_AGE_SECONDS),
+    },
+    "reconcile-platform-counters": {
+        "task": "app.tasks.etl_tasks.reconcile_platform_counters",
+        "schedule": float(settings.PLATFORM_COUNTERS_RECONCILE_SECONDS),
+    },
+    "rebuild-genre-category-matrix": {
+        "task": "app.tasks.etl_tasks.rebuild_genre_category_matrix",
+        "schedule": float(settings.GENRE_MATRIX_REBUILD_SECONDS),
+    },
 }
 
 
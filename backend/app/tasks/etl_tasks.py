@@ -1,19 +1,28 @@
 # backend/app/tasks/etl_tasks.py
-from celery import shared_task
-from datetime import datetime, timezone
+from celery import chord, shared_task
+from datetime import datetime, timedelta, timezone
 import logging
 import uuid
 import asyncio
 import time
+import re
 import statistics
+from collections import Counter
 from typing import Dict, List, Any, Optional
 
 # Koristi pravilne import putanje
 from ..services.etl.tmdb_service import tmdb_service
 from ..services.etl.geoapify_service import geoapify_service  # PROMENJENO: GeoDB → Geoapify
 from ..services.etl.aggregation_service import aggregation_service  # NOVO
+from ..services.etl import parallel_correlation
+from ..services.etl.parallel_correlation import parallel_correlation_service
+from ..services.etl.regional_snapshot_service import regional_snapshot_service, normalize_regions
+from ..services.etl import genre_rules, genre_matrix, place_rankings, place_documents, etl_metrics, platform_counters
+from ..utils.topk import top_k
+from ..utils.mongo_concerns import bulk_write_options, state_collection
 from ..config import settings
-from pymongo import MongoClient
+from bson import ObjectId
+from pymongo import MongoClient, ReturnDocument
 import traceback
 
 logger = logging.getLogger(__name__)
@@ -27,7 +36,8 @@ def get_mongo_client_sync():
             settings.MONGO_URL,
             serverSelectionTimeoutMS=5000,
             connectTimeoutMS=5000,
-            maxPoolSize=10
+            maxPoolSize=10,
+            **bulk_write_options()  # ETL upisi; stanje ide kroz state_collection
         )
         # Testiraj konekciju
         client.admin.command('ping')
@@ -52,7 +62,7 @@ def fetch_and_store_films(self, pages: int = 3, movies_per_page: int = 20):
 
         db = client[settings.MONGO_DB]
         films_collection = db["films"]
-        etl_jobs_collection = db["etl_jobs"]
+        etl_jobs_collection = state_collection(db, "etl_jobs")
 
         # Create ETL job record
         job_id = str(uuid.uuid4())
@@ -73,10 +83,14 @@ def fetch_and_store_films(self, pages: int = 3, movies_per_page: int = 20):
             }
         }
         etl_jobs_collection.insert_one(job_data)
+        platform_counters.record_job(db, "tmdb", started_at=job_data["started_at"])
         logger.info(f"Created ETL job: {job_id}")
+        counter_deltas = Counter(etl_jobs=1)
+        job_timer = etl_metrics.StageTimer(job_id, "tmdb", etl_metrics.STAGE_JOB)
 
         # Fetch trending movies
         logger.info("Fetching movies from TMDB...")
+        fetch_timer = etl_metrics.StageTimer(job_id, "tmdb", "fetch")
         try:
             # Run async function in sync context
             movies = asyncio.run(tmdb_service.fetch_trending_movies(limit=pages * movies_per_page))
@@ -85,9 +99,12 @@ def fetch_and_store_films(self, pages: int = 3, movies_per_page: int = 20):
             raise
 
         logger.info(f"Fetched {len(movies)} movies from TMDB")
+        fetch_timer.record(db, docs=len(movies), upstream_calls=1)
 
         processed_count = 0
         error_count = 0
+        latest_film = None
+        load_timer = etl_metrics.StageTimer(job_id, "tmdb", "load")
 
         for movie in movies:
             try:
@@ -99,6 +116,7 @@ def fetch_and_store_films(self, pages: int = 3, movies_per_page: int = 20):
                 existing_film = films_collection.find_one({"film_id": movie_id})
 
                 # Get detailed movie information
+                load_timer.add(upstream_calls=1)
                 try:
                     movie_details = asyncio.run(tmdb_service.fetch_movie_details(movie_id))
                     if not movie_details:
@@ -147,9 +165,12 @@ def fetch_and_store_films(self, pages: int = 3, movies_per_page: int = 20):
                     }]
 
                     films_collection.insert_one(film_data)
+                    load_timer.add(inserted=1)
+                    counter_deltas["films"] += 1
                     logger.info(f"✓ Inserted film: {film_data.get('title')} (ID: {movie_id})")
 
                 processed_count += 1
+                latest_film = {field: film_data.get(field) for field in ("title", "release_date", "fetched_at")}
 
             except Exception as e:
                 error_count += 1
@@ -172,6 +193,18 @@ def fetch_and_store_films(self, pages: int = 3, movies_per_page: int = 20):
             }
         )
 
+        platform_counters.apply_deltas(db, counter_deltas)
+        counter_deltas.clear()  # except blok ih ne smije primijeniti ponovo
+        platform_counters.record_job(db, "tmdb", completed=True, latest_film=latest_film)
+        load_timer.record(db, docs=processed_count, errors=error_count)
+        job_timer.record(
+            db,
+            docs=processed_count,
+            inserted=load_timer.counters["inserted"],
+            upstream_calls=1 + load_timer.counters["upstream_calls"],
+            errors=error_count
+        )
+
         logger.info(f"✅ Successfully processed {processed_count} movies (errors: {error_count})")
 
         return {
@@ -194,7 +227,7 @@ def fetch_and_store_films(self, pages: int = 3, movies_per_page: int = 20):
             client = get_mongo_client_sync()
             if client:
                 db = client[settings.MONGO_DB]
-                etl_jobs_collection = db["etl_jobs"]
+                etl_jobs_collection = state_collection(db, "etl_jobs")
 
                 if 'job_id' in locals():
                     etl_jobs_collection.update_one(
@@ -207,6 +240,10 @@ def fetch_and_store_films(self, pages: int = 3, movies_per_page: int = 20):
                             }
                         }
                     )
+                if 'counter_deltas' in locals():
+                    platform_counters.apply_deltas(db, counter_deltas)
+                if 'job_timer' in locals():
+                    job_timer.record(db, failed=1)
         except Exception as update_error:
             logger.error(f"Could not update job status: {update_error}")
 
@@ -306,18 +343,23 @@ def fetch_and_store_places(self, country_codes: List[str] = None, limit_per_coun
             "started_at": datetime.now(timezone.utc),
             "results": {"total_processed": 0}
         }
-        db.etl_jobs.insert_one(job_data)
+        state_collection(db, "etl_jobs").insert_one(job_data)
+        platform_counters.record_job(db, "geoapify_places", started_at=job_data["started_at"])
         logger.info(f"📝 Created Geoapify ETL job: {job_id}")
 
         # Podrazumevane zemlje ako nisu prosleđene
         countries = country_codes or ["US", "GB", "FR"]
         total_processed = 0
+        job_timer = etl_metrics.StageTimer(job_id, "geoapify_places", etl_metrics.STAGE_JOB)
+        load_timer = etl_metrics.StageTimer(job_id, "geoapify_places", "load")
+        counter_deltas = Counter(etl_jobs=1)
 
         for country_code in countries:
             try:
                 logger.info(f"🌍 Fetching places for {country_code}...")
 
                 # Dohvati mesta za zemlju - koristi novi Geoapify servis
+                load_timer.add(upstream_calls=1)
                 places = asyncio.run(
                     geoapify_service.get_places_by_country(
                         country_code=country_code,
@@ -340,17 +382,24 @@ def fetch_and_store_places(self, country_codes: List[str] = None, limit_per_coun
                             "updated_at": datetime.now(timezone.utc)
                         })
 
-                        # Upsert u bazu
-                        db.places.update_one(
+                        # Upsert u bazu - sirovi Geoapify podaci idu u hladnu kolekciju
+                        place, raw = place_documents.split_raw(place)
+                        result = db.places.update_one(
                             {"place_id": place["place_id"]},
-                            {"$set": place},
+                            {"$set": place, "$unset": {"raw_data": ""}},
                             upsert=True
                         )
+                        if result.upserted_id is not None:
+                            load_timer.add(inserted=1)
+                            counter_deltas["places"] += 1
+                        if raw:
+                            db[place_documents.RAW_COLLECTION].replace_one({"_id": raw["_id"]}, raw, upsert=True)
 
                         total_processed += 1
                         logger.info(f"📍 {place['name']}, {place['city']}")
 
                     except Exception as e:
+                        load_timer.add(errors=1)
                         logger.warning(f"Error processing place: {e}")
                         continue
 
@@ -360,11 +409,12 @@ def fetch_and_store_places(self, country_codes: List[str] = None, limit_per_coun
                 time.sleep(2)
 
             except Exception as e:
+                load_timer.add(errors=1)
                 logger.error(f"Failed for {country_code}: {e}")
                 continue
 
         # Ažuriraj ETL job
-        db.etl_jobs.update_one(
+        state_collection(db, "etl_jobs").update_one(
             {"job_id": job_id},
             {
                 "$set": {
@@ -377,6 +427,20 @@ def fetch_and_store_places(self, country_codes: List[str] = None, limit_per_coun
         )
 
         logger.info(f"🎉 Total: {total_processed} places processed")
+        platform_counters.apply_deltas(db, counter_deltas)
+        counter_deltas.clear()  # except blok ih ne smije primijeniti ponovo
+        platform_counters.record_job(db, "geoapify_places", completed=True)
+        load_timer.record(db, docs=total_processed)
+
+        # Osvježi rangirane liste mesta za preporuke (job je već završen - greška ga ne obara)
+        if total_processed > 0:
+            rankings_timer = etl_metrics.StageTimer(job_id, "geoapify_places", "rankings")
+            try:
+                place_rankings.rebuild_rankings(db)
+                rankings_timer.record(db, docs=total_processed)
+            except Exception as e:
+                logger.error(f"Could not rebuild place rankings: {e}")
+                rankings_timer.record(db, errors=1)
 
         # Automatski pokreni korelaciju sa filmovima
         if total_processed > 0:
@@ -385,6 +449,9 @@ def fetch_and_store_places(self, country_codes: List[str] = None, limit_per_coun
             )
             logger.info(f"🔗 Correlation job created: {correlation_job_id}")
 
+        job_timer.record(db, **{name: load_timer.counters[name] for name in ("inserted", "upstream_calls", "errors")},
+                         docs=total_processed)
+
         return {
             "job_id": job_id,
             "status": "success",
@@ -398,71 +465,208 @@ def fetch_and_store_places(self, country_codes: List[str] = None, limit_per_coun
     except Exception as e:
         logger.error(f"❌ Error in fetch_and_store_places: {e}")
         logger.error(traceback.format_exc())
+        if 'counter_deltas' in locals():
+            platform_counters.apply_deltas(db, counter_deltas)
+        if 'job_timer' in locals():
+            job_timer.record(db, failed=1)
         return {"status": "error", "message": str(e)}
 
 
 async def create_film_place_correlations(db, source_job_id: str) -> str:
     """Kreira korelacije između filmova i mesta"""
+    timer = etl_metrics.StageTimer(None, "film_place_correlation", etl_metrics.STAGE_JOB)
     try:
-        # Dohvati filmove i mesta
-        films = list(db.films.find().limit(50))
-        places = list(db.places.find().limit(100))
+        # Dohvati sve filmove (samo polja potrebna za korelaciju) i mesta
+        films = list(db.films.find({}, CORRELATION_FILM_PROJECTION).sort("film_id", 1))
+        places = list(db.places.find({}, {"raw_data": 0}).sort("_id", 1))
 
         if not films or not places:
             logger.warning("⚠️ Not enough data for correlations")
             return ""
 
-        # Kreiraj korelacije
-        correlations = aggregation_service.correlate_films_with_locations(films, places)
-
-        # Kreiraj novi ETL job za korelacije
+        # Kreiraj novi ETL job za korelacije (completed tek kada su korelacije upisane)
         correlation_job_id = str(uuid.uuid4())
-        correlation_job = {
+        timer.job_id = correlation_job_id
+        started_at = datetime.now(timezone.utc)
+        state_collection(db, "etl_jobs").insert_one({
             "job_id": correlation_job_id,
             "job_type": "film_place_correlation",
-            "status": "completed",
+            "status": "running",
             "source_job_id": source_job_id,
-            "started_at": datetime.now(timezone.utc),
-            "completed_at": datetime.now(timezone.utc),
-            "results": {
-                "total_correlations": len(correlations),
-                "films_analyzed": len(films),
-                "places_analyzed": len(places)
-            }
-        }
-        db.etl_jobs.insert_one(correlation_job)
+            "started_at": started_at
+        })
+        platform_counters.apply_deltas(db, {"etl_jobs": 1})
+        platform_counters.record_job(db, "film_place_correlation", started_at=started_at)
+
+        if parallel_correlation_service.should_fan_out(len(films)):
+            # Celery worker je daemon proces (bez pool-a): shard-ovi idu kao chord chunk taskova,
+            # a callback upisuje korelacije i završava job
+            _, chunks = parallel_correlation_service.shard(films)
+            chord(
+                score_correlation_chunk.s(correlation_job_id, start, genres_chunk)
+                for start, genres_chunk in chunks
+            )(store_correlation_chunks.s(
+                correlation_job_id, [film["film_id"] for film in films],
+                {"chunks": len(chunks), "chunk_size": parallel_correlation_service.chunk_size,
+                 "places": len(places), "dispatched_at": time.time()}
+            ))
+            logger.info(f"🔗 Correlation fanned out as {len(chunks)} Celery tasks (job {correlation_job_id})")
+            return correlation_job_id
+
+        # Kreiraj korelacije (paralelno preko više jezgara za veći katalog)
+        correlations, correlation_stats = parallel_correlation_service.correlate(films, places)
+        store_correlations(db, correlation_job_id, films, correlations, correlation_stats, timer)
+        return correlation_job_id
+
+    except Exception as e:
+        logger.error(f"Error creating correlations: {e}")
+        if timer.job_id:
+            state_collection(db, "etl_jobs").update_one(
+                {"job_id": timer.job_id},
+                {"$set": {"status": "failed", "completed_at": datetime.now(timezone.utc), "error": str(e)}}
+            )
+        timer.record(db, failed=1)
+        return ""
 
-        # Skladišti korelacije
+
+CORRELATION_FILM_PROJECTION = {"film_id": 1, "title": 1, "genres": 1, "vote_average": 1, "popularity": 1}
+
+
+def store_correlations(db, correlation_job_id: str, films: List[Dict], correlations: List[Dict],
+                       execution: Dict[str, Any], timer: etl_metrics.StageTimer):
+    """Upisuje korelacije (matrica žanr × kategorija prati promjene kroz delte), analizu i završava job"""
+    counter_deltas = Counter()
+    genre_matrix.ensure_matrix(db)
+    matrix_deltas = Counter()
+
+    try:
         for correlation in correlations:
             correlation["correlation_job_id"] = correlation_job_id
             correlation["created_at"] = datetime.now(timezone.utc)
 
-            db.film_place_correlations.update_one(
+            previous = db.film_place_correlations.find_one_and_update(
                 {"film_id": correlation["film_id"]},
                 {"$set": correlation},
+                projection=genre_matrix.CONTRIBUTION_PROJECTION,
+                return_document=ReturnDocument.BEFORE,
                 upsert=True
             )
+            matrix_deltas.update(genre_matrix.diff_contributions(previous, correlation))
+            if previous is None:
+                timer.add(inserted=1)
+                counter_deltas["film_place_correlations"] += 1
+    finally:
+        # I kada upis padne na pola: već upisane korelacije ulaze u matricu i brojače
+        genre_matrix.apply_deltas(db, matrix_deltas)
+        platform_counters.apply_deltas(db, counter_deltas)
+
+    # Izvrši analizu uspeha
+    success_analysis = aggregation_service.analyze_film_success_by_location(
+        films, correlations
+    )
+
+    # Skladišti analizu
+    if success_analysis:
+        db.analytics.insert_one({
+            "analysis_type": "film_success_by_location",
+            "job_id": correlation_job_id,
+            "data": success_analysis,
+            "created_at": datetime.now(timezone.utc)
+        })
 
-        # Izvrši analizu uspeha
-        success_analysis = aggregation_service.analyze_film_success_by_location(
-            films, correlations
-        )
+    state_collection(db, "etl_jobs").update_one(
+        {"job_id": correlation_job_id},
+        {"$set": {
+            "status": "completed",
+            "completed_at": datetime.now(timezone.utc),
+            "results": {
+                "total_correlations": len(correlations),
+                "films_analyzed": len(films),
+                "places_analyzed": execution.get("places"),
+                "execution": execution
+            }
+        }}
+    )
 
-        # Skladišti analizu
-        if success_analysis:
-            db.analytics.insert_one({
-                "analysis_type": "film_success_by_location",
-                "job_id": correlation_job_id,
-                "data": success_analysis,
-                "created_at": datetime.now(timezone.utc)
-            })
+    platform_counters.record_job(db, "film_place_correlation", completed=True)
 
-        logger.info(f"🔗 Created {len(correlations)} film-place correlations")
-        return correlation_job_id
+    logger.info(f"🔗 Created {len(correlations)} film-place correlations")
+    timer.record(db, docs=len(correlations))
+
+
+@shared_task
+def score_correlation_chunk(correlation_job_id: str, chunk_start: int, genres_chunk: List[List[str]]):
+    """Boduje shard filmova korelacionog joba; mesta se vraćaju kao _id (ne zavise od redoslijeda)"""
+    client = get_mongo_client_sync()
+    if not client:
+        raise RuntimeError("MongoDB not connected")
+
+    place_signatures, place_ids = parallel_correlation.job_places(client[settings.MONGO_DB], correlation_job_id)
+    results = parallel_correlation.score_chunk(genres_chunk, place_signatures)
+    return [
+        chunk_start,
+        [[[[place_ids[index], score] for index, score in top_matches], total] for top_matches, total in results]
+    ]
+
+
+@shared_task
+def store_correlation_chunks(chunk_results: List, correlation_job_id: str, film_ids: List[int],
+                             execution: Dict[str, Any]):
+    """Chord callback: spaja rezultate chunk taskova i upisuje korelacije"""
+    timer = etl_metrics.StageTimer(correlation_job_id, "film_place_correlation", etl_metrics.STAGE_JOB)
+    client = get_mongo_client_sync()
+    if not client:
+        return {"status": "error", "message": "MongoDB not connected"}
+    db = client[settings.MONGO_DB]
+
+    try:
+        film_docs = {
+            film["film_id"]: film
+            for film in db.films.find({"film_id": {"$in": film_ids}}, CORRELATION_FILM_PROJECTION)
+        }
+        films = [film_docs.get(film_id, {"film_id": film_id}) for film_id in film_ids]
+        film_genres, _ = parallel_correlation_service.shard(films)
+
+        # Samo mesta koja su u nekom top poklapanju; indeksi u lokalnu listu
+        place_keys = sorted({
+            place_id for _, results in chunk_results for top_matches, _ in results for place_id, _ in top_matches
+        })
+        place_docs = {
+            str(place["_id"]): place
+            for place in db.places.find(
+                {"_id": {"$in": [ObjectId(key) if ObjectId.is_valid(key) else key for key in place_keys]}},
+                {"raw_data": 0}
+            )
+        }
+        places = [place_docs.get(key, {}) for key in place_keys]
+        index_of = {key: index for index, key in enumerate(place_keys)}
+
+        indexed_results = [
+            (chunk_start, [
+                ([(index_of[place_id], score) for place_id, score in top_matches], total)
+                for top_matches, total in results
+            ])
+            for chunk_start, results in chunk_results
+        ]
+        correlations = parallel_correlation_service.merge(films, film_genres, places, indexed_results)
+
+        execution = {
+            **{key: value for key, value in execution.items() if key != "dispatched_at"},
+            "mode": "celery",
+            "films": len(films),
+            "duration_seconds": round(time.time() - execution["dispatched_at"], 3)
+        }
+        store_correlations(db, correlation_job_id, films, correlations, execution, timer)
+        return {"status": "success", "job_id": correlation_job_id, "correlations": len(correlations)}
 
     except Exception as e:
-        logger.error(f"Error creating correlations: {e}")
-        return ""
+        logger.error(f"Error storing fanned-out correlations: {e}")
+        state_collection(db, "etl_jobs").update_one(
+            {"job_id": correlation_job_id},
+            {"$set": {"status": "failed", "completed_at": datetime.now(timezone.utc), "error": str(e)}}
+        )
+        timer.record(db, failed=1)
+        return {"status": "error", "message": str(e)}
 
 
 @shared_task
@@ -493,6 +697,7 @@ def enrich_films_with_places():
         logger.info(f"Found {len(films)} films to enrich with places")
 
         enriched_count = 0
+        counter_deltas = Counter()
 
         for film in films:
             try:
@@ -507,42 +712,31 @@ def enrich_films_with_places():
 
                 # Dohvati mesta koja odgovaraju žanrovima filma
                 suitable_places = []
+                seen_place_ids = set()
+                film_sig = genre_rules.film_signature(film_genres)
 
-                # Mapiranje žanrova na kategorije mesta
-                genre_to_categories = {
-                    "action": ["entertainment.cinema", "commercial", "building"],
-                    "comedy": ["entertainment", "catering", "tourism"],
-                    "drama": ["building.historic", "tourism.museum", "tourism.sights"],
-                    "horror": ["building.abandoned", "tourism.sights", "natural"],
-                    "romance": ["tourism.sights.viewpoint", "catering.cafe", "tourism"]
-                }
-
-                # Pronađi relevantne kategorije za film
-                relevant_categories = []
-                for genre in film_genres[:2]:  # Uzmi max 2 glavna žanra
-                    genre_lower = genre.lower()
-                    if genre_lower in genre_to_categories:
-                        relevant_categories.extend(genre_to_categories[genre_lower])
-
-                # Ako nema mapiranja, koristi opšte kategorije
-                if not relevant_categories:
-                    relevant_categories = ["entertainment", "tourism", "catering"]
+                # Relevantne kategorije za glavne žanrove (zajednička pravila)
+                relevant_categories = genre_rules.relevant_categories(film_genres)
 
                 # Pretraži mesta po relevantnim kategorijama
                 for category in relevant_categories[:3]:  # Uzmi max 3 kategorije
-                    category_places = list(places_collection.find({
-                        "categories": {"$regex": category, "$options": "i"}
-                    }).limit(5))
+                    category_places = list(places_collection.find(
+                        {"categories": {"$regex": f"^{re.escape(category)}"}},
+                        {"_id": 0, "place_id": 1, "name": 1, "city": 1, "primary_category": 1, "categories": 1}
+                    ).limit(5))
 
                     for place in category_places:
+                        if place.get("place_id") in seen_place_ids:
+                            continue
+                        seen_place_ids.add(place.get("place_id"))
+
                         # Izračunaj match score
-                        match_score = _calculate_place_match_score(
-                            film_genres,
-                            place.get("categories", []),
-                            place.get("primary_category", "")
+                        match_score = genre_rules.match_score(
+                            film_sig,
+                            genre_rules.place_signature(place.get("primary_category", ""), place.get("categories", []))
                         )
 
-                        if match_score > 0.3:  # Minimalni threshold
+                        if match_score > genre_rules.MIN_MATCH_SCORE:
                             suitable_places.append({
                                 "place": place,
                                 "match_score": match_score,
@@ -551,10 +745,8 @@ def enrich_films_with_places():
 
                 # Skladišti veze ako postoje odgovarajuća mesta
                 if suitable_places:
-                    # Sortiraj po match score
-                    suitable_places.sort(key=lambda x: x["match_score"], reverse=True)
-
-                    for place_data in suitable_places[:3]:  # Uzmi top 3 mesta
+                    # Uzmi top 3 mesta po match score
+                    for place_data in top_k(suitable_places, 3, key=lambda x: x["match_score"]):
                         place = place_data["place"]
 
                         connection = {
@@ -563,8 +755,6 @@ def enrich_films_with_places():
                             "place_id": place.get("place_id"),
                             "place_name": place.get("name"),
                             "place_city": place.get("city"),
-                            "place_country": place.get("country"),
-                            "place_categories": place.get("categories", []),
                             "match_score": place_data["match_score"],
                             "match_reason": place_data["match_reason"],
                             "created_at": datetime.now(timezone.utc),
@@ -572,7 +762,7 @@ def enrich_films_with_places():
                         }
 
                         # Upsert vezu
-                        db.film_place_connections.update_one(
+                        result = db.film_place_connections.update_one(
                             {
                                 "film_id": film_id,
                                 "place_id": place.get("place_id")
@@ -580,6 +770,8 @@ def enrich_films_with_places():
                             {"$set": connection},
                             upsert=True
                         )
+                        if result.upserted_id is not None:
+                            counter_deltas["film_place_connections"] += 1
 
                     # Obeleži film kao обогаћен
                     films_collection.update_one(
@@ -603,6 +795,7 @@ def enrich_films_with_places():
                 logger.warning(f"Could not enrich film {film.get('title', 'Unknown')}: {e}")
                 continue
 
+        platform_counters.apply_deltas(db, counter_deltas)
         logger.info(f"✅ Enriched {enriched_count} films with places data")
 
         return {
@@ -615,39 +808,6 @@ def enrich_films_with_places():
         return {"status": "error", "message": str(e)}
 
 
-def _calculate_place_match_score(film_genres: List[str], place_categories: List[str],
-                                 primary_category: str) -> float:
-    """Izračunava koliko se dobro film i mesto poklapaju"""
-    score = 0.0
-
-    # Mapiranje žanrova na kategorije
-    genre_category_map = {
-        "action": ["entertainment.cinema", "commercial", "building"],
-        "comedy": ["entertainment", "catering", "tourism"],
-        "drama": ["building.historic", "tourism.museum", "tourism.sights"],
-        "horror": ["building.abandoned", "tourism.sights", "natural"],
-        "romance": ["tourism.sights.viewpoint", "catering.cafe", "tourism"]
-    }
-
-    # Proveri direktna poklapanja
-    for genre in film_genres:
-        genre_lower = genre.lower()
-        if genre_lower in genre_category_map:
-            for cat in genre_category_map[genre_lower]:
-                if cat in primary_category or any(cat in pc for pc in place_categories):
-                    score += 0.3
-
-    # Bonus za specifične kategorije
-    if "cinema" in primary_category or any("cinema" in cat for cat in place_categories):
-        score += 0.4
-    if "museum" in primary_category or any("museum" in cat for cat in place_categories):
-        score += 0.3
-    if "historic" in primary_category or any("historic" in cat for cat in place_categories):
-        score += 0.2
-
-    return min(score, 1.0)  # Normalizuj na 0-1
-
-
 @shared_task
 def test_api_connections():
     """Task za testiranje API konekcija"""
@@ -709,6 +869,68 @@ def run_combined_etl():
         return {"status": "error", "message": str(e)}
 
 
+@shared_task
+def rebuild_genre_category_matrix():
+    """Ponovo gradi matricu žanr × kategorija iz svih korelacija (reconciliation)"""
+    try:
+        client = get_mongo_client_sync()
+        if not client:
+            return {"status": "error", "message": "MongoDB not connected"}
+
+        db = client[settings.MONGO_DB]
+        pairs = genre_matrix.rebuild_matrix(db)
+
+        return {"status": "success", "pairs": pairs}
+
+    except Exception as e:
+        logger.error(f"Error rebuilding genre-category matrix: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@shared_task
+def rebuild_place_rankings():
+    """Ponovo gradi rangirane liste mesta za preporuke lokacija"""
+    try:
+        client = get_mongo_client_sync()
+        if not client:
+            return {"status": "error", "message": "MongoDB not connected"}
+
+        db = client[settings.MONGO_DB]
+        lists = place_rankings.rebuild_rankings(db)
+
+        return {"status": "success", "ranked_lists": lists}
+
+    except Exception as e:
+        logger.error(f"Error rebuilding place rankings: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@shared_task
+def refresh_regional_snapshot(regions: List[str] = None):
+    """Gradi snapshot mape regionalne popularnosti i snima ga u regional_films"""
+    try:
+        client = get_mongo_client_sync()
+        if not client:
+            return {"status": "error", "message": "MongoDB not connected"}
+
+        db = client[settings.MONGO_DB]
+        regions = normalize_regions(regions)
+
+        regional_data = asyncio.run(regional_snapshot_service.build_snapshot(regions))
+        if regional_data:
+            db.regional_films.bulk_write(
+                regional_snapshot_service.snapshot_operations(regional_data),
+                ordered=False
+            )
+
+        logger.info(f"🗺️ Regional snapshot refreshed: {len(regional_data)}/{len(regions)} regions")
+        return {"status": "success", "regions": len(regional_data)}
+
+    except Exception as e:
+        logger.error(f"Error refreshing regional snapshot: {e}")
+        return {"status": "error", "message": str(e)}
+
+
 # Ostale pomoćne funkcije
 @shared_task
 def cleanup_old_data(days_old: int = 30):
@@ -721,7 +943,7 @@ def cleanup_old_data(days_old: int = 30):
             return {"status": "error", "message": "MongoDB not connected"}
 
         db = client[settings.MONGO_DB]
-        cutoff_date = datetime.now(timezone.utc) - timezone.timedelta(days=days_old)
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_old)
 
         # Broj obrisanih dokumenata po kolekciji
         deleted_counts = {}
@@ -731,6 +953,9 @@ def cleanup_old_data(days_old: int = 30):
             "completed_at": {"$lt": cutoff_date},
             "status": {"$in": ["completed", "failed"]}
         }).deleted_count
+        platform_counters.apply_deltas(db, {"etl_jobs": -deleted_counts["etl_jobs"]})
+        if deleted_counts["etl_jobs"]:
+            platform_counters.reconcile_jobs(db)  # obrisani job-ovi ispadaju i iz statistike po tipu
 
         # Čisti stare analize
         deleted_counts["analytics"] = db.analytics.delete_many({
@@ -750,6 +975,22 @@ def cleanup_old_data(days_old: int = 30):
         return {"status": "error", "message": str(e)}
 
 
+@shared_task
+def reconcile_platform_counters():
+    """Ispravlja odstupanja platform_counters stvarnim brojanjem kolekcija"""
+    try:
+        client = get_mongo_client_sync()
+        if not client:
+            return {"status": "error", "message": "MongoDB not connected"}
+
+        drift = platform_counters.reconcile(client[settings.MONGO_DB])
+        return {"status": "success", "drift": drift}
+
+    except Exception as e:
+        logger.error(f"Error reconciling platform counters: {e}")
+        return {"status": "error", "message": str(e)}
+
+
 @shared_task
 def generate_daily_report():
     """Generiše dnevni izveštaj o ETL aktivnostima"""
@@ -764,35 +1005,25 @@ def generate_daily_report():
 
         # Dnevni period
         today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        yesterday_start = today_start - timezone.timedelta(days=1)
-
-        # Statistika za danas
-        today_stats = {
-            "films_added": db.films.count_documents({
-                "created_at": {"$gte": today_start}
-            }),
-            "places_added": db.places.count_documents({
-                "created_at": {"$gte": today_start}
-            }),
-            "etl_jobs_run": db.etl_jobs.count_documents({
-                "started_at": {"$gte": today_start}
-            }),
-            "successful_jobs": db.etl_jobs.count_documents({
-                "started_at": {"$gte": today_start},
-                "status": "completed"
-            }),
-            "failed_jobs": db.etl_jobs.count_documents({
-                "started_at": {"$gte": today_start},
-                "status": "failed"
-            })
-        }
 
-        # Ukupna statistika
+        # Statistika za danas - iz unaprijed sumiranih ETL metrika (dnevni i satni rollup-ovi)
+        etl_metrics.ensure_collections(db)
+        etl_metrics.refresh_rollups(db)
+        rollups = db[etl_metrics.ROLLUP_COLLECTION]
+        today_stats = etl_metrics.summarize_day(
+            list(rollups.find(etl_metrics.rollup_query("day", today_start), {"_id": 0}))
+        )
+        today_stats["hourly_jobs"] = list(rollups.find(
+            {**etl_metrics.rollup_query("hour", today_start), "stage": etl_metrics.STAGE_JOB},
+            {"_id": 0, "bucket": 1, "job_type": 1, "runs": 1, "failed": 1, "docs": 1, "duration_s": 1}
+        ).sort("bucket", 1))
+
+        # Ukupna statistika (metapodaci kolekcija - bez skeniranja)
         total_stats = {
-            "total_films": db.films.count_documents({}),
-            "total_places": db.places.count_documents({}),
-            "total_correlations": db.film_place_correlations.count_documents({}),
-            "total_connections": db.film_place_connections.count_documents({})
+            "total_films": db.films.estimated_document_count(),
+            "total_places": db.places.estimated_document_count(),
+            "total_correlations": db.film_place_correlations.estimated_document_count(),
+            "total_connections": db.film_place_connections.estimated_document_count()
         }
 
         # Skladišti izveštaj
@@ -807,7 +1038,7 @@ def generate_daily_report():
             "generated_at": datetime.now(timezone.utc)
         }
 
-        db.daily_reports.insert_one(report)
+        state_collection(db, "daily_reports").insert_one(report)
 
         logger.info(f"✅ Daily report generated: {report_id}")
 
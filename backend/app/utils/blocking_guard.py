@@ -0,0 +1,55 @@
+"""
+Debug zaštita od blokiranja event loop-a.
+
+- pymongo CommandListener: Motor izvršava komande u thread pool-u, pa komanda koja
+  krene iz threada sa aktivnim event loop-om znači sync MongoDB poziv u handleru.
+  Takav poziv se loguje sa stack trace-om.
+- asyncio debug mode: svaki callback/task korak duži od praga se loguje ("Executing ... took").
+Uključuje se samo sa BLOCKING_GUARD_ENABLED (nezavisno od DEBUG - debug mode usporava loop).
+"""
+import asyncio
+import logging
+import traceback
+
+from pymongo import monitoring
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BlockingCallListener(monitoring.CommandListener):
+    def __init__(self):
+        self.violations = 0
+
+    def started(self, event):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Motor worker thread ili Celery - ne blokira loop
+
+        self.violations += 1
+        stack = "".join(traceback.format_stack(limit=15)[:-1])
+        logger.warning(f"⚠️ Blocking MongoDB call '{event.command_name}' on the event loop thread\n{stack}")
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+blocking_listener = BlockingCallListener()
+_installed = False
+
+
+def install_blocking_guard(loop: asyncio.AbstractEventLoop):
+    """Registruje listener (prije kreiranja klijenata) i uključuje asyncio debug mode"""
+    global _installed
+    if not _installed:
+        monitoring.register(blocking_listener)
+        _installed = True
+
+    loop.set_debug(True)
+    loop.slow_callback_duration = settings.BLOCKING_GUARD_SLOW_CALLBACK_SECONDS
+    logger.info(f"🛡️ Blocking-call guard active (slow callback > {loop.slow_callback_duration}s)")
@@ -0,0 +1,55 @@
+"""
+GeoJSON i great-circle pomoćne funkcije za 2dsphere upite.
+
+MongoDB GeoJSON koristi redoslijed [longitude, latitude]; $centerSphere radijus
+je u radijanima (udaljenost / poluprečnik Zemlje).
+"""
+from math import asin, cos, radians, sin, sqrt
+from typing import Any, Dict, Optional
+
+EARTH_RADIUS_KM = 6378.1  # poluprečnik koji MongoDB dokumentacija koristi za $centerSphere
+
+GEO_COLLECTIONS = ("cities", "places", "film_locations")
+
+
+def _valid(latitude: Any, longitude: Any) -> bool:
+    if not isinstance(latitude, (int, float)) or not isinstance(longitude, (int, float)):
+        return False
+    if latitude == 0 and longitude == 0:  # ETL koristi (0, 0) kada koordinate nedostaju
+        return False
+    return -90 <= latitude <= 90 and -180 <= longitude <= 180
+
+
+def geo_point(latitude: Any, longitude: Any) -> Optional[Dict[str, Any]]:
+    """GeoJSON Point iz latitude/longitude; None ako koordinate nedostaju ili nisu validne"""
+    if not _valid(latitude, longitude):
+        return None
+    return {"type": "Point", "coordinates": [float(longitude), float(latitude)]}
+
+
+def km_to_radians(distance_km: float) -> float:
+    """Udaljenost u km -> radijani za $centerSphere"""
+    return distance_km / EARTH_RADIUS_KM
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle udaljenost između dvije tačke u km"""
+    dlat = radians(lat2 - lat1)
+    dlng = radians(lng2 - lng1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+def location_backfill_filter() -> Dict[str, Any]:
+    """Dokumenti sa validnim latitude/longitude, a bez GeoJSON location polja"""
+    return {
+        "location": {"$exists": False},
+        "latitude": {"$type": "number", "$gte": -90, "$lte": 90},
+        "longitude": {"$type": "number", "$gte": -180, "$lte": 180},
+        "$nor": [{"latitude": 0, "longitude": 0}]
+    }
+
+
+def location_backfill_update() -> list:
+    """Update pipeline koji gradi location iz postojećih polja"""
+    return [{"$set": {"location": {"type": "Point", "coordinates": ["$longitude", "$latitude"]}}}]
@@ -0,0 +1,52 @@
+"""
+Read preference i write concern po vrsti posla (settings.MONGO_*).
+
+- Analitika (read-only ruteri, export): MONGO_ANALYTICS_READ_PREFERENCE, podrazumijevano
+  secondaryPreferred - čitanja idu na sekundare i ne takmiče se sa ETL upisima na primary-ju;
+  bez replica seta (ili bez sekundara) čita se sa primary-ja. Odgovori koji se keširaju
+  pod verzijom podataka ipak čitaju primary (mongo_repository.versioned_reads).
+- Bulk ETL upisi (Celery klijent): w=MONGO_BULK_WRITE_W bez čekanja journala - upsert-i su
+  idempotentni i ETL ih ponavlja, pa ne čekaju potvrdu većine za svaku operaciju.
+- Stanje (etl_jobs, izvještaji): majority + journal - verzija podataka i status ETL-a
+  ne smiju nestati pri failover-u.
+"""
+from typing import Any, Dict
+
+from pymongo.read_preferences import (
+    Nearest, Primary, PrimaryPreferred, ReadPreference, Secondary, SecondaryPreferred,
+)
+from pymongo.write_concern import WriteConcern
+
+from ..config import settings
+
+_READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def analytics_read_preference():
+    mode = _READ_PREFERENCES.get(settings.MONGO_ANALYTICS_READ_PREFERENCE)
+    if mode is None:
+        raise ValueError(f"Unknown MONGO_ANALYTICS_READ_PREFERENCE: {settings.MONGO_ANALYTICS_READ_PREFERENCE}")
+    if mode is Primary:
+        return ReadPreference.PRIMARY
+    return mode(max_staleness=settings.MONGO_ANALYTICS_MAX_STALENESS_SECONDS)
+
+
+def bulk_write_options() -> Dict[str, Any]:
+    """Opcije MongoClient-a za bulk ETL upise"""
+    return {"w": settings.MONGO_BULK_WRITE_W, "journal": settings.MONGO_BULK_WRITE_JOURNAL}
+
+
+def state_write_concern() -> WriteConcern:
+    w = settings.MONGO_STATE_WRITE_W
+    return WriteConcern(w=int(w) if w.isdigit() else w, j=True, wtimeout=settings.MONGO_STATE_WRITE_TIMEOUT_MS)
+
+
+def state_collection(db, name: str):
+    """Kolekcija sa stanjem (etl_jobs...) - jača garancija od bulk upisa istog klijenta"""
+    return db.get_collection(name, write_concern=state_write_concern())
@@ -0,0 +1,32 @@
+"""
+Normalizacija naslova za prefix autocomplete.
+
+Naslov se čuva i kao `title_normalized` (mala slova, bez dijakritika i interpunkcije,
+jedan razmak), pa je prefix upit usidren regex `^...` nad indeksiranim poljem -
+MongoDB ga izvršava kao uski opseg indeksa, bez skeniranja.
+"""
+import re
+import unicodedata
+from typing import Any, Optional
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_title(title: Optional[Any]) -> str:
+    """'Amélie: Le Fabuleux' -> 'amelie le fabuleux'"""
+    if not title:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(title))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", stripped.casefold())).strip()
+
+
+def prefix_pattern(prefix: str) -> Optional[str]:
+    """
+    Usidren regex za normalizovani prefix; None ako iza normalizacije nema ničega.
+    Normalizovan tekst ima samo slova/cifre i razmake, pa escape nije potreban - a bez
+    escape sekvenci MongoDB cijeli prefix koristi za granice indeksa.
+    """
+    normalized = normalize_title(prefix)
+    return f"^{normalized}" if normalized else None
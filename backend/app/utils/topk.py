@@ -0,0 +1,24 @@
+"""
+Ograničena top-k selekcija (heap) umjesto sortiranja cijele liste radi nekoliko elemenata.
+
+heapq.nlargest/nsmallest su ekvivalentni sorted(...)[:k], uključujući stabilnost:
+elementi sa jednakim ključem zadržavaju ulazni redoslijed. Cijena je O(n log k).
+"""
+import heapq
+from typing import Any, Callable, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def top_k(items: Iterable[T], k: int, key: Optional[Callable[[T], Any]] = None) -> List[T]:
+    """k najvećih elemenata, opadajuće; jednaki ključevi ostaju u ulaznom redoslijedu"""
+    if k <= 0:
+        return []
+    return heapq.nlargest(k, items, key=key)
+
+
+def bottom_k(items: Iterable[T], k: int, key: Optional[Callable[[T], Any]] = None) -> List[T]:
+    """k najmanjih elemenata, rastuće; jednaki ključevi ostaju u ulaznom redoslijedu"""
+    if k <= 0:
+        return []
+    return heapq.nsmallest(k, items, key=key)
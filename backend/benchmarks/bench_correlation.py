@@ -0,0 +1,67 @@
+# backend/benchmarks/bench_correlation.py
+"""
+Poredi jednoprocesnu i paralelnu korelaciju filmova i mesta na sintetičkom katalogu.
+
+Pokretanje (iz backend foldera):
+    python -m benchmarks.bench_correlation --films 5000 --places 2000 --workers 4 --chunk-size 250
+"""
+import argparse
+import json
+import random
+
+from app.services.etl.parallel_correlation import ParallelCorrelationService
+
+GENRES = ["Action", "Comedy", "Drama", "Horror", "Romance", "Thriller",
+          "Science Fiction", "Adventure", "Fantasy", "Animation", "Documentary"]
+
+CATEGORIES = ["entertainment.cinema", "entertainment.museum", "commercial.shopping_mall",
+              "building.historic", "building.abandoned", "tourism.museum", "tourism.sights",
+              "tourism.sights.viewpoint", "tourism.sights.castle", "catering.cafe",
+              "catering.restaurant", "natural.cave", "natural.forest"]
+
+
+def make_catalog(films_count: int, places_count: int, seed: int = 42):
+    """Generiše sintetičke filmove i mesta sa realnim oblikom dokumenata"""
+    rng = random.Random(seed)
+
+    films = [
+        {
+            "film_id": film_id,
+            "title": f"Film {film_id}",
+            "genres": rng.sample(GENRES, rng.randint(1, 3)),
+            "vote_average": round(rng.uniform(4, 9), 1),
+            "popularity": round(rng.uniform(1, 500), 2)
+        }
+        for film_id in range(films_count)
+    ]
+
+    places = []
+    for place_id in range(places_count):
+        categories = rng.sample(CATEGORIES, rng.randint(1, 3))
+        places.append({
+            "place_id": f"place_{place_id}",
+            "name": f"Place {place_id}",
+            "city": "Benchmark City",
+            "categories": categories,
+            "primary_category": categories[0],
+            "distance": rng.randint(0, 5000)
+        })
+
+    return films, places
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Film-place correlation benchmark")
+    parser.add_argument("--films", type=int, default=5000)
+    parser.add_argument("--places", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+
+    films, places = make_catalog(args.films, args.places)
+    service = ParallelCorrelationService(workers=args.workers, chunk_size=args.chunk_size)
+    print(json.dumps(service.benchmark(films, places), indent=2))
+
+
+if __name__ == "__main__":
+    main()
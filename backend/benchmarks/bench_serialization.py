@@ -0,0 +1,141 @@
+# backend/benchmarks/bench_serialization.py
+"""
+Poredi default FastAPI serijalizaciju (jsonable_encoder + json.dumps) i orjson/BSON
+put (BSONJSONResponse) na payloadima mape regiona i liste filmova.
+
+Pokretanje (iz backend foldera):
+    python -m benchmarks.bench_serialization --films 2000 --repeat 50
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import Decimal128, ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.responses import BSONJSONResponse
+from app.services.etl.regional_snapshot_service import REGION_CATALOG, TMDB_GENRE_NAMES
+
+# Ono što bi endpoint bez BSON encodera morao ručno da konvertuje
+BSON_ENCODERS = {ObjectId: str, Decimal128: lambda value: float(value.to_decimal())}
+
+
+def make_map_payload(seed: int = 42):
+    """Snapshot svih regiona u obliku /map/regional-popularity odgovora"""
+    rng = random.Random(seed)
+    genre_ids = list(TMDB_GENRE_NAMES)
+    regions = []
+    for code, (name, latitude, longitude, capital) in REGION_CATALOG.items():
+        regions.append({
+            "country_code": code,
+            "country_name": name,
+            "capital_city": capital,
+            "latitude": latitude,
+            "longitude": longitude,
+            "total_movies_analyzed": 10,
+            "top_movies": [
+                {
+                    "film_id": rng.randint(1, 10 ** 6),
+                    "title": f"Film {code}-{i}",
+                    "release_date": "2024-05-01",
+                    "vote_average": round(rng.uniform(4, 9), 1),
+                    "poster_path": f"/poster_{code}_{i}.jpg",
+                    "poster_url": f"https://image.tmdb.org/t/p/w500/poster_{code}_{i}.jpg",
+                    "overview": "Lorem ipsum dolor sit amet " * 4 + "...",
+                    "region": code
+                }
+                for i in range(3)
+            ],
+            "top_genres": [
+                {"name": TMDB_GENRE_NAMES[genre_id], "count": 3, "percentage": 30.0}
+                for genre_id in rng.sample(genre_ids, 3)
+            ],
+            "source": "tmdb_regional",
+            "last_updated": datetime.utcnow().isoformat()
+        })
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "total_regions": len(regions),
+        "regions": regions,
+        "missing_regions": [],
+        "status": "success",
+        "source": "snapshot"
+    }
+
+
+def make_films_payload(films_count: int, seed: int = 42):
+    """Lista film dokumenata kakvi dolaze iz MongoDB-a (ObjectId, datetime, Decimal128)"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    films = [
+        {
+            "_id": ObjectId(),
+            "film_id": film_id,
+            "title": f"Film {film_id}",
+            "release_date": "2023-11-17",
+            "overview": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 3,
+            "popularity": round(rng.uniform(1, 500), 3),
+            "vote_average": round(rng.uniform(4, 9), 1),
+            "vote_count": rng.randint(0, 30000),
+            "budget": Decimal128(str(rng.randint(10 ** 5, 10 ** 8))),
+            "genres": rng.sample(list(TMDB_GENRE_NAMES.values()), 2),
+            "production_countries": rng.sample(list(REGION_CATALOG), 2),
+            "fetched_at": now - timedelta(minutes=rng.randint(0, 10000)),
+            "trending_score": round(rng.uniform(0, 300), 2)
+        }
+        for film_id in range(films_count)
+    ]
+    return {"period_days": 7, "total": len(films), "films": films}
+
+
+def default_render(payload) -> bytes:
+    """Put koji FastAPI prolazi za dict odgovor bez response_model-a"""
+    return JSONResponse(jsonable_encoder(payload, custom_encoder=BSON_ENCODERS)).body
+
+
+def orjson_render(payload) -> bytes:
+    return BSONJSONResponse(payload).body
+
+
+def measure(render, payload, repeat: int) -> float:
+    """Medijan vremena jednog renderovanja u milisekundama"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render(payload)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--films", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    payloads = {
+        "map_regional_popularity": make_map_payload(),
+        "films": make_films_payload(args.films)
+    }
+
+    results = {}
+    for name, payload in payloads.items():
+        default_ms = measure(default_render, payload, args.repeat)
+        orjson_ms = measure(orjson_render, payload, args.repeat)
+        results[name] = {
+            "bytes": len(orjson_render(payload)),
+            "default_ms": round(default_ms, 3),
+            "orjson_ms": round(orjson_ms, 3),
+            "saved_ms": round(default_ms - orjson_ms, 3),
+            "speedup": round(default_ms / orjson_ms, 1) if orjson_ms else None
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# backend/tests/test_correlation_task.py
+"""
+Korelacija kroz ulaz Celery taska: u daemon procesu (prefork worker) shard-ovi idu kao
+chord chunk taskova, a rezultat mora biti isti kao jednoprocesna korelacija.
+
+Pokretanje (iz backend foldera): python -m pytest tests
+"""
+import asyncio
+
+import mongomock
+import pytest
+
+from app.config import settings
+from app.services.etl import parallel_correlation, platform_counters
+from app.services.etl.aggregation_service import AggregationService
+from app.tasks import etl_tasks
+from app.tasks.celery_app import celery_app
+from benchmarks.bench_correlation import make_catalog
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # pymongo 4.9+ UpdateOne prosljeđuje sort=None, a mongomock ga ne poznaje
+    add_update = mongomock.collection.BulkOperationBuilder.add_update
+    monkeypatch.setattr(mongomock.collection.BulkOperationBuilder, "add_update",
+                        lambda self, *args, sort=None, **kwargs: add_update(self, *args, **kwargs))
+
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(etl_tasks, "get_mongo_client_sync", lambda: client)
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(settings, "CORRELATION_PARALLEL_MIN_FILMS", 10)
+    monkeypatch.setattr(parallel_correlation.parallel_correlation_service, "chunk_size", 7)
+
+    database = client[settings.MONGO_DB]
+    films, places = make_catalog(40, 30)
+    database.films.insert_many(films)
+    database.places.insert_many(places)
+    return database
+
+
+def _comparable(correlations):
+    return sorted(
+        (c["film_id"], c["total_matches"],
+         tuple((loc["place"].get("place_id"), loc["match_score"]) for loc in c["suggested_locations"]))
+        for c in correlations
+    )
+
+
+def test_worker_fans_out_as_celery_chord(db, monkeypatch):
+    monkeypatch.setattr(parallel_correlation, "in_daemon_process", lambda: True)
+
+    job_id = asyncio.run(etl_tasks.create_film_place_correlations(db, "places-job"))
+
+    job = db.etl_jobs.find_one({"job_id": job_id})
+    assert job["status"] == "completed"
+    assert job["results"]["execution"]["mode"] == "celery"
+    assert job["results"]["execution"]["chunks"] == 6
+
+    films = list(db.films.find().sort("film_id", 1))
+    places = list(db.places.find().sort("_id", 1))
+    expected = AggregationService.correlate_films_with_locations(films, places)
+    assert _comparable(db.film_place_correlations.find()) == _comparable(expected)
+
+
+def test_plain_process_correlates_in_place(db, monkeypatch):
+    monkeypatch.setattr(parallel_correlation, "in_daemon_process", lambda: False)
+    monkeypatch.setattr(parallel_correlation.parallel_correlation_service, "workers", 1)
+
+    job_id = asyncio.run(etl_tasks.create_film_place_correlations(db, "places-job"))
+
+    job = db.etl_jobs.find_one({"job_id": job_id})
+    assert job["status"] == "completed"
+    assert job["results"]["execution"]["mode"] == "single_process"
+    assert db.film_place_correlations.count_documents({}) == job["results"]["total_correlations"]
+
+
+def test_job_stats_kept_in_platform_counters(db, monkeypatch):
+    monkeypatch.setattr(parallel_correlation, "in_daemon_process", lambda: False)
+    monkeypatch.setattr(parallel_correlation.parallel_correlation_service, "workers", 1)
+
+    asyncio.run(etl_tasks.create_film_place_correlations(db, "places-job"))
+
+    counters = db[platform_counters.COUNTERS_COLLECTION].find_one({"_id": platform_counters.COUNTERS_ID})
+    stats = counters["jobs"]["film_place_correlation"]
+    assert (stats["runs"], stats["completed"]) == (1, 1)
+
+    # reconcile računa isto iz etl_jobs
+    platform_counters.reconcile_jobs(db)
+    counters = db[platform_counters.COUNTERS_COLLECTION].find_one({"_id": platform_counters.COUNTERS_ID})
+    assert {k: counters["jobs"]["film_place_correlation"][k] for k in ("runs", "completed")} == \
+        {"runs": 1, "completed": 1}
@@ -0,0 +1,35 @@
+# backend/tests/test_pagination.py
+"""
+Kursor keyset paginacije: vrijednosti ključa su samo skalari, inače 400
+(dict/list iz kursora ne smiju postati MongoDB operatori u keyset_filter).
+"""
+import base64
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from app.api.pagination import decode_cursor, encode_cursor
+
+FILMS_SORT = (("popularity", -1), ("film_id", 1))
+
+
+def _cursor(payload) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(payload)).decode().rstrip("=")
+
+
+def test_issued_cursor_round_trips():
+    cursor = encode_cursor("films", [12.5, 42])
+    assert decode_cursor(cursor, "films", FILMS_SORT) == [12.5, 42]
+    assert decode_cursor(encode_cursor("films", [None, 7]), "films", FILMS_SORT) == [None, 7]
+
+
+@pytest.mark.parametrize("values", [
+    [{"$gt": 0}, 1],
+    [12.5, {"$ne": None}],
+    [[1, 2], 1],
+])
+def test_non_scalar_cursor_values_are_rejected(values):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(_cursor({"l": "films", "k": values}), "films", FILMS_SORT)
+    assert error.value.status_code == 400
@@ -1,14 +1,97 @@
+import { useEffect, useState } from "react";
 import AdminLayout from "./AdminLayout";
+import { etlAPI } from "../../services/etlApi";
+
+const RANGES = {
+  hour: { label: "Hourly (today)", days: 1 },
+  day: { label: "Daily (last 14 days)", days: 14 },
+};
+
+function formatBucket(bucket, unit) {
+  const date = new Date(bucket);
+  return unit === "hour" ? date.toLocaleString() : date.toLocaleDateString();
+}
 
 export default function Stats() {
+  const [unit, setUnit] = useState("day");
+  const [rollups, setRollups] = useState([]);
+  const [loading, setLoading] = useState(true);
+  const [finishedJobs, setFinishedJobs] = useState(0);
+
+  // Završen ETL posao (change stream) -> ponovno učitavanje rollup-ova
+  useEffect(
+    () =>
+      etlAPI.subscribeEvents((event) => {
+        if (event.type === "etl_job" && ["completed", "failed"].includes(event.status)) {
+          setFinishedJobs((count) => count + 1);
+        }
+      }),
+    []
+  );
+
+  useEffect(() => {
+    setLoading(true);
+    etlAPI.getMetrics(unit, RANGES[unit].days).then((data) => {
+      // Samo cijeli poslovi; faze (fetch/load/...) su dostupne preko API-ja
+      setRollups(data.rollups.filter((row) => row.stage === "job"));
+      setLoading(false);
+    });
+  }, [unit, finishedJobs]);
+
   return (
     <div>
       <h1 className="text-3xl font-bold mb-6">Platform Statistics</h1>
 
+      <div className="flex gap-3 mb-4">
+        {Object.entries(RANGES).map(([key, range]) => (
+          <button
+            key={key}
+            onClick={() => setUnit(key)}
+            className={`px-4 py-2 rounded-lg ${unit === key ? "bg-purple-600 text-white" : "bg-gray-200"}`}
+          >
+            {range.label}
+          </button>
+        ))}
+      </div>
+
       <div className="bg-white p-6 rounded-xl shadow">
-        <p className="text-gray-500">
-          Charts will appear here once data is available.
-        </p>
+        {loading ? (
+          <p className="text-gray-500">Loading ETL metrics...</p>
+        ) : rollups.length === 0 ? (
+          <p className="text-gray-500">No ETL runs recorded in this period.</p>
+        ) : (
+          <table className="w-full border">
+            <thead>
+              <tr className="bg-gray-200">
+                <th className="p-3">{unit === "hour" ? "Hour" : "Day"}</th>
+                <th className="p-3">Job type</th>
+                <th className="p-3">Runs</th>
+                <th className="p-3">Failed</th>
+                <th className="p-3">Documents</th>
+                <th className="p-3">Inserted</th>
+                <th className="p-3">Docs/s</th>
+                <th className="p-3">Upstream calls</th>
+                <th className="p-3">Errors</th>
+              </tr>
+            </thead>
+
+            <tbody>
+              {rollups.map((row) => (
+                <tr key={`${row.bucket}-${row.job_type}`} className="border-b">
+                  <td className="p-3">{formatBucket(row.bucket, unit)}</td>
+                  <td className="p-3">{row.job_type}</td>
+                  <td className="p-3">{row.runs}</td>
+                  <td className="p-3">{row.failed}</td>
+                  <td className="p-3">{row.docs}</td>
+                  <td className="p-3">{row.inserted}</td>
+                  <td className="p-3">{row.docs_per_s}</td>
+                  <td className="p-3">{row.upstream_calls}</td>
+                  <td className="p-3">{row.errors}</td>
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        )}
       </div>
     </div>
   );
@@ -16,6 +16,57 @@ export const etlAPI = {
         last_jobs: []
       };
     }
+  },
+
+  // Unaprijed sumirane ETL metrike (unit: 'hour' | 'day')
+  getMetrics: async (unit = 'day', days = 7) => {
+    try {
+      const response = await api.get('/api/v1/etl/metrics', { params: { unit, days } });
+      return response.data;
+    } catch (error) {
+      console.error('Error fetching ETL metrics:', error);
+      return { unit, count: 0, rollups: [] };
+    }
+  },
+
+  // Live događaji (SSE, admin): data_changed, etl_job; vraća funkciju za zatvaranje.
+  // fetch umjesto EventSource-a - EventSource ne može poslati Authorization header.
+  subscribeEvents: (onEvent) => {
+    const controller = new AbortController();
+
+    const connect = async () => {
+      try {
+        const response = await fetch(`${api.defaults.baseURL}/api/v1/events/stream`, {
+          headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` },
+          signal: controller.signal,
+        });
+        if (response.status === 401 || response.status === 403) {
+          console.error('Event stream requires an admin session');
+          return;
+        }
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += value;
+          const messages = buffer.split('\n\n');
+          buffer = messages.pop();
+          messages.forEach((message) => {
+            const data = message.split('\n').find((line) => line.startsWith('data: '));
+            if (data) onEvent(JSON.parse(data.slice(6)));
+          });
+        }
+      } catch (error) {
+        if (controller.signal.aborted) return;
+        console.error('Event stream error:', error);
+      }
+      // Ponovno spajanje poslije prekida (kao EventSource)
+      if (!controller.signal.aborted) setTimeout(connect, 5000);
+    };
+
+    connect();
+    return () => controller.abort();
   }
 };
 